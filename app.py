@@ -2,11 +2,12 @@ import os
 
 import sentry_sdk
 from elasticsearch_dsl import connections
-from flask import Flask, jsonify
+from flask import Flask, g, jsonify
 from sentry_sdk.integrations.flask import FlaskIntegration
 
 import authors
 import autocomplete
+import caches
 import concepts
 import continents
 import countries
@@ -45,6 +46,13 @@ def create_app(config_object="settings"):
     @app.after_request
     def add_header(response):
         response.cache_control.max_age = 60 * 60 * 1  # 1 hour
+        if "response_cache" in g:
+            response.headers["X-Response-Cache"] = g.response_cache
+        if "query_plan_cache" in g:
+            response.headers["X-Query-Plan-Cache"] = g.query_plan_cache
+            response.headers["X-Query-Build-Time-Ms"] = str(g.query_build_time_ms)
+        if "groupby_values_age" in g:
+            response.headers["X-Groupby-Values-Age"] = str(g.groupby_values_age)
         return response
 
     return app
@@ -54,6 +62,7 @@ def register_blueprints(app):
     """Register Flask blueprints."""
     app.register_blueprint(authors.views.blueprint)
     app.register_blueprint(autocomplete.views.blueprint)
+    app.register_blueprint(caches.views.blueprint)
     app.register_blueprint(concepts.views.blueprint)
     app.register_blueprint(continents.views.blueprint)
     app.register_blueprint(countries.views.blueprint)
@@ -82,7 +91,11 @@ def register_blueprints(app):
 
 def register_extensions(app):
     sentry_sdk.init(dsn=os.environ.get("SENTRY_DSN"), integrations=[FlaskIntegration()])
-    connections.create_connection(hosts=[settings.ES_URL], timeout=30)
+    connections.create_connection(
+        hosts=[settings.ES_URL],
+        request_timeout=settings.ES_TIMEOUT,
+        connections_per_node=settings.ES_CONNECTIONS_PER_NODE,
+    )
     cache.init_app(app)
 
 
@@ -4,13 +4,15 @@ from authors.fields import fields_dict
 from authors.schemas import AuthorsSchema, MessageSchema
 from config.entity_config import entity_configs_dict
 from config.property_config import property_configs_dict
+from core.bulk_export import shared_export_view
 from core.export import export_group_by, is_group_by_export
 from core.filters_view import shared_filter_view
+from core.response_cache import cached_list_view
 from core.schemas import FiltersWrapperSchema
+from core.serialization import serialize
 from core.shared_view import shared_view
-from core.utils import (get_flattened_fields, get_valid_fields, is_cached,
+from core.utils import (get_flattened_fields, get_valid_fields,
                         process_only_fields)
-from extensions import cache
 from settings import AUTHORS_INDEX
 
 blueprint = Blueprint("authors", __name__)
@@ -38,11 +40,9 @@ blueprint = Blueprint("authors", __name__)
 #     return False
 
 
-@blueprint.route("/authors")
-@blueprint.route("/people")
-@cache.cached(
-    timeout=24 * 60 * 60, query_string=True, unless=lambda: not is_cached(request)
-)
+@blueprint.route("/authors", methods=["GET", "POST"])
+@blueprint.route("/people", methods=["GET", "POST"])
+@cached_list_view(fields_dict)
 def authors():
     index_name = AUTHORS_INDEX
     # if is_query_for_old_authors() is True:
@@ -53,8 +53,15 @@ def authors():
     # export option
     if is_group_by_export(request):
         return export_group_by(result, request)
-    message_schema = MessageSchema(only=only_fields)
-    return message_schema.dump(result)
+    return serialize(MessageSchema, result, only_fields)
+
+
+@blueprint.route("/authors/export.jsonl")
+def authors_export():
+    index_name = AUTHORS_INDEX
+    return shared_export_view(
+        request, fields_dict, index_name, AuthorsSchema, "authors"
+    )
 
 
 @blueprint.route("/authors/filters/<path:params>")
@@ -2,6 +2,7 @@ from elasticsearch_dsl import MultiSearch, Search
 from iso3166 import countries
 from marshmallow import Schema, fields, pre_dump
 
+from core.display_name_resolver import get_openalex_display_names
 from core.schemas import GroupBySchema, MetaSchema
 from settings import WORKS_INDEX
 
@@ -37,9 +38,38 @@ class AutoCompleteSchema(Schema):
     @pre_dump(pass_many=True)
     def author_hint_prep(self, data, many, **kwargs):
         """This function sets the author hint."""
+        data = self.set_missing_hint_names(data)
         data = self.set_author_hint_institution(data)
         return data
 
+    @staticmethod
+    def set_missing_hint_names(data):
+        """Resolve host organization and institution names missing from the hits."""
+        missing = []
+        for obj in data:
+            if "sources" in obj.meta.index:
+                if getattr(obj, "host_organization", None) and not getattr(
+                    obj, "host_organization_name", None
+                ):
+                    missing.append((obj, "host_organization", "host_organization_name"))
+            elif "authors" in obj.meta.index:
+                for last_known_institution in getattr(
+                    obj, "last_known_institutions", []
+                )[0:1]:
+                    if (
+                        last_known_institution
+                        and getattr(last_known_institution, "id", None)
+                        and not getattr(last_known_institution, "display_name", None)
+                    ):
+                        missing.append((last_known_institution, "id", "display_name"))
+        if missing:
+            display_names = get_openalex_display_names(
+                [getattr(obj, id_key) for obj, id_key, _ in missing]
+            )
+            for obj, id_key, name_key in missing:
+                setattr(obj, name_key, display_names.get(getattr(obj, id_key)))
+        return data
+
     def set_author_hint_institution(self, data):
         for obj in data:
             if "authors" in obj.meta.index:
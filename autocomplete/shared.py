@@ -2,11 +2,12 @@ from collections import OrderedDict
 
 from elasticsearch_dsl import Q, Search
 
+import settings
 from autocomplete.utils import AUTOCOMPLETE_SOURCE
 from autocomplete.validate import validate_entity_autocomplete_params
 from core.filter import filter_records
 from core.search import full_search_query
-from core.utils import map_filter_params
+from core.utils import get_total_count, map_filter_params
 from core.preference import clean_preference
 from ids import utils as id_utils
 
@@ -73,11 +74,12 @@ def single_entity_autocomplete(fields_dict, index_name, request):
         preference = clean_preference(q)
         s = s.params(preference=preference)
 
+    s = s.extra(track_total_hits=settings.TRACK_TOTAL_HITS)
     response = s.execute()
 
     result = OrderedDict()
     result["meta"] = {
-        "count": s.count(),
+        "count": get_total_count(response, s),
         "db_response_time_ms": response.took,
         "page": 1,
         "per_page": 10,
@@ -24,6 +24,7 @@ from autocomplete.validate import validate_full_autocomplete_params
 from concepts.fields import fields_dict as concepts_fields_dict
 from core.exceptions import APIQueryParamsError
 from core.preference import clean_preference
+from core.utils import get_total_count
 from extensions import cache
 from funders.fields import fields_dict as funders_fields_dict
 from institutions.fields import fields_dict as institutions_fields_dict
@@ -40,6 +41,7 @@ from settings import (
     PUBLISHERS_INDEX,
     SOURCES_INDEX,
     TOPICS_INDEX,
+    TRACK_TOTAL_HITS,
     WORKS_INDEX,
 )
 from sources.fields import fields_dict as sources_fields_dict
@@ -105,11 +107,12 @@ def autocomplete_full():
     s = s.source(AUTOCOMPLETE_SOURCE)
     preference = clean_preference(q)
     s = s.params(preference=preference)
+    s = s.extra(track_total_hits=TRACK_TOTAL_HITS)
     response = s.execute()
 
     result = OrderedDict()
     result["meta"] = {
-        "count": s.count(),
+        "count": get_total_count(response, s),
         "db_response_time_ms": response.took,
         "page": 1,
         "per_page": 10,
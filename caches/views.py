@@ -0,0 +1,27 @@
+from flask import Blueprint, jsonify
+
+from core.display_name_resolver import display_name_resolver
+from core.filter_parser import parse_stats
+from core.group_by.groupby_values import groupby_values
+from core.merged_id_resolver import merged_id_resolver
+from core.plan_cache import plan_cache
+from core.response_cache import response_cache_stats
+from core.single_flight import single_flight
+
+blueprint = Blueprint("caches", __name__)
+
+
+@blueprint.route("/caches")
+def caches():
+    """Counters for the caches of the worker that answers the request."""
+    return jsonify(
+        {
+            "responses": response_cache_stats.stats(),
+            "single_flight": single_flight.stats(),
+            "query_plans": plan_cache.stats(),
+            "filter_parses": parse_stats(),
+            "display_names": display_name_resolver.stats(),
+            "merged_ids": merged_id_resolver.stats(),
+            "groupby_values": groupby_values.stats(),
+        }
+    )
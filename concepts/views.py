@@ -4,22 +4,22 @@ from concepts.fields import fields_dict
 from concepts.schemas import ConceptsSchema, MessageSchema
 from config.entity_config import entity_configs_dict
 from config.property_config import property_configs_dict
+from core.bulk_export import shared_export_view
 from core.export import export_group_by, is_group_by_export
 from core.filters_view import shared_filter_view
+from core.response_cache import cached_list_view
 from core.schemas import FiltersWrapperSchema
+from core.serialization import serialize
 from core.shared_view import shared_view
-from core.utils import (get_flattened_fields, get_valid_fields, is_cached,
+from core.utils import (get_flattened_fields, get_valid_fields,
                         process_only_fields)
-from extensions import cache
 from settings import CONCEPTS_INDEX
 
 blueprint = Blueprint("concepts", __name__)
 
 
-@blueprint.route("/concepts")
-@cache.cached(
-    timeout=24 * 60 * 60, query_string=True, unless=lambda: not is_cached(request)
-)
+@blueprint.route("/concepts", methods=["GET", "POST"])
+@cached_list_view(fields_dict)
 def concepts():
     index_name = CONCEPTS_INDEX
     default_sort = ["-works_count", "id"]
@@ -28,8 +28,15 @@ def concepts():
     # export option
     if is_group_by_export(request):
         return export_group_by(result, request)
-    message_schema = MessageSchema(only=only_fields)
-    return message_schema.dump(result)
+    return serialize(MessageSchema, result, only_fields)
+
+
+@blueprint.route("/concepts/export.jsonl")
+def concepts_export():
+    index_name = CONCEPTS_INDEX
+    return shared_export_view(
+        request, fields_dict, index_name, ConceptsSchema, "concepts"
+    )
 
 
 @blueprint.route("/concepts/filters/<path:params>")
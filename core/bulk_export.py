@@ -0,0 +1,177 @@
+import queue
+import threading
+
+from elasticsearch_dsl import Search
+from flask import Response, stream_with_context
+
+import settings
+from core.cursor import close_point_in_time, open_point_in_time
+from core.exceptions import APIQueryParamsError
+from core.export import get_timestamp
+from core.filter import filter_records
+from core.params import parse_export_params
+from core.query_optimizer import optimize_search
+from core.search import check_is_search_query, full_search_query
+from core.serialization import encode, get_dump_function
+from core.shared_view import set_source
+from core.sort import get_sort_fields
+from core.utils import process_only_fields
+from core.validate import validate_export_params
+
+"""
+Streams every record matching a list query as newline delimited JSON. Filters and
+search are built by the same functions as the list API, and records are read through a
+point in time with search_after one page at a time, so memory stays bounded however
+many records match. Large exports can be split into slices that are read in parallel.
+"""
+
+# marks the end of a slice in the page queue
+DONE = object()
+
+
+def shared_export_view(request, fields_dict, index_name, schema_class, entity_name):
+    validate_export_params(request)
+    params = parse_export_params(request)
+    only_fields = get_select_fields(request, schema_class)
+    s = construct_export_query(params, fields_dict, index_name)
+    dump = get_dump_function(schema_class, only_fields)
+    export = BulkExport(index_name, s, params["slices"])
+    export.open()
+    response = Response(
+        stream_with_context(stream_records(export, dump)),
+        mimetype="application/x-ndjson",
+    )
+    filename = f"openalex-{entity_name}-{get_timestamp()}.jsonl"
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return response
+
+
+def get_select_fields(request, schema_class):
+    """The select param as field names of the entity schema, validated like the list API."""
+    only_fields = process_only_fields(request, schema_class)
+    if not only_fields:
+        return None
+    return tuple(
+        field[len("results.") :]
+        for field in only_fields
+        if field.startswith("results.")
+    )
+
+
+def construct_export_query(params, fields_dict, index_name):
+    # searches within a point in time must not name an index
+    s = Search()
+    s = set_source(index_name, s)
+    if params["search"] and params["search"] != '""':
+        s = s.query(full_search_query(index_name, params["search"]))
+    if params["filters"]:
+        s = filter_records(fields_dict, params["filters"], s)
+    s = s.sort(*get_export_sort_fields(params, fields_dict))
+    return optimize_search(s)
+
+
+def get_export_sort_fields(params, fields_dict):
+    sort_fields = []
+    if params["sort"]:
+        is_search_query = check_is_search_query(params["filters"], params["search"])
+        if not is_search_query and "relevance_score" in params["sort"]:
+            raise APIQueryParamsError(
+                "Must include a search query (such as ?search=example or /filter=display_name.search:example) in order to sort by relevance_score."
+            )
+        sort_fields = get_sort_fields(fields_dict, None, params["sort"])
+    # _shard_doc is the cheapest tiebreaker for search_after within a point in time
+    return sort_fields + ["_shard_doc"]
+
+
+def stream_records(export, dump):
+    try:
+        for page in export.pages():
+            yield b"".join(encode(record) + b"\n" for record in dump(page, True, False))
+    finally:
+        export.close()
+
+
+class BulkExport:
+    """Pages through a query in a point in time, optionally split into parallel slices."""
+
+    def __init__(self, index_name, s, slices=1):
+        self.index_name = index_name
+        self.s = s
+        self.slices = slices
+        self.pit_id = None
+
+    def open(self):
+        self.pit_id = open_point_in_time(self.index_name, settings.EXPORT_KEEP_ALIVE)
+
+    def close(self):
+        if self.pit_id is not None:
+            pit_id, self.pit_id = self.pit_id, None
+            close_point_in_time(pit_id)
+
+    def pages(self):
+        """Yields elasticsearch responses until every slice is exhausted."""
+        if self.slices == 1:
+            yield from self.read_slice(0)
+            return
+
+        # a few pages per slice are buffered while the client reads
+        pages = queue.Queue(maxsize=self.slices * 2)
+        stop = threading.Event()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def read(slice_id):
+            try:
+                for page in self.read_slice(slice_id):
+                    if not put(page):
+                        return
+            except Exception as e:
+                put(e)
+            finally:
+                put(DONE)
+
+        for slice_id in range(self.slices):
+            threading.Thread(target=read, args=(slice_id,), daemon=True).start()
+
+        finished = 0
+        try:
+            while finished < self.slices:
+                item = pages.get()
+                if item is DONE:
+                    finished += 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            stop.set()
+
+    def read_slice(self, slice_id):
+        pit_id = self.pit_id
+        search_after = None
+        while True:
+            s = self.s.extra(
+                pit={"id": pit_id, "keep_alive": settings.EXPORT_KEEP_ALIVE},
+                size=settings.EXPORT_PAGE_SIZE,
+                track_total_hits=False,
+            )
+            if self.slices > 1:
+                s = s.extra(slice={"id": slice_id, "max": self.slices})
+            if search_after:
+                s = s.extra(search_after=search_after)
+            response = s.execute()
+            if not response.hits:
+                return
+            yield response
+            if len(response.hits) < settings.EXPORT_PAGE_SIZE:
+                return
+            # elastic may hand back a new id for the same point in time
+            pit_id = getattr(response, "pit_id", pit_id)
+            search_after = list(response.hits[-1].meta.sort)
@@ -0,0 +1,110 @@
+import json
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from flask import g, request
+
+from core.response_cache import get_cache_key, get_cached, is_cached
+
+"""
+Fills the response cache from request logs after a deploy or index swap. Logged paths
+are grouped by their response cache key, ranked by how much time they cost in the logs,
+and the top ones are replayed through the app in this process, so they run the same
+views and land under the same keys as live requests.
+"""
+
+HotPath = namedtuple("HotPath", ["path", "cache_key", "requests", "cost_ms"])
+
+
+def read_request_log(lines):
+    """(path, cost in ms or None) for each JSON line with a request_path or path."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(record, dict):
+            continue
+        path = record.get("request_path") or record.get("path")
+        if not path:
+            continue
+        url = urlsplit(path)
+        path = f"{url.path}?{url.query}" if url.query else url.path
+        yield path, record.get("response_time_ms")
+
+
+def rank_paths(app, requests):
+    """
+    Cacheable paths by total logged cost, then by request count. Equivalent paths share
+    a cache key and are counted together under the most requested spelling.
+    """
+    groups = {}
+    for path, cost_ms in requests:
+        cache_key = get_warmable_key(app, path)
+        if cache_key is None:
+            continue
+        group = groups.setdefault(cache_key, {"paths": {}, "requests": 0, "cost_ms": 0})
+        group["paths"][path] = group["paths"].get(path, 0) + 1
+        group["requests"] += 1
+        group["cost_ms"] += cost_ms or 0
+
+    hot_paths = [
+        HotPath(
+            max(group["paths"], key=group["paths"].get),
+            cache_key,
+            group["requests"],
+            round(group["cost_ms"]),
+        )
+        for cache_key, group in groups.items()
+    ]
+    return sorted(hot_paths, key=lambda hot: (-hot.cost_ms, -hot.requests, hot.path))
+
+
+def get_warmable_key(app, path):
+    """The response cache key for a GET of path, or None if it is never cached."""
+    with app.test_request_context(path):
+        view = app.view_functions.get(request.endpoint)
+        if not getattr(view, "cached_list_view", False) or not is_cached(request):
+            return None
+        return get_cache_key(request, view.fields_dict)
+
+
+def warm_path(app, hot_path, refresh=True):
+    """Replay one path and report how long it took to compute."""
+    with app.test_request_context(hot_path.path):
+        if not refresh and get_cached(hot_path.cache_key)[1] is not None:
+            return warm_report(hot_path, "cached", None, 0)
+        # the replay computes and overwrites the entry, which is served meanwhile
+        g.refresh_response_cache = True
+        start = time.monotonic()
+        try:
+            status_code = app.full_dispatch_request().status_code
+        except Exception:
+            app.logger.exception(f"Warming {hot_path.path} failed.")
+            status_code = 500
+        compute_ms = round((time.monotonic() - start) * 1000)
+        return warm_report(hot_path, g.get("response_cache"), status_code, compute_ms)
+
+
+def warm_report(hot_path, cache_status, status_code, compute_ms):
+    return {
+        "path": hot_path.path,
+        "cache_key": hot_path.cache_key,
+        "requests": hot_path.requests,
+        "logged_cost_ms": hot_path.cost_ms,
+        "cache_status": cache_status,
+        "status_code": status_code,
+        "compute_ms": compute_ms,
+    }
+
+
+def warm_cache(app, requests, top=100, concurrency=4, refresh=True):
+    """Replay the top paths from requests, at most concurrency at a time."""
+    hot_paths = rank_paths(app, requests)[:top]
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(lambda hot: warm_path(app, hot, refresh), hot_paths))
@@ -1,12 +1,25 @@
 import base64
+import binascii
 import json
 
-from elasticsearch_dsl import AttrDict
+from elasticsearch_dsl import AttrDict, connections
 
 import settings
 from core.exceptions import APIPaginationError
 from core.group_by.utils import parse_group_by, get_bucket_keys
 
+"""
+Cursors for list pagination. New cursors carry a point in time id, so every page of a
+walk reads the same snapshot and the total is only counted once. Cursors without a
+point in time, issued before it was added or after one expired, page statelessly with
+search_after against the index.
+
+Many clients read only the first page, so the first page keeps its point in time alive
+briefly, and a page that is not full ends the walk and closes it.
+"""
+
+PIT_CURSOR_PREFIX = "pit."
+
 
 def encode_cursor(cursor):
     cursor_json = json.dumps(str(cursor)).encode()
@@ -39,24 +52,113 @@ def get_cursor(response):
     return next_cursor
 
 
-def get_next_cursor(params, response):
+def encode_pit_cursor(pit_id, search_after, count):
+    cursor_json = json.dumps(
+        {"pit_id": pit_id, "search_after": search_after, "count": count}
+    )
+    encoded = base64.urlsafe_b64encode(cursor_json.encode()).decode().rstrip("=")
+    return f"{PIT_CURSOR_PREFIX}{encoded}"
+
+
+def decode_pit_cursor(encoded_cursor):
+    encoded = encoded_cursor[len(PIT_CURSOR_PREFIX) :]
+    try:
+        padded = encoded + "=" * (-len(encoded) % 4)
+        cursor = json.loads(base64.urlsafe_b64decode(padded))
+        return cursor["pit_id"], list(cursor["search_after"]), cursor["count"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise APIPaginationError("Invalid cursor value")
+
+
+def is_pit_cursor(cursor):
+    return bool(cursor) and cursor.startswith(PIT_CURSOR_PREFIX)
+
+
+def get_cursor_count(cursor):
+    """The total counted on the first page of a point in time walk, if there is one."""
+    if not is_pit_cursor(cursor):
+        return None
+    _, _, count = decode_pit_cursor(cursor)
+    return count
+
+
+def get_next_cursor(params, response, count=None):
     if params.get("group_by"):
         elastic_cursor = get_group_by_after_key(params["group_by"], response)
     else:
         elastic_cursor = get_cursor(response)
+    pit_id = response.to_dict().get("pit_id")
+    if pit_id and (not elastic_cursor or is_last_page(params, response)):
+        # the walk is over, free the snapshot instead of waiting for it to expire
+        close_point_in_time(pit_id)
+        return None
+    elif pit_id:
+        return encode_pit_cursor(pit_id, list(elastic_cursor), count)
     next_cursor = encode_cursor(elastic_cursor) if elastic_cursor else None
     return next_cursor
 
 
-def handle_cursor(cursor, page, s):
+def is_last_page(params, response):
+    """A page of a point in time walk with fewer hits than asked for is the last one."""
+    return len(response["hits"]["hits"]) < params["per_page"]
+
+
+def handle_cursor(cursor, page, s, index_name, use_pit=True):
+    """
+    Adds the cursor to a search. A first page opens a point in time when use_pit is set
+    and point in time cursors are enabled. Point in time cursors read as stateless ones
+    when use_pit is False, which is how a walk continues after its snapshot expired.
+    """
     if cursor and page != 1:
         raise APIPaginationError("Cannot use page parameter with cursor.")
-    if cursor and cursor != "*":
+    use_pit = use_pit and settings.CURSOR_USE_PIT
+    if cursor == "*" and use_pit:
+        pit_id = open_point_in_time(
+            index_name,
+            settings.CURSOR_FIRST_PAGE_KEEP_ALIVE,
+            s._params.get("preference"),
+        )
+        s = with_point_in_time(s, pit_id, settings.CURSOR_FIRST_PAGE_KEEP_ALIVE)
+    elif is_pit_cursor(cursor):
+        pit_id, search_after, _ = decode_pit_cursor(cursor)
+        if use_pit:
+            s = with_point_in_time(s, pit_id, settings.CURSOR_KEEP_ALIVE)
+            # the total was counted on the first page
+            s = s.extra(search_after=search_after, track_total_hits=False)
+        else:
+            # drop the _shard_doc tiebreaker, which only exists within the snapshot
+            s = s.extra(search_after=search_after[:-1])
+    elif cursor and cursor != "*":
         decoded_cursor = decode_cursor(cursor)
         s = s.extra(search_after=decoded_cursor)
     return s
 
 
+def with_point_in_time(s, pit_id, keep_alive):
+    # searches in a point in time must not name an index, routing or preference
+    sort = s.to_dict().get("sort", [])
+    s = s.index()
+    s = s.params(preference=None)
+    s = s.extra(pit={"id": pit_id, "keep_alive": keep_alive})
+    return s.sort(*sort, "_shard_doc")
+
+
+def open_point_in_time(index_name, keep_alive, preference=None):
+    es = connections.get_connection()
+    response = es.open_point_in_time(
+        index=index_name, keep_alive=keep_alive, preference=preference
+    )
+    return response["id"]
+
+
+def close_point_in_time(pit_id):
+    try:
+        connections.get_connection().close_point_in_time(id=pit_id)
+    except Exception:
+        # it expires after its keep alive anyway
+        pass
+
+
 def get_group_by_after_key(group_by, response):
     group_by, _ = parse_group_by(group_by)
     bucket_keys = get_bucket_keys(group_by)
@@ -0,0 +1,246 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import redis
+from elasticsearch_dsl import MultiSearch, Search
+
+import settings
+from core.utils import get_full_openalex_id, get_index_name_by_id
+
+"""
+Resolves ids to display names through an in-process LRU (L1) backed by redis (L2).
+Misses are fetched from elastic with one terms query per index, sent together in a
+single msearch. Cache keys include the index name, so bumping an index version in
+settings invalidates its cached names. Ids that were not found are cached for miss_ttl,
+which defaults to the ttl, and are not cached at all when it is 0.
+"""
+
+KEY_PREFIX = "display_name"
+
+
+class DisplayNameResolver:
+    key_prefix = KEY_PREFIX
+
+    def __init__(self, max_size, ttl, redis_client=None, miss_ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.miss_ttl = ttl if miss_ttl is None else miss_ttl
+        self.redis_client = redis_client
+        self.names = OrderedDict()
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def resolve(self, ids_by_index):
+        """
+        Takes a dict of index name to ids and returns a dict of id to display name.
+        Ids that do not exist in their index are left out.
+        """
+        results = {}
+        missing = {}
+        for index_name, ids in ids_by_index.items():
+            for openalex_id in set(ids):
+                found, display_name = self.get_local(index_name, openalex_id)
+                if found:
+                    if display_name is not None:
+                        results[openalex_id] = display_name
+                else:
+                    missing.setdefault(index_name, []).append(openalex_id)
+
+        if missing:
+            for (index_name, openalex_id), display_name in self.fetch(missing).items():
+                if display_name is not None:
+                    results[openalex_id] = display_name
+        return results
+
+    def get_local(self, index_name, openalex_id):
+        key = (index_name, openalex_id)
+        with self.lock:
+            entry = self.names.get(key)
+            if entry is None:
+                return False, None
+            expires_at, display_name = entry
+            if expires_at < time.monotonic():
+                del self.names[key]
+                return False, None
+            self.names.move_to_end(key)
+            self.hits += 1
+            return True, display_name
+
+    def get_ttl(self, value):
+        return self.ttl if value is not None else self.miss_ttl
+
+    def set_local(self, index_name, openalex_id, display_name):
+        ttl = self.get_ttl(display_name)
+        if self.max_size <= 0 or ttl <= 0:
+            return
+        key = (index_name, openalex_id)
+        with self.lock:
+            self.names[key] = (time.monotonic() + ttl, display_name)
+            self.names.move_to_end(key)
+            while len(self.names) > self.max_size:
+                self.names.popitem(last=False)
+
+    def fetch(self, missing):
+        """Fill missing names from redis, then elastic, and cache what was found."""
+        keys = [
+            (index_name, openalex_id)
+            for index_name, ids in missing.items()
+            for openalex_id in ids
+        ]
+        fetched = self.get_remote(keys)
+        with self.lock:
+            self.redis_hits += len(fetched)
+            self.misses += len(keys) - len(fetched)
+
+        from_elastic = self.search({key for key in keys if key not in fetched})
+        self.set_remote(from_elastic)
+        fetched.update(from_elastic)
+
+        for (index_name, openalex_id), display_name in fetched.items():
+            self.set_local(index_name, openalex_id, display_name)
+        return fetched
+
+    def search(self, keys):
+        """One terms query per index, sent as one msearch. Unknown ids map to None."""
+        if not keys:
+            return {}
+        ids_by_index = {}
+        for index_name, openalex_id in keys:
+            ids_by_index.setdefault(index_name, []).append(openalex_id)
+
+        ms = MultiSearch()
+        for index_name, ids in ids_by_index.items():
+            ms = ms.add(self.build_search(index_name, ids))
+        responses = ms.execute()
+
+        results = {key: None for key in keys}
+        for index_name, response in zip(ids_by_index, responses):
+            for item in response:
+                results[(index_name, item.id)] = self.get_value(item)
+        return results
+
+    @staticmethod
+    def build_search(index_name, ids):
+        s = Search(index=index_name)
+        s = s.filter("terms", id=ids)
+        s = s.source(["id", "display_name"])
+        return s.extra(size=len(ids))
+
+    @staticmethod
+    def get_value(item):
+        return item.display_name
+
+    def get_remote(self, keys):
+        if not self.redis_client or not keys:
+            return {}
+        try:
+            values = self.redis_client.mget(
+                [redis_key(*key, self.key_prefix) for key in keys]
+            )
+        except redis.RedisError:
+            # redis is only a cache, fall back to elastic
+            return {}
+        return {
+            key: json.loads(value)
+            for key, value in zip(keys, values)
+            if value is not None
+        }
+
+    def set_remote(self, names):
+        if not self.redis_client or not names:
+            return
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key, display_name in names.items():
+                ttl = self.get_ttl(display_name)
+                if ttl <= 0:
+                    continue
+                pipe.setex(
+                    redis_key(*key, self.key_prefix), ttl, json.dumps(display_name)
+                )
+            pipe.execute()
+        except redis.RedisError:
+            pass
+
+    def clear(self):
+        with self.lock:
+            self.names.clear()
+            self.hits = 0
+            self.redis_hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                "size": len(self.names),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+            }
+
+
+def redis_key(index_name, openalex_id, prefix=KEY_PREFIX):
+    return f"{prefix}:{index_name}:{openalex_id}"
+
+
+def get_redis_client():
+    if not settings.CACHE_REDIS_URL:
+        return None
+    return redis.Redis.from_url(
+        settings.CACHE_REDIS_URL, socket_timeout=settings.DISPLAY_NAME_REDIS_TIMEOUT
+    )
+
+
+display_name_resolver = DisplayNameResolver(
+    settings.DISPLAY_NAME_CACHE_SIZE,
+    settings.DISPLAY_NAME_CACHE_TTL,
+    get_redis_client(),
+)
+
+
+def get_display_names(ids, index_name):
+    """Display names for ids that all live in one index, like keywords or licenses."""
+    return display_name_resolver.resolve({index_name: ids})
+
+
+def get_openalex_display_names(ids):
+    """
+    Display names keyed by the ids passed in, which may be short or full openalex ids of
+    any entity type. Ids that are not valid openalex ids are skipped.
+    """
+    full_ids = {}
+    ids_by_index = {}
+    for openalex_id in ids:
+        full_id = get_full_openalex_id(openalex_id)
+        index_name = get_index_name_by_id(full_id) if full_id else None
+        if not index_name:
+            continue
+        full_ids[openalex_id] = full_id
+        ids_by_index.setdefault(index_name, []).append(full_id)
+
+    names = display_name_resolver.resolve(ids_by_index)
+    return {
+        openalex_id: names[full_id]
+        for openalex_id, full_id in full_ids.items()
+        if full_id in names
+    }
+
+
+def get_display_name(openalex_id):
+    """Takes an openalex id and returns a single display name."""
+    if not openalex_id:
+        return None
+    elif openalex_id == "null":
+        return "unknown"
+
+    if "https://openalex.org" not in openalex_id:
+        openalex_id = f"https://openalex.org/{openalex_id}"
+
+    # raises for ids that are not valid openalex ids
+    get_index_name_by_id(openalex_id)
+    return get_openalex_display_names([openalex_id]).get(openalex_id)
@@ -19,6 +19,11 @@ class APISearchError(APIError):
     description = "Search execution error."
 
 
+class APITimeoutError(APIError):
+    code = 504
+    description = "Search timeout error."
+
+
 class HighAuthorCountError(APIError):
     code = 403
     description = "High author count limitation."
@@ -0,0 +1,55 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from flask import copy_current_request_context, has_request_context
+
+import settings
+from core.exceptions import APITimeoutError
+
+"""
+Runs independent elasticsearch calls within a request at the same time, so a request
+waits for its slowest lookup rather than the sum of them.
+"""
+
+THREAD_NAME_PREFIX = "es-fanout"
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.ES_FANOUT_WORKERS, thread_name_prefix=THREAD_NAME_PREFIX
+)
+
+
+def in_fanout_thread():
+    return threading.current_thread().name.startswith(THREAD_NAME_PREFIX)
+
+
+def submit(func, *args, **kwargs):
+    """
+    Start func in the shared pool, carrying the current request context with it. The
+    pool thread gets its own app context, so values func writes to g are not seen by
+    the request. Return them from func instead.
+    """
+    if has_request_context():
+        func = copy_current_request_context(func)
+    return executor.submit(func, *args, **kwargs)
+
+
+def get_result(future, timeout=None):
+    timeout = settings.ES_FANOUT_TIMEOUT if timeout is None else timeout
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        raise APITimeoutError(f"Lookup did not finish within {timeout} seconds.")
+
+
+def parallel_map(func, items, timeout=None):
+    """
+    Like map(func, items) but runs the calls in parallel. Calls made from a pool thread
+    run inline so nested fan-outs cannot exhaust the pool.
+    """
+    items = list(items)
+    if len(items) < 2 or in_fanout_thread():
+        return [func(item) for item in items]
+    futures = [submit(func, item) for item in items]
+    return [get_result(future, timeout) for future in futures]
@@ -7,6 +7,8 @@ from openpyxl import Workbook
 from openpyxl.utils import get_column_letter
 from openpyxl.writer.excel import save_virtual_workbook
 
+from core.group_by.utils import is_pivot_group_by, parse_pivot_group_by
+
 
 def is_group_by_export(request):
     export_format = request.args.get("format")
@@ -21,48 +23,71 @@ def is_group_by_export(request):
 
 def export_group_by(result, request):
     group_by_key = request.args.get("group_by") or request.args.get("group-by")
-    if group_by_key:
-        group_by_results = format_group_by_results(result, group_by_key)
+    if is_pivot_group_by(group_by_key):
+        rows = pivot_group_by_rows(result, group_by_key)
+    elif group_by_key:
+        rows = group_by_rows(format_group_by_results(result, group_by_key))
     else:
-        group_by_results = format_group_bys_results(result)
+        rows = group_by_rows(format_group_bys_results(result))
     timestamp = get_timestamp()
     export_format = request.args.get("format")
     filename = f"openalex-group-by-{timestamp}.{export_format.lower()}"
 
     if export_format.lower() == "csv":
-        response = export_group_by_csv(filename, group_by_results)
+        response = export_group_by_csv(filename, rows)
     elif export_format.lower() == "xlsx":
-        response = export_group_by_xlsx(filename, group_by_results)
+        response = export_group_by_xlsx(filename, rows)
     else:
         raise ValueError("Invalid format")
     return response
 
 
-def export_group_by_csv(filename, group_by_results):
-    string_io = io.StringIO()
-
+def group_by_rows(group_by_results):
+    """Each group by in its own name and count columns, side by side."""
     max_rows = max(len(rows) for rows in group_by_results.values())
 
-    csv_writer = csv.writer(string_io)
-
     top_row = []
     for group_by_key in group_by_results.keys():
         top_row.extend([friendly_header_name(group_by_key), "", ""])
-    csv_writer.writerow(top_row)
 
     header_row = []
     for _ in group_by_results:
         header_row.extend(["name", "count", ""])
-    csv_writer.writerow(header_row)
 
+    rows = [top_row, header_row]
     for i in range(max_rows):
         row_data = []
-        for rows in group_by_results.values():
-            if i < len(rows):
-                row_data.extend([rows[i]["key_display_name"], rows[i]["count"], ""])
+        for group_rows in group_by_results.values():
+            if i < len(group_rows):
+                row_data.extend(
+                    [group_rows[i]["key_display_name"], group_rows[i]["count"], ""]
+                )
             else:
                 row_data.extend(["", "", ""])
-        csv_writer.writerow(row_data)
+        rows.append(row_data)
+    return rows
+
+
+def pivot_group_by_rows(result, group_by_key):
+    """One row per pair of groups, which spreadsheets can pivot back into a table."""
+    (outer, _), (inner, _) = parse_pivot_group_by(group_by_key)
+    header = [friendly_header_name(outer), friendly_header_name(inner), "count"]
+    return [header] + [
+        [
+            group["key_display_name"],
+            inner_group["key_display_name"],
+            inner_group["doc_count"],
+        ]
+        for group in result["group_by"]
+        for inner_group in group["groups"]
+    ]
+
+
+def export_group_by_csv(filename, rows):
+    string_io = io.StringIO()
+
+    csv_writer = csv.writer(string_io)
+    csv_writer.writerows(rows)
 
     output = make_response(string_io.getvalue())
     output.headers["Content-Disposition"] = f"attachment; filename={filename}"
@@ -70,30 +95,14 @@ def export_group_by_csv(filename, group_by_results):
     return output
 
 
-def export_group_by_xlsx(filename, group_by_results):
+def export_group_by_xlsx(filename, rows):
     wb = Workbook()
     ws = wb.active
 
-    max_rows = max(len(rows) for rows in group_by_results.values())
-
-    col_index = 1
-    for group_by_key in group_by_results.keys():
-        ws.cell(row=1, column=col_index, value=friendly_header_name(group_by_key))
-        col_index += 3
-
-    col_index = 1
-    for _ in group_by_results:
-        ws.cell(row=2, column=col_index, value="name")
-        ws.cell(row=2, column=col_index + 1, value="count")
-        col_index += 3
-
-    for i in range(max_rows):
-        col_index = 1
-        for rows in group_by_results.values():
-            if i < len(rows):
-                ws.cell(row=i + 3, column=col_index, value=rows[i]["key_display_name"])
-                ws.cell(row=i + 3, column=col_index + 1, value=rows[i]["count"])
-            col_index += 3
+    for row_index, row in enumerate(rows, start=1):
+        for col_index, value in enumerate(row, start=1):
+            if value != "":
+                ws.cell(row=row_index, column=col_index, value=value)
 
     for col in ws.columns:
         max_length = 0
@@ -2,13 +2,37 @@ import datetime
 import re
 from abc import ABC, abstractmethod
 
-from elasticsearch_dsl import Q, Search
+from elasticsearch_dsl import Q
 
 import country_list
 from core.exceptions import APIQueryParamsError
 from core.search import SearchOpenAlex, full_search_query
+from core.terms_lookup import resolve_work_locations, terms_lookup_query
+from core.topic_ids import topic_entity, topic_id_query
 from core.utils import get_full_openalex_id, normalize_openalex_id
-from settings import CONTINENT_PARAMS, EXTERNAL_ID_FIELDS, VERSIONS, WORKS_INDEX
+from settings import CONTINENT_PARAMS, EXTERNAL_ID_FIELDS, VERSIONS
+
+# filters that match the ids listed at a path of another work
+TERMS_LOOKUP_PATHS = {"cited_by": "referenced_works", "related_to": "related_works"}
+
+# term filters whose values are external or openalex ids
+ID_PARAMS = [
+    "affiliations.institution.ror",
+    "author.orcid",
+    "authorships.author.orcid",
+    "authorships.institutions.ror",
+    "doi",
+    "ids.pmid",
+    "ids.pmcid",
+    "institutions.ror",
+    "issn",
+    "orcid",
+    "openalex_id",
+    "pmid",
+    "pmcid",
+    "ror",
+    "wikidata_id",
+]
 
 
 class Field(ABC):
@@ -26,7 +50,6 @@ class Field(ABC):
         self.param = param
         self.alias = alias
         self.custom_es_field = custom_es_field
-        self.value = None
         self.unique_id = unique_id
         self.index = index
         self.docstring = docstring
@@ -34,14 +57,35 @@ class Field(ABC):
         self.alternate_names = (
             alternate_names  # optional list of strings, useful for search
         )
+        # fields are shared across requests and threads, so they are read-only once built
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False):
+            raise AttributeError(
+                f"{type(self).__name__} {self.param} is immutable. Pass values to build_query instead."
+            )
+        super().__setattr__(name, value)
 
     @abstractmethod
-    def build_query(self):
+    def build_query(self, value):
+        """Return the elastic query for a single filter value. Must not modify the field."""
         pass
 
     def validate(self, query):
         pass
 
+    def prefetch_lookups(self, values):
+        """Start any lookups build_query needs for these values so they run in parallel."""
+        pass
+
+    def id_list_terms(self, values):
+        """
+        (es field, normalized values) for a terms query matching any of values, or None
+        when the field does not filter by ids. Used for the long id lists sent by POST.
+        """
+        return None
+
     def es_field(self) -> str:
         if self.custom_es_field:
             field = self.custom_es_field
@@ -64,29 +108,29 @@ class Field(ABC):
 
 
 class BooleanField(Field):
-    def build_query(self):
+    def build_query(self, value):
         q = None
         if self.param in EXTERNAL_ID_FIELDS:
-            self.validate_true_false()
-            self.handle_external_id_fields()
+            self.validate_true_false(value)
+            value = self.handle_external_id_fields(value)
 
         if self.param == "has_oa_accepted_or_published_version":
-            self.validate_true_false()
+            self.validate_true_false(value)
             query = Q("term", locations__is_oa="true") & Q(
                 "terms", locations__version=["acceptedVersion", "publishedVersion"]
             )
-            if self.value.lower().strip() == "true":
+            if value.lower().strip() == "true":
                 q = query
-            elif self.value.lower().strip() == "false":
+            elif value.lower().strip() == "false":
                 q = ~query
         elif self.param == "has_oa_submitted_version":
-            self.validate_true_false()
+            self.validate_true_false(value)
             query = Q("term", locations__is_oa="true") & Q(
                 "term", locations__version="submittedVersion"
             )
-            if self.value.lower().strip() == "true":
+            if value.lower().strip() == "true":
                 q = query
-            elif self.value.lower().strip() == "false":
+            elif value.lower().strip() == "false":
                 q = ~query
         elif (
             self.param == "has_abstract"
@@ -96,19 +140,19 @@ class BooleanField(Field):
             or self.param == "has_raw_affiliation_strings"
             or self.param == "has_references"
         ):
-            self.validate_true_false()
-            if self.value.lower().strip() == "true":
+            self.validate_true_false(value)
+            if value.lower().strip() == "true":
                 q = Q("exists", field=self.es_field())
-            elif self.value.lower().strip() == "false":
+            elif value.lower().strip() == "false":
                 q = ~Q("exists", field=self.es_field())
         elif "is_global_south" in self.param:
-            self.validate_true_false()
+            self.validate_true_false(value)
             country_codes = [
                 c["country_code"] for c in country_list.GLOBAL_SOUTH_COUNTRIES
             ]
-            if self.value.lower().strip() == "true":
+            if value.lower().strip() == "true":
                 q = Q("terms", **{self.es_field(): country_codes})
-            elif self.value.lower().strip() == "false":
+            elif value.lower().strip() == "false":
                 q = ~Q("terms", **{self.es_field(): country_codes})
             return q
         elif self.param == "has_old_authors":
@@ -119,8 +163,8 @@ class BooleanField(Field):
                 | Q("prefix", authorships__author__id="https://openalex.org/A1")
             )
         elif self.param == "mag_only":
-            self.validate_true_false()
-            if self.value.lower().strip() == "true":
+            self.validate_true_false(value)
+            if value.lower().strip() == "true":
                 q = (
                     Q("exists", field="ids.mag")
                     & ~Q("exists", field="ids.pmid")
@@ -135,13 +179,13 @@ class BooleanField(Field):
                     | Q("exists", field="ids.doi")
                     | Q("exists", field="ids.arxiv")
                 )
-        elif self.value == "null":
+        elif value == "null":
             q = ~Q("exists", field=self.es_sort_field())
-        elif self.value == "!null":
+        elif value == "!null":
             q = Q("exists", field=self.es_sort_field())
         else:
-            self.validate(self.value)
-            kwargs = {self.es_field(): self.value.lower().strip()}
+            self.validate(value)
+            kwargs = {self.es_field(): value.lower().strip()}
             q = Q("term", **kwargs)
         return q
 
@@ -153,15 +197,17 @@ class BooleanField(Field):
                 f"Value for {self.param} must be true, false null, or !null: not {query}."
             )
 
-    def handle_external_id_fields(self):
-        if self.value.lower().strip() == "true":
-            self.value = "!null"
-        elif self.value.lower().strip() == "false":
-            self.value = "null"
-
-    def validate_true_false(self):
+    @staticmethod
+    def handle_external_id_fields(value):
+        if value.lower().strip() == "true":
+            value = "!null"
+        elif value.lower().strip() == "false":
+            value = "null"
+        return value
+
+    def validate_true_false(self, value):
         valid_values = ["true", "false"]
-        query = self.value.lower().strip()
+        query = value.lower().strip()
         if query not in valid_values:
             raise APIQueryParamsError(
                 f"Value for {self.param} must be true or false, not {query}."
@@ -169,34 +215,34 @@ class BooleanField(Field):
 
 
 class DateField(Field):
-    def build_query(self):
-        if "<" in self.value:
-            query = self.value[1:]
+    def build_query(self, value):
+        if "<" in value:
+            query = value[1:]
             self.validate(query)
             kwargs = {self.es_field(): {"lt": query}}
             q = Q("range", **kwargs)
-        elif ">" in self.value:
-            query = self.value[1:]
+        elif ">" in value:
+            query = value[1:]
             self.validate(query)
             kwargs = {self.es_field(): {"gt": query}}
             q = Q("range", **kwargs)
         elif self.param == "to_publication_date" or self.param == "to_updated_date" or self.param == "to_created_date":
-            self.validate(self.value)
-            kwargs = {self.es_field(): {"lte": self.value}}
+            self.validate(value)
+            kwargs = {self.es_field(): {"lte": value}}
             q = Q("range", **kwargs)
         elif (
             self.param == "from_publication_date"
             or self.param == "from_created_date"
             or self.param == "from_updated_date"
         ):
-            self.validate(self.value)
-            kwargs = {self.es_field(): {"gte": self.value}}
+            self.validate(value)
+            kwargs = {self.es_field(): {"gte": value}}
             q = Q("range", **kwargs)
-        elif self.value == "null":
+        elif value == "null":
             q = ~Q("exists", field=self.es_field())
         else:
-            self.validate(self.value)
-            kwargs = {self.es_field(): self.value}
+            self.validate(value)
+            kwargs = {self.es_field(): value}
             q = Q("term", **kwargs)
         return q
 
@@ -228,20 +274,20 @@ class DateTimeField(DateField):
 
 
 class OpenAlexIDField(Field):
-    def build_query(self):
-        if self.value == "null" and self.param not in ["repository", "journal"]:
+    def build_query(self, value):
+        if value == "null" and self.param not in ["repository", "journal"]:
             field_name = self.es_field()
             field_name = field_name.replace("__", ".")
             q = ~Q("exists", field=field_name)
             return q
-        elif self.value == "!null" and self.param not in ["repository", "journal"]:
+        elif value == "!null" and self.param not in ["repository", "journal"]:
             field_name = self.es_field()
             field_name = field_name.replace("__", ".")
             q = Q("exists", field=field_name)
             return q
-        elif self.value.startswith("!") and self.value != "!null":
-            self.validate(self.value[1:])
-            query = get_full_openalex_id(self.value[1:])
+        elif value.startswith("!") and value != "!null":
+            self.validate(value[1:], value)
+            query = get_full_openalex_id(value[1:])
             kwargs = {self.es_field(): query}
             if self.param == "repository":
                 q = ~Q("term", locations__source__id=query)
@@ -250,45 +296,47 @@ class OpenAlexIDField(Field):
             else:
                 q = ~Q("term", **kwargs)
             return q
-        elif self.param == "cited_by":
-            openalex_ids = self.get_ids(self.value, "referenced_works")
-            q = Q("terms", id=openalex_ids)
-        elif self.param == "related_to":
-            openalex_ids = self.get_ids(self.value, "related_works")
-            q = Q("terms", id=openalex_ids)
+        elif self.param in TERMS_LOOKUP_PATHS:
+            full_openalex_id = get_full_openalex_id(value)
+            if not full_openalex_id:
+                raise APIQueryParamsError(
+                    "Invalid OpenAlex ID in cited_by or related_to filter."
+                )
+            path = TERMS_LOOKUP_PATHS[self.param]
+            q = terms_lookup_query("id", full_openalex_id, path)
         elif self.param == "repository":
-            if self.value == "null":
+            if value == "null":
                 q = ~Q("exists", field=self.custom_es_field) & Q(
                     "term", **{"locations.source.type": "repository"}
                 )
-            elif self.value == "!null":
+            elif value == "!null":
                 q = Q("exists", field=self.custom_es_field) & Q(
                     "term", **{"locations.source.type": "repository"}
                 )
             else:
-                self.validate(self.value)
-                kwargs = {self.custom_es_field: get_full_openalex_id(self.value)}
+                self.validate(value)
+                kwargs = {self.custom_es_field: get_full_openalex_id(value)}
                 q = Q("term", **kwargs) & Q(
                     "term", **{"locations.source.type": "repository"}
                 )
         elif self.param == "journal":
-            if self.value == "null":
+            if value == "null":
                 q = ~Q("exists", field=self.custom_es_field) & Q(
                     "term", **{"primary_location.source.type": "journal"}
                 )
-            elif self.value == "!null":
+            elif value == "!null":
                 q = Q("exists", field=self.custom_es_field) & Q(
                     "term", **{"primary_location.source.type": "journal"}
                 )
             else:
-                self.validate(self.value)
-                kwargs = {self.custom_es_field: get_full_openalex_id(self.value)}
+                self.validate(value)
+                kwargs = {self.custom_es_field: get_full_openalex_id(value)}
                 q = Q("term", **kwargs) & Q(
                     "term", **{"primary_location.source.type": "journal"}
                 )
         else:
-            self.validate(self.value)
-            query = get_full_openalex_id(self.value)
+            self.validate(value)
+            query = get_full_openalex_id(value)
             kwargs = {self.es_field(): query}
             q = Q("term", **kwargs)
         return q
@@ -304,9 +352,11 @@ class OpenAlexIDField(Field):
             field = self.param + "__lower"
         return field
 
-    def validate(self, query):
+    def validate(self, query, value=None):
+        # value is the full filter value, used in error messages when query is a part of it
+        value = query if value is None else value
         if not normalize_openalex_id(query):
-            error_id = f"'{self.value.replace('https://openalex.org/', '')}'"
+            error_id = f"'{value.replace('https://openalex.org/', '')}'"
             raise APIQueryParamsError(f"{error_id} is not a valid OpenAlex ID.")
 
         if (
@@ -324,39 +374,39 @@ class OpenAlexIDField(Field):
                 "Use a publisher ID with this convenience filter (OpenAlex ID that starts with P)."
             )
 
-    @staticmethod
-    def get_ids(openalex_id, category):
-        full_openalex_id = get_full_openalex_id(openalex_id)
-        if not full_openalex_id:
-            raise APIQueryParamsError(
-                "Invalid OpenAlex ID in cited_by or related_to filter."
-            )
-        openalex_ids = []
-        s = Search(index=WORKS_INDEX).extra(size=1)
-        s = s.filter("term", id=full_openalex_id)
-        response = s.execute()
-        if response:
-            for h in response:
-                openalex_ids = [id for id in h[category]]
-        return openalex_ids
+    def id_list_terms(self, values):
+        if self.param in TERMS_LOOKUP_PATHS or self.param in ["repository", "journal"]:
+            return None
+        full_openalex_ids = []
+        for value in values:
+            self.validate(value)
+            full_openalex_ids.append(get_full_openalex_id(value))
+        return self.es_field().replace("__", "."), full_openalex_ids
+
+    def prefetch_lookups(self, values):
+        if self.param not in TERMS_LOOKUP_PATHS:
+            return
+        full_openalex_ids = [get_full_openalex_id(value) for value in values]
+        # locates every work in the OR values with one msearch
+        resolve_work_locations([id for id in full_openalex_ids if id])
 
 
 class PhraseField(Field):
-    def build_query(self):
-        if self.value == "null":
+    def build_query(self, value):
+        if value == "null":
             field_name = self.es_field()
             field_name = field_name.replace("__", ".")
             q = ~Q("exists", field=field_name)
-        elif self.value == "!null":
+        elif value == "!null":
             field_name = self.es_field()
             field_name = field_name.replace("__", ".")
             q = Q("exists", field=field_name)
-        elif self.value.startswith("!"):
-            query = self.value[1:]
+        elif value.startswith("!"):
+            query = value[1:]
             kwargs = {self.es_field(): query}
             q = ~Q("match_phrase", **kwargs)
         else:
-            kwargs = {self.es_field(): self.value}
+            kwargs = {self.es_field(): value}
             q = Q("match_phrase", **kwargs)
         return q
 
@@ -373,30 +423,30 @@ class PhraseField(Field):
 
 
 class RangeField(Field):
-    def build_query(self):
-        if "<" in self.value:
-            query = self.value[1:]
+    def build_query(self, value):
+        if "<" in value:
+            query = value[1:]
             self.validate(query)
             kwargs = {self.es_field(): {"lt": float(query)}}
             q = Q("range", **kwargs)
-        elif self.value.startswith("-"):
-            query = self.value[1:]
+        elif value.startswith("-"):
+            query = value[1:]
             self.validate(query)
             kwargs = {self.es_field(): {"lte": float(query)}}
             q = Q("range", **kwargs)
-        elif ">" in self.value:
-            query = self.value[1:]
+        elif ">" in value:
+            query = value[1:]
             self.validate(query)
             kwargs = {self.es_field(): {"gt": float(query)}}
             q = Q("range", **kwargs)
-        elif self.value.endswith("-"):
-            query = self.value[:-1]
+        elif value.endswith("-"):
+            query = value[:-1]
             self.validate(query)
             kwargs = {self.es_field(): {"gte": float(query)}}
             q = Q("range", **kwargs)
-        elif self.value.startswith("!"):
-            if "-" in self.value:
-                values = self.value[1:].strip().split("-")
+        elif value.startswith("!"):
+            if "-" in value:
+                values = value[1:].strip().split("-")
                 left_value = values[0]
                 right_value = values[1]
                 self.validate(left_value)
@@ -409,11 +459,11 @@ class RangeField(Field):
                 }
                 q = ~Q("range", **kwargs)
             else:
-                query = self.value[1:]
+                query = value[1:]
                 kwargs = {self.es_field(): float(query)}
                 q = ~Q("term", **kwargs)
-        elif "-" in self.value:
-            values = self.value.strip().split("-")
+        elif "-" in value:
+            values = value.strip().split("-")
             left_value = values[0]
             right_value = values[1]
             self.validate(left_value)
@@ -422,11 +472,11 @@ class RangeField(Field):
                 self.es_field(): {"gte": float(left_value), "lte": float(right_value)}
             }
             q = Q("range", **kwargs)
-        elif self.value == "null":
+        elif value == "null":
             q = ~Q("exists", field=self.es_field())
         else:
-            self.validate(self.value)
-            kwargs = {self.es_field(): self.value}
+            self.validate(value)
+            kwargs = {self.es_field(): value}
             q = Q("term", **kwargs)
         return q
 
@@ -438,10 +488,10 @@ class RangeField(Field):
 
 
 class SearchField(Field):
-    def build_query(self):
-        self.validate(self.value)
+    def build_query(self, value):
+        self.validate(value)
         if self.param == "default.search":
-            q = full_search_query(self.index, self.value)
+            q = full_search_query(self.index, value)
         elif (
             self.param == "raw_affiliation_strings.search"
             or self.param == "abstract.search"
@@ -453,43 +503,43 @@ class SearchField(Field):
             or self.param == "title.search.no_stem"
         ):
             search_oa = SearchOpenAlex(
-                search_terms=self.value, primary_field=self.es_field()
+                search_terms=value, primary_field=self.es_field()
             )
             q = search_oa.build_query()
         elif self.param == "display_name.search" and self.unique_id == "author_search":
             search_oa = SearchOpenAlex(
-                search_terms=self.value,
+                search_terms=value,
                 is_author_name_query=True,
             )
             q = search_oa.build_query()
         elif self.param == "display_name.search.no_stem":
             search_oa = SearchOpenAlex(
-                search_terms=self.value,
+                search_terms=value,
                 primary_field=self.es_field(),
             )
             q = search_oa.build_query()
         elif self.param == "title_and_abstract.search":
             search_oa = SearchOpenAlex(
-                search_terms=self.value,
+                search_terms=value,
                 primary_field="display_name",
                 secondary_field="abstract",
             )
             q = search_oa.build_query()
         elif self.param == "title_and_abstract.search.no_stem":
             search_oa = SearchOpenAlex(
-                search_terms=self.value,
+                search_terms=value,
                 primary_field="display_name.nostem",
                 secondary_field="abstract.nostem",
             )
             q = search_oa.build_query()
         elif self.param == "semantic.search":
             search_oa = SearchOpenAlex(
-                search_terms=self.value,
+                search_terms=value,
                 is_semantic_query=True,
             )
             q = search_oa.build_query()
         else:
-            search_oa = SearchOpenAlex(search_terms=self.value)
+            search_oa = SearchOpenAlex(search_terms=value)
             q = search_oa.build_query()
         return q
 
@@ -501,35 +551,18 @@ class SearchField(Field):
 
 
 class TermField(Field):
-    def build_query(self):
-        id_params = [
-            "affiliations.institution.ror",
-            "author.orcid",
-            "authorships.author.orcid",
-            "authorships.institutions.ror",
-            "doi",
-            "ids.pmid",
-            "ids.pmcid",
-            "institutions.ror",
-            "issn",
-            "orcid",
-            "openalex_id",
-            "pmid",
-            "pmcid",
-            "ror",
-            "wikidata_id",
-        ]
+    def build_query(self, value):
         if self.param == "sustainable_development_goals.id":
-            if len(self.value) == 1 or len(self.value) == 2:
-                self.value = f"https://metadata.un.org/sdg/{self.value}"
-            elif self.value.startswith("sdgs/"):
-                sdg_number = self.value.replace("sdgs/", "")
-                self.value = f"https://metadata.un.org/sdg/{sdg_number}"
+            if len(value) == 1 or len(value) == 2:
+                value = f"https://metadata.un.org/sdg/{value}"
+            elif value.startswith("sdgs/"):
+                sdg_number = value.replace("sdgs/", "")
+                value = f"https://metadata.un.org/sdg/{sdg_number}"
         elif self.param == "language":
-            self.value = self.value.replace("languages/", "")
+            value = value.replace("languages/", "")
         elif self.param == "type" or self.param == "last_known_institution.type":
-            self.value = (
-                self.value.replace("work-types/", "")
+            value = (
+                value.replace("work-types/", "")
                 .replace("institution-types/", "")
                 .replace("source-types/", "")
                 .replace("types/", "")
@@ -538,17 +571,17 @@ class TermField(Field):
             self.param == "primary_location.source.type"
             or self.param == "locations.source.type"
         ):
-            self.value = self.value.replace("source-types/", "").replace("%20", " ")
+            value = value.replace("source-types/", "").replace("%20", " ")
         elif "country_code" in self.param or "countries" in self.param:
-            self.value = self.value.replace("countries/", "")
+            value = value.replace("countries/", "")
         elif "domain" in self.param:
-            self.value = self.value.replace("domains/", "")
+            value = value.replace("domains/", "")
         elif "field" in self.param and "subfield" not in self.param:
-            self.value = self.value.replace("fields/", "")
+            value = value.replace("fields/", "")
         elif "subfield" in self.param:
-            self.value = self.value.replace("subfields/", "")
+            value = value.replace("subfields/", "")
         elif self.param == "keywords.id":
-            self.value = self.value.replace("https://openalex.org/", "").replace(
+            value = value.replace("https://openalex.org/", "").replace(
                 "keywords/", ""
             )
         elif (
@@ -556,15 +589,15 @@ class TermField(Field):
             and self.param.endswith("license_id")
             or self.param.endswith("license")
         ):
-            self.value = self.value.replace("https://openalex.org/", "").replace(
+            value = value.replace("https://openalex.org/", "").replace(
                 "licenses/", ""
             )
         elif self.param == "id":
-            if "keywords/" in self.value and not self.value.startswith(
+            if "keywords/" in value and not value.startswith(
                 "https://openalex.org/"
             ):
-                self.value = f"https://openalex.org/{self.value}"
-        if self.value == "null":
+                value = f"https://openalex.org/{value}"
+        if value == "null":
             field_name = self.es_field()
             field_name = field_name.replace("__", ".")
             if self.param == "version":
@@ -572,7 +605,7 @@ class TermField(Field):
             else:
                 q = ~Q("exists", field=field_name)
             return q
-        elif self.value == "!null":
+        elif value == "!null":
             if self.param == "version":
                 q = Q("exists", field="locations.version")
             else:
@@ -580,23 +613,23 @@ class TermField(Field):
                 field_name = field_name.replace("__", ".")
                 q = Q("exists", field=field_name)
         elif self.param == "doi_starts_with":
-            if "https://doi.org" in self.value:
+            if "https://doi.org" in value:
                 raise APIQueryParamsError("Enter DOI in short format such as 10.12")
-            if len(self.value) < 3:
+            if len(value) < 3:
                 raise APIQueryParamsError(
                     "Enter more than 3 characters to use this filter. Such as 10.12"
                 )
-            query = f"https://doi.org/{self.value}"
+            query = f"https://doi.org/{value}"
             kwargs = {self.es_field(): query}
             q = Q("prefix", **kwargs)
         elif self.param == "scopus":
             # a search against the ids.scopus field should give the correct result
             from ids.utils import normalize_scopus
 
-            scopus = normalize_scopus(self.value)
+            scopus = normalize_scopus(value)
             q = Q("match", **{"ids.scopus": scopus})
-        elif self.value.startswith("!"):
-            query = self.value[1:]
+        elif value.startswith("!"):
+            query = value[1:]
             if (
                 self.param
                 in [
@@ -605,40 +638,15 @@ class TermField(Field):
                     "institutions.ror",
                     "ror",
                 ]
-                and "ror.org" not in self.value
+                and "ror.org" not in value
             ):
                 query = f"https://ror.org/{query}"
             kwargs = {self.es_field(): query}
             if "continent" in self.param:
-                country_codes = self.get_country_codes()
+                country_codes = self.get_country_codes(value)
                 q = ~Q("terms", **{self.es_field(): country_codes})
-            elif (
-                self.param == "topics.domain.id"
-                or self.param == "primary_topic.domain.id"
-                or self.param == "domain.id"
-            ):
-                formatted_version = f"https://openalex.org/domains/{query}"
-                kwargs_new_format = {self.es_field(): formatted_version}
-                kwargs_old_format = {self.es_field(): query}
-                q = ~(Q("term", **kwargs_new_format) | Q("term", **kwargs_old_format))
-            elif (
-                self.param == "topics.field.id"
-                or self.param == "primary_topic.field.id"
-                or self.param == "field.id"
-            ):
-                formatted_version = f"https://openalex.org/fields/{query}"
-                kwargs_new_format = {self.es_field(): formatted_version}
-                kwargs_old_format = {self.es_field(): query}
-                q = ~(Q("term", **kwargs_new_format) | Q("term", **kwargs_old_format))
-            elif (
-                self.param == "topics.subfield.id"
-                or self.param == "primary_topic.subfield.id"
-                or self.param == "subfield.id"
-            ):
-                formatted_version = f"https://openalex.org/subfields/{query}"
-                kwargs_new_format = {self.es_field(): formatted_version}
-                kwargs_old_format = {self.es_field(): query}
-                q = ~(Q("term", **kwargs_new_format) | Q("term", **kwargs_old_format))
+            elif topic_entity(self.param):
+                q = ~topic_id_query(self.es_field(), topic_entity(self.param), query)
             elif self.param == "keywords.id":
                 formatted_version = f"https://openalex.org/keywords/{query}"
                 kwargs = {self.es_field(): formatted_version}
@@ -655,60 +663,35 @@ class TermField(Field):
                 q = ~Q("term", **kwargs)
             return q
         elif self.param == "display_name":
-            kwargs = {self.es_field(): self.value}
+            kwargs = {self.es_field(): value}
             q = Q("match", **kwargs)
         elif "continent" in self.param:
-            country_codes = self.get_country_codes()
+            country_codes = self.get_country_codes(value)
             kwargs = {self.es_field(): country_codes}
             q = Q("terms", **kwargs)
         elif self.param == "best_open_version":
-            self.validate_best_open_version()
+            self.validate_best_open_version(value)
             submitted_query = Q("term", **{self.custom_es_field: "submittedVersion"})
             accepted_query = Q("term", **{self.custom_es_field: "acceptedVersion"})
             published_query = Q("term", **{self.custom_es_field: "publishedVersion"})
-            if self.value.lower() == "any":
+            if value.lower() == "any":
                 q = submitted_query | accepted_query | published_query
-            elif self.value.lower() == "acceptedorpublished":
+            elif value.lower() == "acceptedorpublished":
                 q = accepted_query | published_query
-            elif self.value.lower() == "published":
+            elif value.lower() == "published":
                 q = published_query
         elif self.param == "language":
-            kwargs = {self.es_field(): self.value.lower()}
+            kwargs = {self.es_field(): value.lower()}
             q = Q("term", **kwargs)
         elif self.param == "topics.id" or self.param == "topic_share.id":
-            if "https://openalex.org/" not in self.value:
-                formatted_version = f"https://openalex.org/{self.value}"
+            if "https://openalex.org/" not in value:
+                formatted_version = f"https://openalex.org/{value}"
                 kwargs = {self.es_field(): formatted_version}
                 q = Q("term", **kwargs)
-        elif (
-            self.param == "topics.domain.id"
-            or self.param == "primary_topic.domain.id"
-            or self.param == "domain.id"
-        ):
-            formatted_version = f"https://openalex.org/domains/{self.value}"
-            kwargs_new_format = {self.es_field(): formatted_version}
-            kwargs_old_format = {self.es_field(): self.value}
-            q = Q("term", **kwargs_new_format) | Q("term", **kwargs_old_format)
-        elif (
-            self.param == "topics.field.id"
-            or self.param == "primary_topic.field.id"
-            or self.param == "field.id"
-        ):
-            formatted_version = f"https://openalex.org/fields/{self.value}"
-            kwargs_new_format = {self.es_field(): formatted_version}
-            kwargs_old_format = {self.es_field(): self.value}
-            q = Q("term", **kwargs_new_format) | Q("term", **kwargs_old_format)
-        elif (
-            self.param == "topics.subfield.id"
-            or self.param == "primary_topic.subfield.id"
-            or self.param == "subfield.id"
-        ):
-            formatted_version = f"https://openalex.org/subfields/{self.value}"
-            kwargs_new_format = {self.es_field(): formatted_version}
-            kwargs_old_format = {self.es_field(): self.value}
-            q = Q("term", **kwargs_new_format) | Q("term", **kwargs_old_format)
+        elif topic_entity(self.param):
+            q = topic_id_query(self.es_field(), topic_entity(self.param), value)
         elif self.param == "keywords.id":
-            formatted_version = f"https://openalex.org/keywords/{self.value}"
+            formatted_version = f"https://openalex.org/keywords/{value}"
             kwargs = {self.es_field(): formatted_version}
             q = Q("term", **kwargs)
         elif (
@@ -716,19 +699,19 @@ class TermField(Field):
             and self.param.endswith("license_id")
             or self.param.endswith("license")
         ):
-            formatted_version = f"https://openalex.org/licenses/{self.value}"
+            formatted_version = f"https://openalex.org/licenses/{value}"
             kwargs = {self.es_field(): formatted_version}
             q = Q("term", **kwargs)
-        elif self.param in id_params:
-            formatted_id = self.format_id()
+        elif self.param in ID_PARAMS:
+            formatted_id = self.format_id(value)
             if formatted_id is None:
                 raise APIQueryParamsError(
-                    f"{self.value} is not a valid ID for {self.param}"
+                    f"{value} is not a valid ID for {self.param}"
                 )
             kwargs = {self.es_field(): formatted_id}
             q = Q("term", **kwargs)
         else:
-            kwargs = {self.es_field(): self.value}
+            kwargs = {self.es_field(): value}
             q = Q("term", **kwargs)
         return q
 
@@ -743,24 +726,37 @@ class TermField(Field):
             field = self.param + "__lower"
         return field
 
-    def format_id(self):
-        if self.param == "doi" and "doi.org" not in self.value:
-            formatted = f"https://doi.org/{self.value}"
+    def id_list_terms(self, values):
+        if self.param not in ID_PARAMS:
+            return None
+        formatted_ids = []
+        for value in values:
+            formatted_id = self.format_id(value)
+            if formatted_id is None:
+                raise APIQueryParamsError(
+                    f"{value} is not a valid ID for {self.param}"
+                )
+            formatted_ids.append(formatted_id)
+        return self.es_field().replace("__", "."), formatted_ids
+
+    def format_id(self, value):
+        if self.param == "doi" and "doi.org" not in value:
+            formatted = f"https://doi.org/{value}"
         elif (
             self.param == "pmid" or self.param == "ids.pmid"
-        ) and "pubmed.ncbi.nlm.nih.gov" not in self.value:
-            formatted = f"https://pubmed.ncbi.nlm.nih.gov/{self.value}"
+        ) and "pubmed.ncbi.nlm.nih.gov" not in value:
+            formatted = f"https://pubmed.ncbi.nlm.nih.gov/{value}"
         elif (
             self.param == "pmcid" or self.param == "ids.pmcid"
-        ) and "ncbi.nlm.nih.gov/pmc/articles" not in self.value:
-            formatted = f"https://www.ncbi.nlm.nih.gov/pmc/articles/{self.value}"
+        ) and "ncbi.nlm.nih.gov/pmc/articles" not in value:
+            formatted = f"https://www.ncbi.nlm.nih.gov/pmc/articles/{value}"
         elif (
             self.param in ["author.orcid", "authorships.author.orcid", "orcid"]
-            and "orcid.org" not in self.value
+            and "orcid.org" not in value
         ):
-            formatted = f"https://orcid.org/{self.value}"
+            formatted = f"https://orcid.org/{value}"
         elif self.param == "openalex_id":
-            formatted = get_full_openalex_id(self.value)
+            formatted = get_full_openalex_id(value)
         elif (
             self.param
             in [
@@ -769,23 +765,23 @@ class TermField(Field):
                 "institutions.ror",
                 "ror",
             ]
-            and "ror.org" not in self.value
+            and "ror.org" not in value
         ):
-            formatted = f"https://ror.org/{self.value}"
-        elif self.param == "wikidata_id" and "wikidata.org" not in self.value:
+            formatted = f"https://ror.org/{value}"
+        elif self.param == "wikidata_id" and "wikidata.org" not in value:
             if self.unique_id and self.unique_id == "wikidata_entity":
-                formatted = f"https://www.wikidata.org/entity/{self.value}"
+                formatted = f"https://www.wikidata.org/entity/{value}"
             else:
-                formatted = f"https://www.wikidata.org/wiki/{self.value}"
+                formatted = f"https://www.wikidata.org/wiki/{value}"
         else:
-            formatted = self.value
+            formatted = value
         return formatted
 
-    def get_country_codes(self):
-        if self.value.startswith("!"):
-            continent = self.value[1:].lower().strip()
+    def get_country_codes(self, value):
+        if value.startswith("!"):
+            continent = value[1:].lower().strip()
         else:
-            continent = self.value.lower().strip()
+            continent = value.lower().strip()
         if (
             continent not in CONTINENT_PARAMS.keys()
             and continent.upper() not in CONTINENT_PARAMS.values()
@@ -839,11 +835,11 @@ class TermField(Field):
             country_codes = []
         return country_codes
 
-    def validate_version(self):
-        if self.value.startswith("!"):
-            value = self.value[1:]
+    def validate_version(self, value):
+        if value.startswith("!"):
+            value = value[1:]
         else:
-            value = self.value
+            value = value
         lower_case_versions = [v.lower() for v in VERSIONS]
         if value.lower() not in lower_case_versions:
             raise APIQueryParamsError(
@@ -861,9 +857,9 @@ class TermField(Field):
             version = value
         return version
 
-    def validate_best_open_version(self):
+    def validate_best_open_version(self, value):
         valid_values = ["any", "acceptedOrPublished", "published"]
-        if self.value.lower() not in [value.lower() for value in valid_values]:
+        if value.lower() not in [value.lower() for value in valid_values]:
             raise APIQueryParamsError(
-                f"Value for {self.param} must be one of {', '.join(valid_values)} and not {self.value}."
+                f"Value for {self.param} must be one of {', '.join(valid_values)} and not {value}."
             )
@@ -1,47 +1,49 @@
-import re
-
 from elasticsearch_dsl import Q
 
 from core.exceptions import APIQueryParamsError
+from core.filter_parser import get_field_table, parse_clause
 from core.utils import get_field
 from settings import MAX_IDS_IN_FILTER
 
 
 def filter_records(fields_dict, filter_params, s, sample=None):
+    table = get_field_table(fields_dict)
     for filter in filter_params:
         for key, value in filter.items():
-            field = get_field(fields_dict, key)
+            entry = table.entries.get(key)
+            if entry is None:
+                # raises the invalid field error
+                get_field(fields_dict, key)
+            clause = parse_clause(key, value)
 
             # multiple OR queries have | in the param values
-            if "|" in value:
-                s = handle_or_query(field, fields_dict, s, value, sample)
+            if clause.or_values:
+                s = handle_or_query(entry, table, s, clause, sample)
 
             # multiple AND queries have + in the param values which is converted to a space
-            elif (
-                " " in value
-                and "search" not in field.param
-                and type(field).__name__ != "RangeField"
-                and type(field).__name__ != "BooleanField"
-            ):
-                s = handle_and_query(field, s, value)
+            elif clause.and_values and entry.splits_on_space:
+                s = handle_and_query(entry.field, s, clause)
 
             # everything else is a normal and query
             else:
-                field.value = value
-                q = field.build_query()
-                if sample and "search" in field.param:
-                    s = s.filter(q)
-                elif "search" in field.param:
-                    s = s.query(q)
-                else:
-                    s = s.filter(q)
+                q = entry.field.build_query(value)
+                s = add_query(entry, s, q, sample)
     return s
 
 
-def handle_or_query(field, fields_dict, s, value, sample):
+def add_query(entry, s, q, sample):
+    """Search filters score results, unless the results are sampled."""
+    if entry.is_search and not sample:
+        return s.query(q)
+    return s.filter(q)
+
+
+def handle_or_query(entry, table, s, clause, sample):
+    field = entry.field
+    value = clause.value
     or_queries = []
 
-    if len(value.split("|")) > MAX_IDS_IN_FILTER:
+    if len(clause.or_values) > MAX_IDS_IN_FILTER:
         raise APIQueryParamsError(
             f"Maximum number of values exceeded for {field.param}. Decrease values to {MAX_IDS_IN_FILTER} or "
             f"below, or consider downloading the full dataset at "
@@ -49,64 +51,51 @@ def handle_or_query(field, fields_dict, s, value, sample):
         )
 
     # raise error if trying to use | between filters like filter=institutions.country_code:fr|host_venue.issn:0957-1558
-    fields = fields_dict.keys()
-    for filter_field in fields:
-        if filter_field in value:
-            if filter_field and re.search(rf"{filter_field}:", value):
-                raise APIQueryParamsError(
-                    f"It looks like you're trying to do an OR query between filters and it's not supported. \n"
-                    f"You can do this: institutions.country_code:fr|en, but not this: institutions.country_code:gb|host_venue.issn:0957-1558. \n"
-                    f"Problem value: {value}"
-                )
+    if table.cross_field_or and table.cross_field_or.search(value):
+        raise APIQueryParamsError(
+            f"It looks like you're trying to do an OR query between filters and it's not supported. \n"
+            f"You can do this: institutions.country_code:fr|en, but not this: institutions.country_code:gb|host_venue.issn:0957-1558. \n"
+            f"Problem value: {value}"
+        )
 
-    if value.startswith("!"):
+    # lookups for the OR values, such as cited_by works, run in parallel
+    field.prefetch_lookups([or_value.replace("!", "") for or_value in clause.or_values])
+
+    if clause.negated:
         # negate everything in values after !, like: NOT (42 or 43)
-        for or_value in value.split("|"):
+        for or_value in clause.or_values:
             or_value = or_value.replace("!", "")
-            field.value = or_value
-            q = field.build_query()
+            q = field.build_query(or_value)
             not_query = ~Q("bool", must=q)
-            if sample and "search" in field.param:
-                s = s.filter(not_query)
-            elif "search" in field.param:
-                s = s.query(not_query)
-            else:
-                s = s.filter(not_query)
+            s = add_query(entry, s, not_query, sample)
     else:
         # standard OR query, like: 42 or 43
-        for or_value in value.split("|"):
+        for or_value in clause.or_values:
             if or_value.startswith("!"):
                 raise APIQueryParamsError(
                     f"The ! operator can only be used at the beginning of an OR query, "
                     f"like /works?filter=concepts.id:!C144133560|C15744967, meaning NOT (C144133560 or C15744967). Problem "
                     f"value: {or_value}"
                 )
-            field.value = or_value
-            q = field.build_query()
+            q = field.build_query(or_value)
             or_queries.append(q)
         combined_or_query = Q("bool", should=or_queries, minimum_should_match=1)
-        if sample and "search" in field.param:
-            s = s.filter(combined_or_query)
-        elif "search" in field.param:
-            s = s.query(combined_or_query)
-        else:
-            s = s.filter(combined_or_query)
+        s = add_query(entry, s, combined_or_query, sample)
     return s
 
 
-def handle_and_query(field, s, value):
+def handle_and_query(field, s, clause):
     and_queries = []
 
-    if len(value.split(" ")) > MAX_IDS_IN_FILTER:
+    if len(clause.and_values) > MAX_IDS_IN_FILTER:
         raise APIQueryParamsError(
             f"Maximum number of values exceeded for {field.param}. Decrease values to {MAX_IDS_IN_FILTER} or "
             f"below, or consider downloading the full dataset at "
             f"https://docs.openalex.org/download-snapshot"
         )
 
-    for and_value in value.split(" "):
-        field.value = and_value
-        q = field.build_query()
+    for and_value in clause.and_values:
+        q = field.build_query(and_value)
         and_queries.append(q)
     combined_and_query = Q("bool", must=and_queries)
     s = s.filter(combined_and_query)
@@ -0,0 +1,106 @@
+import functools
+import re
+from collections import namedtuple
+
+import settings
+from core.exceptions import APIQueryParamsError
+
+"""
+Parses the filter param into clauses in one pass over its separators, and caches the
+result per filter string, so repeated filters skip parsing. A clause keeps its raw
+value, as the views that echo filters back expect, and the parts filter_records
+compiles: the values ORed with |, the values ANDed with + (a space once decoded) and
+whether the OR is negated with a leading !.
+
+What a clause means also depends on its field, as search, range and boolean fields
+take spaces within a value. That, and which keys would start a second filter inside an
+OR, is read from a table built once per fields_dict.
+"""
+
+FilterClause = namedtuple(
+    "FilterClause", ["key", "value", "or_values", "and_values", "negated"]
+)
+FieldEntry = namedtuple("FieldEntry", ["field", "is_search", "splits_on_space"])
+FieldTable = namedtuple("FieldTable", ["entries", "cross_field_or"])
+
+# the separators between clauses, and between a key and its value
+SEPARATOR = re.compile("[,:]")
+
+
+@functools.lru_cache(maxsize=settings.FILTER_PARSE_CACHE_SIZE)
+def parse_filter(filter_string):
+    """The clauses of a filter param, in order."""
+    clauses = []
+    start = 0
+    key = None
+    for separator in SEPARATOR.finditer(filter_string):
+        if separator.group() == ",":
+            clauses.append(end_clause(filter_string, start, separator.start(), key))
+            start = separator.end()
+            key = None
+        elif key is None:
+            key = filter_string[start : separator.start()]
+    clauses.append(end_clause(filter_string, start, len(filter_string), key))
+    return tuple(clauses)
+
+
+def end_clause(filter_string, start, end, key):
+    if key is None:
+        raise APIQueryParamsError(
+            f"Invalid query parameter in {filter_string[start:end]}."
+        )
+    value = filter_string[start + len(key) + 1 : end]
+    return parse_clause(key.replace("-", "_"), value)
+
+
+@functools.lru_cache(maxsize=settings.FILTER_PARSE_CACHE_SIZE)
+def parse_clause(key, value):
+    """The clause of one key and value, as filter_records compiles it."""
+    return FilterClause(
+        key=key,
+        value=value,
+        or_values=tuple(value.split("|")) if "|" in value else None,
+        and_values=tuple(value.split(" ")) if " " in value else None,
+        negated=value.startswith("!"),
+    )
+
+
+field_tables = {}
+
+
+def get_field_table(fields_dict):
+    """The parse facts for each field of fields_dict, built on first use."""
+    cached = field_tables.get(id(fields_dict))
+    if (
+        cached is not None
+        and cached[0] is fields_dict
+        and len(cached[1].entries) == len(fields_dict)
+    ):
+        return cached[1]
+    entries = {
+        key: FieldEntry(
+            field=field,
+            is_search="search" in field.param,
+            splits_on_space="search" not in field.param
+            and type(field).__name__ not in ["RangeField", "BooleanField"],
+        )
+        for key, field in fields_dict.items()
+    }
+    # a key followed by : inside a value starts another filter, like a|type:b
+    keys = [key for key in fields_dict if key]
+    cross_field_or = None
+    if keys:
+        cross_field_or = re.compile("|".join(f"(?:{key}):" for key in keys))
+    table = FieldTable(entries, cross_field_or)
+    field_tables[id(fields_dict)] = (fields_dict, table)
+    return table
+
+
+def parse_stats():
+    info = parse_filter.cache_info()
+    return {
+        "size": info.currsize,
+        "max_size": info.maxsize,
+        "hits": info.hits,
+        "misses": info.misses,
+    }
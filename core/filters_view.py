@@ -5,10 +5,11 @@ from elasticsearch_dsl import MultiSearch, Q, Search
 from flask import url_for
 
 import settings
+from core.display_name_resolver import (get_display_name,
+                                        get_openalex_display_names)
 from core.exceptions import APIQueryParamsError
 from core.search import full_search_query
-from core.utils import (get_country_name, get_display_name, get_field,
-                        map_filter_params)
+from core.utils import get_country_name, get_field, map_filter_params
 
 
 def shared_filter_view(request, params, fields_dict, index_name):
@@ -52,6 +53,7 @@ def shared_filter_view(request, params, fields_dict, index_name):
 
 
 def filter_records_filters_view(fields_dict, filter_params, ms, index_name):
+    preload_display_names(fields_dict, filter_params)
     meta_results = []
     s = Search()
     s = s.extra(track_total_hits=True, size=0)
@@ -84,8 +86,7 @@ def filter_records_filters_view(fields_dict, filter_params, ms, index_name):
                     # negate everything in values after !, like: NOT (42 or 43)
                     for or_value in value.split("|"):
                         or_value = or_value.replace("!", "")
-                        field.value = or_value
-                        q = field.build_query()
+                        q = field.build_query(or_value)
                         not_query = ~Q("bool", must=q)
                         s = s.query(not_query)
                 else:
@@ -97,8 +98,7 @@ def filter_records_filters_view(fields_dict, filter_params, ms, index_name):
                                 f"like /works?filter=concepts.id:!C144133560|C15744967, meaning NOT (C144133560 or C15744967). Problem "
                                 f"value: {or_value}"
                             )
-                        field.value = or_value
-                        q = field.build_query()
+                        q = field.build_query(or_value)
                         or_queries.append(q)
                     combined_or_query = Q(
                         "bool", should=or_queries, minimum_should_match=1
@@ -108,13 +108,12 @@ def filter_records_filters_view(fields_dict, filter_params, ms, index_name):
             # everything else is an AND query
             else:
                 field_meta = {"key": key, "type": type(field).__name__, "values": []}
-                field.value = value
-                if field.value.startswith("!"):
+                if value.startswith("!"):
                     field_meta["is_negated"] = True
-                    display_value = field.value.replace("!", "")
+                    display_value = value.replace("!", "")
                 else:
                     field_meta["is_negated"] = False
-                    display_value = field.value
+                    display_value = value
                 field_meta["values"].append(
                     {
                         "value": display_value,
@@ -122,7 +121,7 @@ def filter_records_filters_view(fields_dict, filter_params, ms, index_name):
                         # "url": set_url(search_param, key, or_value, index_name),
                     }
                 )
-                q = field.build_query()
+                q = field.build_query(value)
                 s = s.query(q)
                 meta_results.append(field_meta)
     ms = ms.add(s)
@@ -152,8 +151,7 @@ def filter_records_filters_view(fields_dict, filter_params, ms, index_name):
                                 # "url": set_url(search_param, key, or_value, index_name),
                             }
                         )
-                        field.value = or_value
-                        q = field.build_query()
+                        q = field.build_query(or_value)
                         not_query = ~Q("bool", must=q)
                         or_s[i] = or_s[i].query(not_query)
                         ms = ms.add(or_s[i])
@@ -177,8 +175,7 @@ def filter_records_filters_view(fields_dict, filter_params, ms, index_name):
                                 # "url": set_url(search_param, key, or_value, index_name),
                             }
                         )
-                        field.value = or_value
-                        q = field.build_query()
+                        q = field.build_query(or_value)
                         or_s[i] = or_s[i].query(q)
                         ms = ms.add(or_s[i])
                         i = i + 1
@@ -186,6 +183,18 @@ def filter_records_filters_view(fields_dict, filter_params, ms, index_name):
     return ms, meta_results
 
 
+def preload_display_names(fields_dict, filter_params):
+    """Resolve all openalex id values at once so set_display_name hits the cache."""
+    openalex_ids = []
+    for filter in filter_params:
+        for key, value in filter.items():
+            field = fields_dict.get(key)
+            if type(field).__name__ == "OpenAlexIDField":
+                openalex_ids.extend(value.replace("!", "").split("|"))
+    if openalex_ids:
+        get_openalex_display_names(openalex_ids)
+
+
 def validate_or_value(or_value):
     if or_value.startswith("!"):
         raise APIQueryParamsError(
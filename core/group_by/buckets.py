@@ -4,6 +4,16 @@ from flask import current_app as app
 
 import settings
 from core.cursor import decode_group_by_cursor
+from core.group_by.custom_results import (
+    create_custom_group_by_buckets,
+    is_custom_group_by,
+)
+from core.group_by.filter import bucket_include
+from core.group_by.metrics import (
+    add_bucket_metrics,
+    check_metrics_supported,
+    parse_metrics,
+)
 from core.group_by.utils import get_bucket_keys
 from core.validate import validate_group_by
 from core.preference import clean_preference
@@ -19,22 +29,31 @@ Bucket creation.
 def create_group_by_buckets(fields_dict, group_by, include_unknown, s, params):
     cursor = params.get("cursor")
     q = params.get("q")
-    per_page = 500 if q else params.get("per_page")
     sort_params = params.get("sort")
 
     s = s.params(preference=clean_preference(group_by))
     field = get_field(fields_dict, group_by)
     validate_group_by(field, params)
 
-    if field.param in ["best_open_version", "version"] or "continent" in field.param:
+    metrics = parse_metrics(params.get("metrics"), fields_dict)
+
+    if is_custom_group_by(field):
+        s = create_custom_group_by_buckets(field, group_by, s)
+        check_metrics_supported(metrics, group_by, s, None)
         return s
 
     group_by_field = field.alias if field.alias else field.es_sort_field()
 
     bucket_keys = get_bucket_keys(group_by)
 
+    # without an include, q is matched against display names once the buckets come
+    # back, so extra buckets are fetched to find enough that match
+    include = bucket_include(field, group_by, q)
+    unmatched_q = q if include is None else None
+    per_page = 500 if unmatched_q else params.get("per_page")
+
     missing = get_missing(field)
-    shard_size = determine_shard_size(q)
+    shard_size = determine_shard_size(unmatched_q)
 
     s = filter_by_repository_or_journal(field, s)
 
@@ -48,6 +67,7 @@ def create_group_by_buckets(fields_dict, group_by, include_unknown, s, params):
             s,
             shard_size,
             sort_params,
+            include,
         )
     elif "is_global_south" in field.param:
         create_global_south_group_by_buckets(bucket_keys, group_by_field, s)
@@ -75,8 +95,12 @@ def create_group_by_buckets(fields_dict, group_by, include_unknown, s, params):
             per_page,
             s,
             shard_size,
+            include,
         )
 
+    check_metrics_supported(metrics, group_by, s, bucket_keys["default"])
+    if metrics:
+        add_bucket_metrics(metrics, s.aggs[bucket_keys["default"]])
     return s
 
 
@@ -89,6 +113,7 @@ def create_sorted_group_by_buckets(
     s,
     shard_size,
     sort_params,
+    include=None,
 ):
     for key, order in sort_params.items():
         if key in ["count", "key"]:
@@ -102,6 +127,8 @@ def create_sorted_group_by_buckets(
             )
             if include_unknown:
                 a.missing = missing
+            if include is not None:
+                a.include = include
             if "cited_by_percentile_year" in group_by_field:
                 a.format = "0.0"
             s.aggs.bucket(bucket_keys["default"], a)
@@ -172,7 +199,14 @@ def create_pagination_group_by_buckets(
 
 
 def create_default_group_by_buckets(
-    bucket_keys, group_by_field, include_unknown, missing, per_page, s, shard_size
+    bucket_keys,
+    group_by_field,
+    include_unknown,
+    missing,
+    per_page,
+    s,
+    shard_size,
+    include=None,
 ):
     a = A(
         "terms",
@@ -182,6 +216,8 @@ def create_default_group_by_buckets(
     )
     if include_unknown:
         a.missing = missing
+    if include is not None:
+        a.include = include
     if "cited_by_percentile_year" in group_by_field:
         a.format = "0.0"
     s.aggs.bucket(bucket_keys["default"], a)
@@ -1,24 +1,72 @@
-from elasticsearch_dsl import MultiSearch, Search, Q
+from elasticsearch_dsl import A, Q
 
 import settings
-from core.filter import filter_records
-from core.search import full_search_query
+from core.group_by.utils import get_bucket_keys
 from country_list import COUNTRIES_BY_CONTINENT
 
+"""
+Group bys whose groups are not values of a field, such as continents made of country
+codes. Each group is a bucket of one filters aggregation on the main search, so the
+counts come back with it rather than from a search per group.
+"""
+
+BEST_OPEN_VERSIONS = {
+    "any": ["submittedVersion", "acceptedVersion", "publishedVersion"],
+    "acceptedOrPublished": ["acceptedVersion", "publishedVersion"],
+    "published": ["publishedVersion"],
+}
+
+
+def is_custom_group_by(field):
+    return field.param in ["best_open_version", "version"] or "continent" in field.param
+
+
+def create_custom_group_by_buckets(field, group_by, s):
+    if "continent" in field.param:
+        filters = continent_filters(field)
+    elif field.param == "version":
+        filters = version_filters()
+    else:
+        filters = best_open_version_filters()
+    bucket_key = get_bucket_keys(group_by)["default"]
+    s.aggs.bucket(bucket_key, A("filters", filters=filters))
+    return s
+
+
+def continent_filters(field):
+    filters = {}
+    for continent, countries in COUNTRIES_BY_CONTINENT.items():
+        country_codes = [c["country_code"] for c in countries]
+        filters[continent] = Q("terms", **{field.es_field(): country_codes})
+    filters["unknown"] = ~Q("exists", field=field.es_field())
+    return filters
+
+
+def version_filters():
+    return {
+        version: ~Q("exists", field="locations.version")
+        if version == "null"
+        else Q("term", **{"locations.version": version})
+        for version in settings.VERSIONS
+    }
 
-def group_by_continent(field, index_name, params, fields_dict):
-    group_by_results = []
-    took = 0
-    ms = MultiSearch(index=index_name)
-    for continent in COUNTRIES_BY_CONTINENT:
-        s = search_and_filter(fields_dict, index_name, params)
-        country_codes = [c["country_code"] for c in COUNTRIES_BY_CONTINENT[continent]]
-        s = s.filter("terms", **{field.es_field(): country_codes})
-        ms = ms.add(s)
 
-    responses = ms.execute()
+def best_open_version_filters():
+    return {
+        version: Q("terms", best_oa_location__version=versions)
+        for version, versions in BEST_OPEN_VERSIONS.items()
+    }
 
-    for continent, response in zip(COUNTRIES_BY_CONTINENT.keys(), responses):
+
+def get_bucket_counts(group_by, response):
+    buckets = response.aggregations[get_bucket_keys(group_by)["default"]].buckets
+    return {key: bucket["doc_count"] for key, bucket in buckets.to_dict().items()}
+
+
+def group_by_continent(group_by, params, response):
+    counts = get_bucket_counts(group_by, response)
+    group_by_results = []
+    for continent in COUNTRIES_BY_CONTINENT:
         if not params["q"] or params["q"] and params["q"].lower() in continent.lower():
             group_by_results.append(
                 {
@@ -26,23 +74,11 @@ def group_by_continent(field, index_name, params, fields_dict):
                         continent.lower().replace(" ", "_")
                     ),
                     "key_display_name": continent,
-                    "doc_count": response.hits.total.value,
+                    "doc_count": counts.get(continent, 0),
                 }
             )
-        took = took + response.took
-
-    # get unknown
-    s = Search(index=index_name)
-    if params["search"] and params["search"] != '""':
-        search_query = full_search_query(index_name, params["search"])
-        s = s.query(search_query)
-
-    # filter
-    if params["filters"]:
-        s = filter_records(fields_dict, params["filters"], s)
-    s = s.query(~Q("exists", field=field.es_field()))
-    response = s.execute()
-    unknown_count = s.count()
+
+    unknown_count = counts.get("unknown", 0)
     if (unknown_count and not params["q"]) or (
         unknown_count and params["q"] and params["q"].lower() in "unknown"
     ):
@@ -53,7 +89,6 @@ def group_by_continent(field, index_name, params, fields_dict):
                 "doc_count": unknown_count,
             }
         )
-    took = took + response.took
 
     # sort by count
     group_by_results = sorted(
@@ -62,35 +97,22 @@ def group_by_continent(field, index_name, params, fields_dict):
     return group_by_results
 
 
-def group_by_version(field, index_name, params, include_unknown, fields_dict):
+def group_by_version(group_by, params, include_unknown, response):
+    counts = get_bucket_counts(group_by, response)
     group_by_results = []
-    took = 0
-    ms = MultiSearch(index=index_name)
     for version in settings.VERSIONS:
-        s = search_and_filter(fields_dict, index_name, params)
-        if version == "null":
-            s = s.filter(~Q("exists", field="locations.version"))
-        else:
-            kwargs1 = {"locations.version": version}
-            s = s.query(Q("term", **kwargs1))
-        ms = ms.add(s)
-
-    responses = ms.execute()
-
-    for version, response in zip(settings.VERSIONS, responses):
+        doc_count = counts.get(version, 0)
         version = "unknown" if version == "null" else version
-        key_display_name = "unknown" if version == "null" else version
-        if key_display_name == "unknown" and not include_unknown:
+        if version == "unknown" and not include_unknown:
             continue
         if not params["q"] or params["q"] and params["q"].lower() in version.lower():
             group_by_results.append(
                 {
                     "key": version,
-                    "key_display_name": key_display_name,
-                    "doc_count": response.hits.total.value,
+                    "key_display_name": version,
+                    "doc_count": doc_count,
                 }
             )
-        took = took + response.took
 
     # sort by count
     group_by_results = sorted(
@@ -99,37 +121,18 @@ def group_by_version(field, index_name, params, include_unknown, fields_dict):
     return group_by_results
 
 
-def group_by_best_open_version(field, index_name, params, fields_dict):
+def group_by_best_open_version(group_by, params, response):
+    counts = get_bucket_counts(group_by, response)
     group_by_results = []
-    took = 0
-    ms = MultiSearch(index=index_name)
-    versions = ["any", "acceptedOrPublished", "published"]
-    for version in versions:
-        s = search_and_filter(fields_dict, index_name, params)
-        submitted_query = Q("term", best_oa_location__version="submittedVersion")
-        accepted_query = Q("term", best_oa_location__version="acceptedVersion")
-        published_query = Q("term", best_oa_location__version="publishedVersion")
-        if version == "any":
-            query = submitted_query | accepted_query | published_query
-        elif version == "acceptedOrPublished":
-            query = accepted_query | published_query
-        elif version == "published":
-            query = published_query
-        ms = ms.add(s.filter(query))
-
-    responses = ms.execute()
-
-    for version, response in zip(versions, responses):
-        key_display_name = version
+    for version in BEST_OPEN_VERSIONS:
         if not params["q"] or params["q"] and params["q"].lower() in version.lower():
             group_by_results.append(
                 {
                     "key": version,
-                    "key_display_name": key_display_name,
-                    "doc_count": response.hits.total.value,
+                    "key_display_name": version,
+                    "doc_count": counts.get(version, 0),
                 }
             )
-        took = took + response.took
 
     # sort by count
     group_by_results = sorted(
@@ -137,15 +140,3 @@ def group_by_best_open_version(field, index_name, params, fields_dict):
     )
 
     return group_by_results
-
-
-def search_and_filter(fields_dict, index_name, params):
-    s = Search()
-    if params["search"] and params["search"] != '""':
-        search_query = full_search_query(index_name, params["search"])
-        s = s.query(search_query)
-    # filter
-    if params["filters"]:
-        s = filter_records(fields_dict, params["filters"], s)
-    s = s.extra(track_total_hits=True)
-    return s
@@ -1,9 +1,10 @@
 import iso3166
 import pycountry
-from elasticsearch_dsl import Search, Q, MultiSearch
+from elasticsearch_dsl import Search, MultiSearch
 from iso4217 import Currency
 
-from core.utils import get_index_name_by_id, normalize_openalex_id
+from core.display_name_resolver import get_display_names, get_openalex_display_names
+from core.utils import normalize_openalex_id
 from settings import (
     DOMAINS_INDEX,
     FIELDS_INDEX,
@@ -23,48 +24,17 @@ def get_id_display_names(ids):
     """Takes a list of ids and returns a dict with id[display_name]"""
     if not ids or (ids[0] == "unknown" and len(ids) == 1):
         return None
-
-    if ids[0] == "unknown" and len(ids) > 1:
-        index_name = get_index_name_by_id(ids[1])
-    else:
-        index_name = get_index_name_by_id(ids[0])
-    s = Search(index=index_name)
-    s = s.extra(size=500)
-    s = s.source(["id", "display_name"])
-
-    results = {}
-    or_queries = []
-    for openalex_id in ids:
-        or_queries.append(Q("term", id=openalex_id))
-    combined_or_query = Q("bool", should=or_queries, minimum_should_match=1)
-    s = s.query(combined_or_query)
-    response = s.execute()
-
-    for item in response:
-        results[item.id] = item.display_name
-    return results
+    return get_openalex_display_names(ids)
 
 
 def get_display_names_host_organization(ids):
     """Host organization is a special case because it can be an institution or a publisher."""
-    institution_ids = []
-    publisher_ids = []
+    host_organization_ids = []
     for openalex_id in ids:
         clean_id = normalize_openalex_id(openalex_id)
-        if clean_id and clean_id.startswith("I"):
-            institution_ids.append(openalex_id)
-        elif clean_id and clean_id.startswith("P"):
-            publisher_ids.append(openalex_id)
-    institution_names = get_id_display_names(institution_ids)
-    publisher_names = get_id_display_names(publisher_ids)
-
-    # merge the two dictionaries
-    results = {}
-    if institution_names:
-        results.update(institution_names)
-    if publisher_names:
-        results.update(publisher_names)
-    return results
+        if clean_id and clean_id.startswith(("I", "P")):
+            host_organization_ids.append(openalex_id)
+    return get_openalex_display_names(host_organization_ids)
 
 
 def get_display_names_award_ids(ids):
@@ -118,21 +88,7 @@ def get_display_names_keywords_licenses_topics(ids):
         return None
 
     index = f"{FIELDS_INDEX},{SUBFIELDS_INDEX},{DOMAINS_INDEX},{KEYWORDS_INDEX},{LICENSES_INDEX}"
-    s = Search(index=index)
-    s = s.extra(size=500)
-    s = s.source(["id", "display_name"])
-
-    results = {}
-    or_queries = []
-    for integer_id in ids:
-        or_queries.append(Q("term", id=integer_id))
-    combined_or_query = Q("bool", should=or_queries, minimum_should_match=1)
-    s = s.query(combined_or_query)
-    response = s.execute()
-
-    for item in response:
-        results[item.id] = item.display_name
-    return results
+    return get_display_names(ids, index)
 
 
 def get_key_display_name(b, group_by):
@@ -1,5 +1,14 @@
+import functools
+
 import iso3166
+import pycountry
 from elasticsearch_dsl import Q
+from iso4217 import Currency
+
+from core.group_by.display_names import requires_display_name_conversion
+
+# characters with a meaning in elasticsearch regular expressions
+REGEX_RESERVED = set('.?+*|{}[]()"\\#@&<>~')
 
 
 def filter_group_by(field, group_by, q, s):
@@ -92,3 +101,64 @@ def set_year_min_max(q):
         min_year = int(q)
         max_year = int(q)
     return min_year, max_year
+
+
+def bucket_include(field, group_by, q):
+    """
+    The terms include that keeps only the buckets whose display names contain q, for
+    group bys whose display names are their keys or come from a fixed table. None for
+    group bys whose display names are only known once the buckets come back.
+    """
+    if not q or q == "''" or type(field).__name__ != "TermField":
+        return None
+    if group_by.endswith("country_code") or group_by.endswith("countries"):
+        return matching_codes("countries", q.lower())
+    elif group_by == "language":
+        return matching_codes("languages", q.lower())
+    elif group_by.endswith("currency"):
+        return matching_codes("currencies", q.lower())
+    elif requires_display_name_conversion(group_by) or group_by in [
+        "apc_payment.provenance"
+    ]:
+        return None
+    return contains_regex(q)
+
+
+def contains_regex(q):
+    """A regular expression for keys that contain q, ignoring case."""
+    pattern = []
+    for character in q:
+        if character.lower() != character.upper():
+            pattern.append(f"[{character.lower()}{character.upper()}]")
+        elif character in REGEX_RESERVED:
+            pattern.append(f"\\{character}")
+        else:
+            pattern.append(character)
+    return f".*{''.join(pattern)}.*"
+
+
+@functools.lru_cache(maxsize=None)
+def display_name_tables():
+    """Codes and display names, as get_key_display_name gives them, by kind."""
+    return {
+        "countries": {country.alpha2: country.name for country in iso3166.countries},
+        "languages": {
+            **{
+                language.alpha_2: language.name
+                for language in pycountry.languages
+                if hasattr(language, "alpha_2")
+            },
+            "zh-cn": "Chinese",
+        },
+        "currencies": {currency.code: currency.currency_name for currency in Currency},
+    }
+
+
+@functools.lru_cache(maxsize=1000)
+def matching_codes(kind, q):
+    """The codes whose display names contain q, in both cases as keys may be either."""
+    codes = []
+    for code, display_name in display_name_tables()[kind].items():
+        if q in display_name.lower():
+            codes += sorted({code, code.lower(), code.upper()})
+    return codes
@@ -0,0 +1,123 @@
+import logging
+import threading
+import time
+
+from elasticsearch import NotFoundError
+from elasticsearch_dsl import Search
+
+import settings
+
+"""
+Per-worker copy of the groupby_values index, used to zero-fill group_by results. The
+index is small and only changes when it is rebuilt, so it is loaded once on first use
+and refreshed in the background after GROUPBY_VALUES_REFRESH_SECONDS. Until the first
+load succeeds nothing is zero-filled, and a failed one is retried after
+GROUPBY_VALUES_RETRY_SECONDS.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class GroupByValuesCache:
+    def __init__(self, index_name, refresh_seconds):
+        self.index_name = index_name
+        self.refresh_seconds = refresh_seconds
+        self.values = None
+        self.loaded_at = None
+        self.loads = 0
+        self.failures = 0
+        self.retry_at = 0
+        self.refreshing = False
+        # the lock guards the refreshing flag, the load lock makes one cold load
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()
+
+    def get(self, entity, group_by):
+        values = self.values
+        if values is None:
+            values = self.load_cold()
+        elif self.age() > self.refresh_seconds:
+            self.refresh_in_background()
+        return values.get((entity, group_by), [])
+
+    def load_cold(self):
+        """The first load, made by one reader. A failed one is retried after a back-off."""
+        with self.load_lock:
+            if self.values is None and time.monotonic() >= self.retry_at:
+                try:
+                    self.load()
+                except Exception:
+                    self.failures += 1
+                    self.retry_at = (
+                        time.monotonic() + settings.GROUPBY_VALUES_RETRY_SECONDS
+                    )
+                    logger.exception("Loading the groupby_values index failed.")
+            return self.values if self.values is not None else {}
+
+    def load(self):
+        """Build a new table from the index and swap it in, so readers never wait."""
+        s = Search(index=self.index_name)
+        s = s.source(["entity", "group_by", "buckets"])
+        s = s.extra(size=settings.GROUPBY_VALUES_MAX_DOCS)
+        values = {}
+        try:
+            response = s.execute()
+        except NotFoundError:
+            response = []
+        else:
+            total = response.hits.total.value
+            if total > settings.GROUPBY_VALUES_MAX_DOCS:
+                logger.warning(
+                    f"{self.index_name} has {total} documents, only the first "
+                    f"{settings.GROUPBY_VALUES_MAX_DOCS} are used to zero-fill group bys."
+                )
+        for hit in response:
+            key = (hit.entity, hit.group_by)
+            if key not in values:
+                values[key] = hit.to_dict().get("buckets") or []
+        self.loaded_at = time.monotonic()
+        self.values = values
+        self.loads += 1
+
+    def refresh(self):
+        """Reload the values now. Failures keep the values already loaded."""
+        try:
+            self.load()
+        except Exception:
+            self.failures += 1
+            logger.exception("Refreshing the groupby_values index failed.")
+        finally:
+            with self.lock:
+                self.refreshing = False
+
+    def refresh_in_background(self):
+        with self.lock:
+            if self.refreshing:
+                return
+            self.refreshing = True
+        threading.Thread(target=self.refresh, daemon=True).start()
+
+    def age(self):
+        return time.monotonic() - self.loaded_at if self.loaded_at else None
+
+    def clear(self):
+        with self.lock:
+            self.values = None
+            self.loaded_at = None
+            self.loads = 0
+            self.failures = 0
+            self.retry_at = 0
+
+    def stats(self):
+        age = self.age()
+        return {
+            "size": len(self.values) if self.values is not None else 0,
+            "age_seconds": round(age, 1) if age is not None else None,
+            "loads": self.loads,
+            "failures": self.failures,
+        }
+
+
+groupby_values = GroupByValuesCache(
+    settings.GROUPBY_VALUES_INDEX, settings.GROUPBY_VALUES_REFRESH_SECONDS
+)
@@ -0,0 +1,115 @@
+import re
+from collections import namedtuple
+
+import settings
+from core.exceptions import APIQueryParamsError
+from core.topic_ids import TOPIC_GROUP_BY_PARAMS
+from core.utils import get_field
+
+"""
+Metrics computed within each group of a group by, with
+metrics=sum(cited_by_count),avg(fwci),cardinality(authorships.author.id). Each metric is
+a sub aggregation of the group's bucket, named as it was asked for, and comes back
+with the group as metrics["sum(cited_by_count)"].
+"""
+
+Metric = namedtuple("Metric", ["label", "function", "es_field"])
+
+METRIC = re.compile(r"(\w+)\(([\w.]+)\)")
+
+# functions that need a number field, and those that take any field
+NUMBER_FUNCTIONS = ["avg", "max", "min", "sum"]
+ANY_FIELD_FUNCTIONS = ["cardinality"]
+
+MAX_METRICS = 5
+
+
+def parse_metrics(metrics_param, fields_dict):
+    """The metrics of the metrics param, checked against the fields of the entity."""
+    if not metrics_param:
+        return []
+    metrics = []
+    position = 0
+    while position < len(metrics_param):
+        match = METRIC.match(metrics_param, position)
+        if not match:
+            raise APIQueryParamsError(
+                f"Invalid metric in {metrics_param[position:]}. "
+                "Metrics look like "
+                "sum(cited_by_count),cardinality(authorships.author.id)"
+            )
+        metrics.append(parse_metric(match.group(), *match.groups(), fields_dict))
+        position = match.end()
+        if position < len(metrics_param):
+            if metrics_param[position] != ",":
+                raise APIQueryParamsError(
+                    f"Separate metrics with a comma in {metrics_param}."
+                )
+            position += 1
+    if len(metrics) > MAX_METRICS:
+        raise APIQueryParamsError(f"Group by takes at most {MAX_METRICS} metrics.")
+    return metrics
+
+
+def parse_metric(label, function, param, fields_dict):
+    if function not in NUMBER_FUNCTIONS + ANY_FIELD_FUNCTIONS:
+        raise APIQueryParamsError(
+            f"{function} is not a valid metric. Valid metrics are: "
+            f"{', '.join(NUMBER_FUNCTIONS + ANY_FIELD_FUNCTIONS)}."
+        )
+    field = get_field(fields_dict, param)
+    if function in NUMBER_FUNCTIONS and type(field).__name__ != "RangeField":
+        raise APIQueryParamsError(f"{function} needs a number field, not {param}.")
+    if type(field).__name__ == "SearchField":
+        raise APIQueryParamsError(f"{param} cannot be used in a metric.")
+    es_field = field.alias if field.alias else field.es_sort_field()
+    return Metric(label, function, es_field)
+
+
+def parse_pivot_metrics(metrics_param, fields_dict, group_bys):
+    """The metrics of a pivot group by, checked for each of its fields."""
+    metrics = parse_metrics(metrics_param, fields_dict)
+    for group_by in group_bys:
+        check_metrics_mergeable(metrics, group_by)
+    return metrics
+
+
+def check_metrics_supported(metrics, group_by, s, bucket_key):
+    if metrics and bucket_key not in s.aggs:
+        raise APIQueryParamsError(
+            f"Metrics do not work when grouping by {group_by}, "
+            "whose groups are not values of the field."
+        )
+    check_metrics_mergeable(metrics, group_by)
+
+
+def check_metrics_mergeable(metrics, group_by):
+    """
+    Topic ids in both formats come back as two buckets that are merged after the
+    search. Counts add up, but averages and cardinalities cannot be combined.
+    """
+    if (
+        metrics
+        and group_by in TOPIC_GROUP_BY_PARAMS
+        and not settings.TOPIC_IDS_SINGLE_FORMAT
+    ):
+        raise APIQueryParamsError(
+            f"Metrics do not work when grouping by {group_by} yet, "
+            "while its ids are indexed in two formats."
+        )
+
+
+def add_bucket_metrics(metrics, agg):
+    """Add the metrics to a terms or composite aggregation, computed for each bucket."""
+    for metric in metrics:
+        agg.metric(metric.label, metric.function, field=metric.es_field)
+    return agg
+
+
+def get_bucket_metrics(b):
+    """The metrics computed for a bucket, by label."""
+    return {
+        name: value["value"]
+        for name, value in b.to_dict().items()
+        if isinstance(value, dict) and METRIC.fullmatch(name)
+    }
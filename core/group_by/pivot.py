@@ -0,0 +1,136 @@
+from elasticsearch_dsl import A
+
+import settings
+from core.exceptions import APIQueryParamsError
+from core.group_by import buckets, display_names
+from core.group_by.custom_results import is_custom_group_by
+from core.group_by.metrics import add_bucket_metrics, parse_pivot_metrics
+from core.group_by.results import get_result, is_boolean_group_by
+from core.group_by.utils import get_bucket_keys, parse_pivot_group_by
+from core.preference import clean_preference
+from core.topic_ids import TOPIC_GROUP_BY_PARAMS, merge_topic_results
+from core.utils import get_field
+from core.validate import validate_group_by
+
+"""
+Pivot group bys, like group_by=primary_topic.id,publication_year, count the groups of
+the second field within each group of the first in one nested terms aggregation,
+rather than a filtered group by per group of the first field.
+"""
+
+
+def create_pivot_group_by_buckets(fields_dict, params, s):
+    (outer, outer_unknown), (inner, inner_unknown) = parse_pivot_group_by(
+        params["group_by"]
+    )
+    if params.get("q") and params["q"] != "''":
+        raise APIQueryParamsError("q does not work with a pivot group_by.")
+    if params.get("cursor"):
+        raise APIQueryParamsError(
+            "A pivot group_by does not support cursor pagination. "
+            "Use per-page to get more groups of the first field."
+        )
+    outer_field = get_pivot_field(fields_dict, outer, params)
+    inner_field = get_pivot_field(fields_dict, inner, params)
+    s = s.params(preference=clean_preference(params["group_by"]))
+    s = buckets.filter_by_repository_or_journal(outer_field, s)
+    s = buckets.filter_by_repository_or_journal(inner_field, s)
+    order = get_pivot_order(params.get("sort"))
+
+    metrics = parse_pivot_metrics(params.get("metrics"), fields_dict, [outer, inner])
+
+    inner_agg = terms_agg(inner_field, inner_unknown, settings.PIVOT_INNER_SIZE, order)
+    outer_agg = terms_agg(outer_field, outer_unknown, params["per_page"], order)
+    add_bucket_metrics(metrics, inner_agg)
+    add_bucket_metrics(metrics, outer_agg)
+    outer_agg.shard_size = buckets.determine_shard_size(None)
+    outer_agg.bucket(get_bucket_keys(inner)["default"], inner_agg)
+    s.aggs.bucket(get_bucket_keys(outer)["default"], outer_agg)
+    return s
+
+
+def get_pivot_field(fields_dict, group_by, params):
+    field = get_field(fields_dict, group_by)
+    validate_group_by(field, params)
+    if (
+        is_boolean_group_by(group_by)
+        or is_custom_group_by(field)
+        or "is_global_south" in field.param
+        or field.param == "mag_only"
+    ):
+        raise APIQueryParamsError(
+            f"{group_by} cannot be used in a pivot group_by. Group by it on its own."
+        )
+    return field
+
+
+def get_pivot_order(sort_params):
+    if not sort_params:
+        return None
+    for key, order in sort_params.items():
+        if key in ["count", "key"]:
+            return {f"_{key}": order}
+    return None
+
+
+def terms_agg(field, include_unknown, size, order):
+    group_by_field = field.alias if field.alias else field.es_sort_field()
+    a = A("terms", field=group_by_field, size=size)
+    if include_unknown:
+        a.missing = buckets.get_missing(field)
+    if order:
+        a.order = order
+    if "cited_by_percentile_year" in group_by_field:
+        a.format = "0.0"
+    return a
+
+
+def get_pivot_group_by_results(params, index_name, response):
+    """
+    The groups of the first field, each with the groups of the second inside it. The
+    display names of each field are resolved in one lookup for all of its groups.
+    """
+    (outer, _), (inner, _) = parse_pivot_group_by(params["group_by"])
+    inner_key = get_bucket_keys(inner)["default"]
+    outer_buckets = buckets.buckets_to_keep(
+        buckets.get_default_buckets(outer, response), outer
+    )
+    inner_buckets = [
+        buckets.buckets_to_keep(
+            buckets.transform_paginated_buckets(b[inner_key].buckets), inner
+        )
+        for b in outer_buckets
+    ]
+    outer_names = get_display_names(outer, outer_buckets)
+    inner_names = get_display_names(
+        inner, [b for group_buckets in inner_buckets for b in group_buckets]
+    )
+
+    results = []
+    for outer_bucket, group_buckets in zip(outer_buckets, inner_buckets):
+        result = get_result(outer_bucket, outer_names, outer, index_name)
+        if not result:
+            continue
+        groups = [get_result(b, inner_names, inner, index_name) for b in group_buckets]
+        result["groups"] = merge_groups(inner, [group for group in groups if group])
+        results.append(result)
+    return merge_groups(outer, results)
+
+
+def get_display_names(group_by, group_buckets):
+    if not display_names.requires_display_name_conversion(group_by):
+        return {}
+    keys = list(dict.fromkeys(b.key for b in group_buckets))
+    return display_names.get_display_name_mapping(keys, group_by) or {}
+
+
+def merge_groups(group_by, results):
+    """Topic hierarchy ids are indexed in two formats, so merge each id's groups."""
+    if group_by not in TOPIC_GROUP_BY_PARAMS:
+        return results
+    return merge_topic_results(results, f"{group_by.split('.')[1]}s")
+
+
+def calculate_pivot_group_count(params, response):
+    (outer, _), _ = parse_pivot_group_by(params["group_by"])
+    return len(response.aggregations[get_bucket_keys(outer)["default"]].buckets)
@@ -11,7 +11,9 @@ from core.group_by.custom_results import (
     group_by_continent,
     group_by_version,
 )
+from core.group_by.metrics import get_bucket_metrics
 from core.group_by.utils import parse_group_by, get_all_groupby_values
+from core.topic_ids import TOPIC_GROUP_BY_PARAMS, merge_topic_results
 
 from core.utils import (
     get_field,
@@ -38,22 +40,13 @@ def get_group_by_results(
     if is_boolean_group_by(group_by):
         return get_boolean_group_by_results(response, group_by)
     elif "continent" in field.param:
-        results = group_by_continent(field, index_name, params, fields_dict)
+        results = group_by_continent(group_by, params, response)
     elif field.param == "version":
-        results = group_by_version(
-            field, index_name, params, include_unknown, fields_dict
-        )
+        results = group_by_version(group_by, params, include_unknown, response)
     elif field.param == "best_open_version":
-        results = group_by_best_open_version(field, index_name, params, fields_dict)
+        results = group_by_best_open_version(group_by, params, response)
     # temp function until topics propagation done
-    elif field.param in (
-        "topics.domain.id",
-        "topics.subdomain.id",
-        "topics.field.id",
-        "primary_topic.domain.id",
-        "primary_topic.field.id",
-        "primary_topic.subfield.id",
-    ):
+    elif field.param in TOPIC_GROUP_BY_PARAMS:
         results = get_topics_group_by_results(group_by, response, index_name)
     else:
         results = get_default_group_by_results(group_by, response, index_name)
@@ -63,12 +56,7 @@ def get_group_by_results(
     if (
         field.param
         in (
-            "topics.domain.id",
-            "topics.subdomain.id",
-            "topics.field.id",
-            "primary_topic.domain.id",
-            "primary_topic.field.id",
-            "primary_topic.subfield.id",
+            *TOPIC_GROUP_BY_PARAMS,
             "country_code",
             "countries",
             "language",
@@ -156,35 +144,8 @@ def get_topics_group_by_results(group_by, response, index_name):
         if result:
             group_by_results.append(result)
 
-    # format single integer keys as URLs
-    entity = f"{group_by.split('.')[1]}s"
-    for group_by_result in group_by_results:
-        if "openalex.org" not in group_by_result["key"]:
-            group_by_result[
-                "key"
-            ] = f"https://openalex.org/{entity}/{group_by_result['key']}"
-
-    # merge the duplicate ids together and sum the doc_counts
-    for group_by_result in group_by_results:
-        if (
-            group_by_result["key"] in [item["key"] for item in group_by_results]
-            and group_by_result["key_display_name"]
-        ):
-            group_by_result["doc_count"] = sum(
-                [
-                    item["doc_count"]
-                    for item in group_by_results
-                    if item["key"] == group_by_result["key"]
-                ]
-            )
-            group_by_results = [
-                item
-                for item in group_by_results
-                if item["key"] != group_by_result["key"]
-            ]
-            group_by_results.append(group_by_result)
-
-    return group_by_results
+    # the same id in either format is one group
+    return merge_topic_results(group_by_results, f"{group_by.split('.')[1]}s")
 
 
 def get_result(b, key_display_names, group_by, index_name):
@@ -208,16 +169,18 @@ def get_result(b, key_display_names, group_by, index_name):
         b.key = str(round(b.key, 1))
 
     key = format_key(b.key, group_by, index_name)
-    return {"key": key, "key_display_name": key_display_name, "doc_count": doc_count}
+    result = {"key": key, "key_display_name": key_display_name, "doc_count": doc_count}
+    metrics = get_bucket_metrics(b)
+    if metrics:
+        result["metrics"] = metrics
+    return result
 
 
 def add_zero_values(results, include_unknown, index_name, field, params):
     ignore_values = set([str(item["key"]) for item in results])
     if not include_unknown:
         ignore_values.update(["unknown", "-111"])
-    possible_buckets = get_all_groupby_values(
-        entity=index_name.split("-")[0], field=field
-    )
+    possible_buckets = get_all_groupby_values(index_name, field)
     for bucket in possible_buckets:
         if (
             bucket["key"] not in ignore_values
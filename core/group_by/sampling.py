@@ -0,0 +1,123 @@
+import math
+
+from elasticsearch_dsl.aggs import Bucket
+from elasticsearch_dsl.response import Response
+from flask import g
+
+import settings
+
+"""
+Approximate group bys, with group_by_mode=approx. The group by aggregations run under
+a random_sampler aggregation over a share of the matching records, sized so about
+settings.GROUP_BY_SAMPLE_SIZE records are sampled, and their counts are scaled back up
+by the share. Smaller result sets, where elasticsearch would sample half the records or
+more, are counted exactly.
+"""
+
+SAMPLER_NAME = "group_by_sampler"
+
+# elasticsearch samples with a probability of at most 0.5, or exactly 1
+MAX_PROBABILITY = 0.5
+
+# the counts in an aggregation response that scale with the records sampled
+COUNT_KEYS = ["doc_count", "sum_other_doc_count", "doc_count_error_upper_bound"]
+
+# the aggregations of group_by and group_bys, as named by get_bucket_keys
+GROUP_BY_AGG_PREFIXES = ("groupby_", "exists_", "not_exists_")
+
+
+class RandomSampler(Bucket):
+    name = "random_sampler"
+
+
+def is_approximate(params):
+    return (params.get("group_by_mode") or "").lower() == "approx"
+
+
+def sample_probability(count):
+    """The share of count records to sample, or None to count them all."""
+    if not count:
+        return None
+    probability = settings.GROUP_BY_SAMPLE_SIZE / count
+    if probability > MAX_PROBABILITY:
+        return None
+    return probability
+
+
+def sample_group_by_aggregations(params, s):
+    """Move the group by aggregations of s under a random sampler, if asked for."""
+    if not is_approximate(params):
+        return s
+    probability = sample_probability(s.count())
+    if probability is None:
+        return s
+    body = s.to_dict()
+    aggs = body.setdefault("aggs", {})
+    sampled = {
+        name: aggs.pop(name)
+        for name in list(aggs)
+        if name.startswith(GROUP_BY_AGG_PREFIXES)
+    }
+    aggs[SAMPLER_NAME] = {
+        "random_sampler": {
+            "probability": probability,
+            "seed": settings.GROUP_BY_SAMPLE_SEED,
+        },
+        "aggs": sampled,
+    }
+    # extra() copies the search, which is then rebuilt from the new body
+    return s.extra().update_from_dict(body)
+
+
+def scale_sampled_aggregations(s, response):
+    """
+    Lift the sampled aggregations back to the top of the response with their counts
+    scaled up, and note the sampling for meta.
+    """
+    aggregations = response.to_dict().get("aggregations", {})
+    if SAMPLER_NAME not in aggregations:
+        return response
+    aggregations = dict(aggregations)
+    sampled = aggregations.pop(SAMPLER_NAME)
+    probability = sampled["probability"]
+    largest_count = 0
+    for name, agg in sampled.items():
+        if isinstance(agg, dict):
+            aggregations[name] = scale_counts(agg, 1 / probability)
+            largest_count = max(largest_count, largest_bucket_count(agg))
+    g.group_by_sampling = {
+        "probability": probability,
+        "sampled_count": sampled["doc_count"],
+        "error_margin_95": error_margin(largest_count, probability),
+    }
+    return Response(s, {**response.to_dict(), "aggregations": aggregations})
+
+
+def scale_counts(value, factor):
+    if isinstance(value, dict):
+        return {
+            key: round(item * factor)
+            if key in COUNT_KEYS and isinstance(item, (int, float))
+            else scale_counts(item, factor)
+            for key, item in value.items()
+        }
+    elif isinstance(value, list):
+        return [scale_counts(item, factor) for item in value]
+    return value
+
+
+def largest_bucket_count(agg):
+    buckets = agg.get("buckets", [])
+    if isinstance(buckets, dict):
+        buckets = buckets.values()
+    counts = [bucket.get("doc_count", 0) for bucket in buckets]
+    return max(counts + [agg.get("doc_count", 0)])
+
+
+def error_margin(sampled_count, probability):
+    """
+    The 95% margin of error of a count scaled up from sampled_count records, as each
+    record is sampled independently. Smaller groups have smaller margins, so the
+    margin of the largest group bounds the others.
+    """
+    return round(1.96 * math.sqrt(sampled_count * (1 - probability)) / probability)
@@ -1,8 +1,7 @@
-from elasticsearch import NotFoundError
-from elasticsearch_dsl import Search
+from flask import g
 
 from core.exceptions import APIQueryParamsError
-from settings import GROUPBY_VALUES_INDEX
+from core.group_by.groupby_values import groupby_values
 
 
 def get_bucket_keys(group_by):
@@ -35,18 +34,37 @@ def parse_group_by(group_by):
     return group_by, include_unknown
 
 
-def get_all_groupby_values(entity, field):
+def is_pivot_group_by(group_by):
+    """A group_by of two fields, like topics.id,publication_year, one inside the other."""
+    return bool(group_by) and "," in group_by
+
+
+def parse_pivot_group_by(group_by):
+    """The (group_by, include_unknown) of each dimension of a pivot group_by."""
+    dimensions = group_by.split(",")
+    if len(dimensions) != 2 or not all(dimensions):
+        raise APIQueryParamsError(
+            "A pivot group_by takes two fields, "
+            "like group_by=primary_topic.id,publication_year"
+        )
+    return [parse_group_by(dimension) for dimension in dimensions]
+
+
+def get_all_groupby_values(index_name, field):
+    """Known values for a group_by, used to zero-fill results. Served from memory."""
     # temp fix for best_oa_location.license
     if field == "best_oa_location.license":
         field = "locations.license"
 
-    s = Search(index=GROUPBY_VALUES_INDEX)
-    s = s.filter("term", entity=entity)
-    s = s.filter("term", group_by=field)
-    try:
-        response = s.execute()
-        buckets = response[0].buckets
-        return buckets if buckets else []
-    except (NotFoundError, IndexError):
-        # Nothing found for this entity/groupby combination
-        return []
+    entity = index_name.split("-")[0]
+    return groupby_values.get(entity, field)
+
+
+def record_groupby_values_age():
+    """
+    Note the age of the zero-fill values for the response headers. Call it from the
+    request thread, as writes to g from fan-out threads are not seen by the request.
+    """
+    age = groupby_values.stats()["age_seconds"]
+    if age is not None:
+        g.groupby_values_age = age
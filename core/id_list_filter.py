@@ -0,0 +1,73 @@
+from elasticsearch_dsl import Q
+
+import settings
+from core.exceptions import APIQueryParamsError
+from core.utils import get_field
+
+"""
+List views also take POST, with a JSON body of id lists too long for the filter param:
+
+    {"filter": {"doi": ["10.1234/a", ...], "authorships.author.id": ["A123", ...]}}
+
+Each list matches records with any of its ids, and the lists are combined with AND and
+with the filters in the query string. Ids are normalized in bulk by their field and
+sent as terms queries of at most TERMS_QUERY_CHUNK_SIZE ids, under elastic's
+index.max_terms_count, so results and group_by counts still come from a single search.
+"""
+
+
+def parse_id_list_filters(data):
+    """The filter lists from a POST body, keyed by filter name."""
+    filters = data.get("filter") if isinstance(data, dict) else None
+    if (
+        not isinstance(filters, dict)
+        or not filters
+        or not all(
+            isinstance(values, list) and all(isinstance(v, str) for v in values)
+            for values in filters.values()
+        )
+    ):
+        raise APIQueryParamsError(
+            "Send a JSON body with lists of IDs by filter, "
+            'like {"filter": {"doi": ["10.1234/example"]}}.'
+        )
+    id_count = sum(len(values) for values in filters.values())
+    if id_count > settings.MAX_IDS_IN_POST_FILTER:
+        raise APIQueryParamsError(
+            f"Maximum number of IDs exceeded. Decrease IDs to "
+            f"{settings.MAX_IDS_IN_POST_FILTER} or below, or consider downloading "
+            f"the full dataset at https://docs.openalex.org/download-snapshot"
+        )
+    return filters
+
+
+def id_list_query(field, values):
+    """A terms query matching any of values, split into chunks when it is long."""
+    terms = field.id_list_terms(list(dict.fromkeys(values)))
+    if terms is None:
+        raise APIQueryParamsError(
+            f"{field.param} cannot be filtered by a list of IDs in a POST body."
+        )
+    es_field, ids = terms
+    ids = list(dict.fromkeys(ids))
+    chunk_size = settings.TERMS_QUERY_CHUNK_SIZE
+    chunks = [
+        Q("terms", **{es_field: ids[start : start + chunk_size]})
+        for start in range(0, len(ids), chunk_size)
+    ]
+    if len(chunks) == 1:
+        return chunks[0]
+    return Q("bool", should=chunks, minimum_should_match=1)
+
+
+def apply_id_list_filters(request, fields_dict, s):
+    """Add the id lists from a POST body to s, leaving GET requests as they are."""
+    if request.method != "POST":
+        return s
+    filters = parse_id_list_filters(request.get_json(silent=True))
+    for key, values in filters.items():
+        field = get_field(fields_dict, key)
+        if not values:
+            raise APIQueryParamsError(f"The ID list for {key} is empty.")
+        s = s.filter(id_list_query(field, values))
+    return s
@@ -0,0 +1,44 @@
+from elasticsearch_dsl import Q, Search
+
+import settings
+from core.display_name_resolver import DisplayNameResolver, get_redis_client
+
+"""
+Resolves ids that are missing from their entity index to the ids they were merged into.
+Lookups go through the same in-process LRU and redis cache as display names, so a
+merged id reaches its merge index once per cache ttl. Ids that were not merged are
+cached for a short while only, so an id merged after it was first looked up redirects
+soon after. Misses for several ids are fetched in one msearch.
+"""
+
+KEY_PREFIX = "merged_id"
+
+
+class MergedIdResolver(DisplayNameResolver):
+    key_prefix = KEY_PREFIX
+
+    @staticmethod
+    def build_search(index_name, ids):
+        # author merges are indexed with a keyword id, the others with a text id
+        field = "id" if index_name.startswith("merge-authors") else "id.keyword"
+        s = Search(index=index_name)
+        s = s.filter(Q("terms", **{field: ids}))
+        s = s.source(["id", "merge_into_id"])
+        return s.extra(size=len(ids))
+
+    @staticmethod
+    def get_value(item):
+        return item.merge_into_id if "merge_into_id" in item else None
+
+
+merged_id_resolver = MergedIdResolver(
+    settings.MERGED_ID_CACHE_SIZE,
+    settings.MERGED_ID_CACHE_TTL,
+    get_redis_client(),
+    settings.MERGED_ID_MISS_CACHE_TTL,
+)
+
+
+def get_merged_ids(index_name, full_openalex_ids):
+    """The ids each of full_openalex_ids was merged into, leaving out unmerged ids."""
+    return merged_id_resolver.resolve({index_name: full_openalex_ids})
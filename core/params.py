@@ -1,3 +1,5 @@
+import settings
+from core.exceptions import APIQueryParamsError
 from core.paginate import get_per_page
 from core.utils import map_filter_params, map_sort_params, set_number_param
 from core.validate import validate_export_format, validate_params
@@ -14,6 +16,8 @@ def parse_params(request):
         "filters": map_filter_params(request.args.get("filter")),
         "group_by": request.args.get("group_by") or request.args.get("group-by"),
         "group_bys": request.args.get("group_bys") or request.args.get("group-bys"),
+        "group_by_mode": request.args.get("group_by_mode"),
+        "metrics": request.args.get("metrics"),
         "page": set_number_param(request, "page", 1),
         "per_page": get_per_page(request),
         "sample": request.args.get("sample", type=int),
@@ -25,3 +29,18 @@ def parse_params(request):
     if params["group_bys"]:
         params["group_bys"] = params["group_bys"].split(",")
     return params
+
+
+def parse_export_params(request):
+    """Extract the parameters of a bulk export, which are validated separately."""
+    params = {
+        "filters": map_filter_params(request.args.get("filter")),
+        "search": request.args.get("search"),
+        "slices": set_number_param(request, "slices", 1),
+        "sort": map_sort_params(request.args.get("sort")),
+    }
+    if not 1 <= params["slices"] <= settings.EXPORT_MAX_SLICES:
+        raise APIQueryParamsError(
+            f"slices must be between 1 and {settings.EXPORT_MAX_SLICES}."
+        )
+    return params
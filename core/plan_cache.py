@@ -0,0 +1,122 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from elasticsearch_dsl import Search
+
+import settings
+
+"""
+Cache of compiled query plans. A plan is the serialized request body and search
+params that construct_query produced for a normalized set of params, so hot queries
+skip filter parsing and field query building. Some bodies hold values resolved from
+lookup caches, like the location of a cited work, so plans expire no later than those.
+"""
+
+
+class QueryPlanCache:
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.plans = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, index_name):
+        with self.lock:
+            plan = self.plans.get(key)
+            if plan is not None and plan[2] <= time.monotonic():
+                del self.plans[key]
+                plan = None
+            if plan is None:
+                self.misses += 1
+                return None
+            self.plans.move_to_end(key)
+            self.hits += 1
+        body, search_params, _ = plan
+        s = Search(index=index_name).update_from_dict(json.loads(body))
+        if search_params:
+            s = s.params(**search_params)
+        return s
+
+    def set(self, key, s):
+        if self.max_size <= 0:
+            return
+        try:
+            plan = (
+                json.dumps(s.to_dict()),
+                dict(s._params),
+                time.monotonic() + self.ttl,
+            )
+        except TypeError:
+            # bodies holding values that do not serialize, such as cursors, are not cached
+            return
+        with self.lock:
+            self.plans[key] = plan
+            self.plans.move_to_end(key)
+            while len(self.plans) > self.max_size:
+                self.plans.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.plans.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.plans),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def normalize_or_value(value):
+    """Sort OR values so a|b and b|a share a plan. Values with a misplaced ! are left alone."""
+    negated = value.startswith("!")
+    or_values = value[1:].split("|") if negated else value.split("|")
+    if any(or_value.startswith("!") for or_value in or_values):
+        return value
+    or_values = sorted(or_values)
+    normalized = "|".join(or_values)
+    return f"!{normalized}" if negated else normalized
+
+
+def normalize_filters(filters):
+    if not filters:
+        return ()
+    normalized = set()
+    for filter in filters:
+        for key, value in filter.items():
+            if "|" in value:
+                value = normalize_or_value(value)
+            normalized.add((key, value))
+    return tuple(sorted(normalized))
+
+
+def get_plan_key(params, index_name, default_sort):
+    """Key a query plan on the index, default sort and normalized params."""
+    normalized = []
+    for name, value in sorted(params.items()):
+        if name == "filters":
+            value = normalize_filters(value)
+        elif name == "format":
+            continue
+        elif name == "cursor" and not params.get("group_by"):
+            # list cursors are added after the plan, group_by cursors are part of it
+            value = bool(value)
+        elif isinstance(value, dict):
+            value = tuple(value.items())
+        elif isinstance(value, list):
+            value = tuple(value)
+        normalized.append((name, value))
+    return index_name, tuple(default_sort), tuple(normalized)
+
+
+plan_cache = QueryPlanCache(settings.QUERY_PLAN_CACHE_SIZE, settings.QUERY_PLAN_TTL)
@@ -0,0 +1,336 @@
+import json
+
+import settings
+
+"""
+Rewrites a compiled query into an equivalent one that is cheaper for elastic to run.
+Filters are compiled one value at a time, so an OR of ids arrives as a bool of single
+term queries, each negated value as its own must_not bool and a date window as two
+ranges. The optimizer works on the query dict and, bottom up:
+
+- flattens nested bools whose clauses can be lifted into their parent
+- merges term and terms queries on one field in an OR, or in a must_not, into a terms
+- combines ranges on the same single valued field with different bounds
+- drops duplicate clauses where they cannot change the score
+- moves clauses into filter context when the hits are not sorted by score, where elastic
+  skips scoring and can cache them
+
+Clauses it does not understand are kept as they are.
+"""
+
+BOOL_KEYS = {"must", "filter", "should", "must_not", "minimum_should_match", "boost"}
+# a range matches a document when any of its values is in range, so two ranges on a
+# field with many values can match different values. They are only combined for these.
+SINGLE_VALUED_FIELDS = {
+    "cited_by_count",
+    "created_date",
+    "publication_date",
+    "publication_year",
+    "updated_date",
+}
+LOWER_BOUNDS = {"gt", "gte"}
+UPPER_BOUNDS = {"lt", "lte"}
+
+
+def optimize_search(s):
+    """s with its query optimized, scored only when the hits are sorted by score."""
+    body = s.to_dict()
+    if "query" not in body:
+        return s
+    scoring = needs_scores(body)
+    query = optimize_query(body["query"], scoring)
+    if not scoring and not is_filter_only(query):
+        # keep the top level in filter context, where elastic caches it
+        query = {"bool": {"filter": [query]}}
+    s = s._clone()
+    s.query = query
+    return s
+
+
+def needs_scores(body):
+    """Whether the scores of a search body can be seen, through its sort or hits."""
+    sort = body.get("sort")
+    if not sort:
+        return body.get("size", 10) != 0
+    return any(
+        item == "_score" or (isinstance(item, dict) and "_score" in item)
+        for item in sort
+    )
+
+
+def optimize_query(query, scoring=True):
+    """An equivalent query, or one matching the same documents when not scoring."""
+    if not isinstance(query, dict) or len(query) != 1:
+        return query
+    [(name, body)] = query.items()
+    if name == "bool" and isinstance(body, dict) and set(body) <= BOOL_KEYS:
+        return optimize_bool(body, scoring)
+    if not scoring and name == "constant_score" and set(body) <= {"filter", "boost"}:
+        return optimize_query(body["filter"], False)
+    if (
+        not scoring
+        and name == "function_score"
+        and "min_score" not in body
+        and "query" in body
+    ):
+        # without a min_score, functions only change the score
+        return optimize_query(body["query"], False)
+    return query
+
+
+def optimize_bool(body, scoring):
+    must = [optimize_query(q, scoring) for q in clause_list(body, "must")]
+    filter = [optimize_query(q, False) for q in clause_list(body, "filter")]
+    should = [optimize_query(q, scoring) for q in clause_list(body, "should")]
+    must_not = [optimize_query(q, False) for q in clause_list(body, "must_not")]
+    minimum_should_match = get_minimum_should_match(body)
+    boost = body.get("boost") if scoring else None
+    if minimum_should_match is None or minimum_should_match > len(should):
+        # a percentage, a count of missing clauses or one that cannot be met is left
+        # alone
+        optimized = bool_body(must, filter, should, must_not, boost)
+        optimized["minimum_should_match"] = body["minimum_should_match"]
+        return {"bool": optimized}
+
+    if not scoring:
+        filter = must + filter
+        must = []
+        if minimum_should_match == 0:
+            should = []
+    # bools that only filter add nothing to the score
+    filter += [q for q in must if is_filter_only(q)]
+    must = [q for q in must if not is_filter_only(q)]
+
+    must, filter, must_not = flatten_and(must, filter, must_not, scoring)
+    must_not = flatten_must_not(must_not)
+    if minimum_should_match <= 1:
+        should = flatten_or(should, scoring)
+
+    filter = merge_ranges(dedupe(filter))
+    must_not = merge_terms(dedupe(must_not))
+    if minimum_should_match == 1 and not scoring:
+        should = merge_terms(dedupe(should))
+
+    if minimum_should_match == 1 and len(should) == 1:
+        # a single should clause that has to match is a must, or a filter
+        if scoring:
+            must, should = must + should, []
+        else:
+            filter, should = filter + should, []
+
+    clauses = must + filter + should + must_not
+    if len(clauses) == 1 and boost is None and (must or (filter and not scoring)):
+        return clauses[0]
+    optimized = bool_body(must, filter, should, must_not, boost)
+    if should:
+        optimized["minimum_should_match"] = minimum_should_match
+    return {"bool": optimized}
+
+
+def clause_list(body, key):
+    clauses = body.get(key, [])
+    return clauses if isinstance(clauses, list) else [clauses]
+
+
+def bool_body(must, filter, should, must_not, boost):
+    optimized = {}
+    for key, clauses in [
+        ("must", must),
+        ("filter", filter),
+        ("should", should),
+        ("must_not", must_not),
+    ]:
+        if clauses:
+            optimized[key] = clauses
+    if boost is not None:
+        optimized["boost"] = boost
+    return optimized
+
+
+def get_minimum_should_match(body):
+    """
+    How many should clauses have to match, following elastic's default of 1 when a bool
+    has should clauses and no must or filter, or None when it is not a plain count.
+    """
+    if "minimum_should_match" not in body:
+        should = body.get("should")
+        return 1 if should and not body.get("must") and not body.get("filter") else 0
+    value = body["minimum_should_match"]
+    if isinstance(value, int) and value >= 0:
+        return value
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return None
+
+
+def bool_parts(query):
+    """The clauses of a plain bool, or None for other queries."""
+    if not isinstance(query, dict) or list(query) != ["bool"]:
+        return None
+    body = query["bool"]
+    if not isinstance(body, dict) or not set(body) <= BOOL_KEYS:
+        return None
+    return body
+
+
+def is_filter_only(query):
+    body = bool_parts(query)
+    return (
+        body is not None
+        and "boost" not in body
+        and not body.get("must")
+        and not body.get("should")
+        and bool(body.get("filter") or body.get("must_not"))
+    )
+
+
+def flatten_and(must, filter, must_not, scoring):
+    """Lift the clauses of nested bools that only AND their clauses."""
+    flat_must, flat_filter, flat_must_not = [], [], []
+    for context, clauses in [("must", must), ("filter", filter)]:
+        for q in clauses:
+            body = bool_parts(q)
+            if (
+                body is None
+                or body.get("should")
+                or "minimum_should_match" in body
+                or ("boost" in body and context == "must" and scoring)
+            ):
+                (flat_must if context == "must" else flat_filter).append(q)
+                continue
+            inner_must = clause_list(body, "must")
+            if context == "must":
+                flat_must += inner_must
+            else:
+                flat_filter += inner_must
+            flat_filter += clause_list(body, "filter")
+            flat_must_not += clause_list(body, "must_not")
+    return flat_must, flat_filter, flat_must_not + must_not
+
+
+def flatten_must_not(must_not):
+    """NOT (a OR b) is NOT a AND NOT b, so the clauses of a negated OR are lifted."""
+    flat = []
+    for q in must_not:
+        if is_or(q, scoring=False):
+            flat += clause_list(q["bool"], "should")
+        else:
+            flat.append(q)
+    return flat
+
+
+def flatten_or(should, scoring):
+    """Lift the clauses of nested bools that only OR their clauses."""
+    flat = []
+    for q in should:
+        if is_or(q, scoring):
+            flat += clause_list(q["bool"], "should")
+        else:
+            flat.append(q)
+    return flat
+
+
+def is_or(query, scoring):
+    """Whether query is a bool matching any one of its should clauses."""
+    body = bool_parts(query)
+    if body is None or (scoring and "boost" in body):
+        return False
+    keys = set(body) - {"boost", "minimum_should_match"}
+    return keys == {"should"} and get_minimum_should_match(body) == 1
+
+
+def dedupe(clauses):
+    seen = set()
+    unique = []
+    for q in clauses:
+        key = json.dumps(q, sort_keys=True, default=str)
+        if key not in seen:
+            seen.add(key)
+            unique.append(q)
+    return unique
+
+
+def term_values(query):
+    """(field, values) for a plain term or terms query, or None."""
+    if not isinstance(query, dict) or len(query) != 1:
+        return None
+    [(name, body)] = query.items()
+    if name not in ["term", "terms"] or not isinstance(body, dict) or len(body) != 1:
+        return None
+    [(field, value)] = body.items()
+    if name == "terms":
+        return (field, value) if isinstance(value, list) else None
+    if isinstance(value, dict):
+        return (field, [value["value"]]) if list(value) == ["value"] else None
+    return field, [value]
+
+
+def merge_terms(clauses):
+    """
+    Term and terms queries on one field merged into a terms query, in the place of the
+    first of them, for clauses that are ORed or all negated.
+    """
+    merged = []
+    values_by_field = {}
+    for q in clauses:
+        terms = term_values(q)
+        if terms is None:
+            merged.append(q)
+            continue
+        field, values = terms
+        current = values_by_field.get(field)
+        if (
+            current is not None
+            and len(current) + len(values) <= settings.TERMS_QUERY_CHUNK_SIZE
+        ):
+            current.extend(values)
+            continue
+        values_by_field[field] = list(values)
+        merged.append((field, values_by_field[field]))
+    return [terms_query(*q) if isinstance(q, tuple) else q for q in merged]
+
+
+def terms_query(field, values):
+    values = list(dict.fromkeys(values))
+    if len(values) == 1:
+        return {"term": {field: values[0]}}
+    return {"terms": {field: values}}
+
+
+def range_bounds(query):
+    """(field, bounds, options) for a range query, or None."""
+    if not isinstance(query, dict) or list(query) != ["range"]:
+        return None
+    body = query["range"]
+    if not isinstance(body, dict) or len(body) != 1:
+        return None
+    [(field, params)] = body.items()
+    if field not in SINGLE_VALUED_FIELDS or not isinstance(params, dict):
+        return None
+    bounds = {k: v for k, v in params.items() if k in LOWER_BOUNDS | UPPER_BOUNDS}
+    options = {k: v for k, v in params.items() if k not in bounds}
+    return field, bounds, options
+
+
+def merge_ranges(clauses):
+    """ANDed ranges on a field combined when one has the lower, one the upper bound."""
+    merged = []
+    for q in clauses:
+        current = range_bounds(q)
+        for i, other in enumerate(merged):
+            previous = range_bounds(other)
+            if previous is None or current is None:
+                continue
+            field, bounds, options = current
+            if previous[0] != field or previous[2] != options:
+                continue
+            keys = set(bounds) | set(previous[1])
+            if len(keys & LOWER_BOUNDS) > 1 or len(keys & UPPER_BOUNDS) > 1:
+                continue
+            if set(bounds) & set(previous[1]):
+                continue
+            merged[i] = {"range": {field: {**previous[1], **bounds, **options}}}
+            break
+        else:
+            merged.append(q)
+    return merged
@@ -0,0 +1,287 @@
+import functools
+import hashlib
+import json
+import re
+import threading
+import time
+from urllib.parse import urlencode
+
+from flask import copy_current_request_context, current_app, g, request
+from werkzeug.wrappers import Response
+
+import settings
+from core.exceptions import APIError
+from core.fields import ID_PARAMS, OpenAlexIDField
+from core.plan_cache import normalize_filters
+from core.serialization import encode
+from core.single_flight import single_flight
+from core.utils import map_filter_params, map_sort_params
+from extensions import cache
+
+"""
+Caches entity list responses. Keys are built from the parsed params rather than the raw
+query string, so requests that differ only in filter order, id format, param spelling
+or params that do not change the response, such as mailto, share one entry. Identical
+misses that arrive together are coalesced, so only the first one reaches elastic.
+
+Entries are stored with the time they go stale. Stale entries are still served, and
+the first request to see one starts a background refresh while the entry lives out its
+hard timeout. Responses are cached as they were sent to the first request, with
+meta.cache_status "miss". For each later request only the meta, which comes first in
+the body, is decoded and encoded again with its status.
+"""
+
+KEY_PREFIX = "list"
+
+# the start of a list response body, up to the meta object
+META_START = re.compile(r'\{\s*"meta"\s*:\s*')
+
+# params that never change the response
+IGNORED_PARAMS = {"bypass_cache", "mailto"}
+
+PARAM_ALIASES = {
+    "group-by": "group_by",
+    "group-bys": "group_bys",
+    "per-page": "per_page",
+}
+
+OPENALEX_ID = re.compile(
+    r"^(?:https?://openalex\.org/)?([WAICFVPST]\d{2,})$", re.IGNORECASE
+)
+
+
+class ResponseCacheStats:
+    """Hit, stale, miss and coalesced request counts per route, for this worker."""
+
+    def __init__(self):
+        self.routes = {}
+        self.lock = threading.Lock()
+
+    def record(self, route, outcome):
+        with self.lock:
+            counts = self.routes.setdefault(
+                route, {"hits": 0, "stale": 0, "misses": 0, "coalesced": 0}
+            )
+            counts[outcome] += 1
+
+    def clear(self):
+        with self.lock:
+            self.routes.clear()
+
+    def stats(self):
+        with self.lock:
+            stats = {}
+            for route, counts in sorted(self.routes.items()):
+                lookups = sum(counts.values())
+                stats[route] = dict(counts, hit_rate=round(counts["hits"] / lookups, 4))
+            return stats
+
+
+response_cache_stats = ResponseCacheStats()
+
+
+def cached_list_view(fields_dict):
+    """Serve a list view from the cache when the request can be cached."""
+
+    def decorator(f):
+        @functools.wraps(f)
+        def decorated_function(*args, **kwargs):
+            cache_key = (
+                get_cache_key(request, fields_dict) if is_cached(request) else None
+            )
+            if cache_key is None:
+                g.response_cache = "bypass"
+                return f(*args, **kwargs)
+
+            route = request.url_rule.rule
+
+            def compute():
+                g.response_cache = "miss"
+                rv = f(*args, **kwargs)
+                soft_timeout, hard_timeout = get_cache_timeouts(request)
+                try:
+                    entry = (time.time() + soft_timeout, rv)
+                    cache.set(cache_key, entry, timeout=hard_timeout)
+                except Exception:
+                    current_app.logger.exception("Response cache store failed.")
+                return rv
+
+            if g.get("refresh_response_cache"):
+                # recompute over the entry, which is served to others until replaced
+                rv, coalesced = single_flight.run(
+                    cache_key, compute, lambda: get_cached(cache_key)[1]
+                )
+                g.response_cache = "coalesced" if coalesced else "miss"
+                return with_cache_status(rv, g.response_cache)
+
+            stale_at, rv = get_cached(cache_key)
+            if rv is not None:
+                if time.time() < stale_at:
+                    response_cache_stats.record(route, "hits")
+                    g.response_cache = "hit"
+                else:
+                    single_flight.run_in_background(cache_key, refresh(compute))
+                    response_cache_stats.record(route, "stale")
+                    g.response_cache = "stale"
+                return with_cache_status(rv, g.response_cache)
+
+            rv, coalesced = single_flight.run(
+                cache_key, compute, lambda: get_cached(cache_key)[1]
+            )
+            outcome = "coalesced" if coalesced else "misses"
+            response_cache_stats.record(route, outcome)
+            g.response_cache = "coalesced" if coalesced else "miss"
+            return with_cache_status(rv, g.response_cache)
+
+        decorated_function.cached_list_view = True
+        decorated_function.fields_dict = fields_dict
+        return decorated_function
+
+    return decorator
+
+
+def get_cached(cache_key):
+    """(stale_at, response) for a cached response, or (0, None)."""
+    try:
+        entry = cache.get(cache_key)
+    except Exception:
+        current_app.logger.exception("Response cache lookup failed.")
+        return 0, None
+    if not isinstance(entry, tuple):
+        # nothing cached, or an entry from before soft timeouts, which is refreshed
+        return 0, entry
+    return entry
+
+
+def refresh(compute):
+    """compute() for a thread after this request has finished."""
+
+    @copy_current_request_context
+    def run():
+        try:
+            compute()
+        except Exception:
+            current_app.logger.exception("Response cache refresh failed.")
+
+    return run
+
+
+def with_cache_status(rv, status):
+    """Report how this request was served in the meta of a cached response."""
+    if status == "miss" or not isinstance(rv, Response):
+        return rv
+    body = rv.get_data(as_text=True)
+    match = META_START.match(body)
+    if match is None:
+        raise ValueError("Cached list responses must start with their meta.")
+    meta, end = json.JSONDecoder().raw_decode(body, match.end())
+    meta["cache_status"] = status
+    rv.set_data(body[: match.end()] + encode(meta).decode() + body[end:])
+    return rv
+
+
+def is_cached(request):
+    """
+    Exports, cursor pages, unseeded samples and POSTed id lists are not cached,
+    everything else is.
+    """
+    if request.method != "GET":
+        return False
+    if settings.DEBUG or request.args.get("bypass_cache") == "true":
+        return False
+    if request.args.get("format") or request.args.get("cursor"):
+        return False
+    if request.args.get("sample") and not request.args.get("seed"):
+        return False
+    return True
+
+
+def is_group_by(request):
+    return any(
+        request.args.get(name)
+        for name in ["group_by", "group-by", "group_bys", "group-bys"]
+    )
+
+
+def get_cache_timeouts(request):
+    """(soft, hard) seconds a response is served fresh and served at all."""
+    if is_group_by(request):
+        return settings.GROUP_BY_CACHE_TIMEOUTS.get(
+            request.blueprint,
+            (settings.GROUP_BY_CACHE_SOFT_TIMEOUT, settings.GROUP_BY_CACHE_TIMEOUT),
+        )
+    timeout = settings.LIST_CACHE_TIMEOUTS.get(
+        request.blueprint, settings.LIST_CACHE_TIMEOUT
+    )
+    return timeout, timeout
+
+
+def get_cache_key(request, fields_dict):
+    """
+    Canonical cache key for a request, or None when its params cannot be parsed, in
+    which case the view runs uncached and reports the problem.
+    """
+    try:
+        params = canonical_params(request.args, fields_dict)
+    except APIError:
+        return None
+    if params is None:
+        return None
+    query = urlencode(params)
+    digest = hashlib.md5(query.encode()).hexdigest()
+    view_args = "/".join(str(value) for value in (request.view_args or {}).values())
+    return f"{KEY_PREFIX}:{request.endpoint}:{view_args}:{digest}"
+
+
+def canonical_params(args, fields_dict):
+    """Sorted (name, value) pairs that mean the same thing for equivalent requests."""
+    params = {}
+    for name, value in args.items(multi=True):
+        name = PARAM_ALIASES.get(name, name)
+        if name in IGNORED_PARAMS:
+            continue
+        if name in params:
+            # the view rejects or ignores repeated params, so do not guess
+            return None
+        params[name] = value
+
+    if params.get("filter"):
+        params["filter"] = canonical_filter(params["filter"], fields_dict)
+    if params.get("sort"):
+        sort = map_sort_params(params["sort"])
+        params["sort"] = ",".join(f"{key}:{value}" for key, value in sort.items())
+    if params.get("select"):
+        select = params["select"].split(",")
+        params["select"] = ",".join(field.strip() for field in select)
+    return sorted(params.items())
+
+
+def canonical_filter(filter_param, fields_dict):
+    filters = [
+        {key: canonical_filter_value(value) if is_id_field(key, fields_dict) else value}
+        for filter in map_filter_params(filter_param)
+        for key, value in filter.items()
+    ]
+    return ",".join(f"{key}:{value}" for key, value in normalize_filters(filters))
+
+
+def is_id_field(key, fields_dict):
+    """Only openalex id values are case insensitive, other keywords are matched as is."""
+    return key in ID_PARAMS or isinstance(fields_dict.get(key), OpenAlexIDField)
+
+
+def canonical_filter_value(value):
+    """Short, upper case openalex ids in place of any of their accepted spellings."""
+    return "|".join(
+        " ".join(canonical_id(term) for term in or_value.split(" "))
+        for or_value in value.split("|")
+    )
+
+
+def canonical_id(term):
+    negated = term.startswith("!")
+    match = OPENALEX_ID.match(term[1:] if negated else term)
+    if not match:
+        return term
+    short_id = match.group(1).upper()
+    return f"!{short_id}" if negated else short_id
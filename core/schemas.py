@@ -1,6 +1,15 @@
 from marshmallow import INCLUDE, Schema, fields
 
 
+class GroupBySamplingSchema(Schema):
+    probability = fields.Float()
+    sampled_count = fields.Int()
+    error_margin_95 = fields.Int()
+
+    class Meta:
+        ordered = True
+
+
 class MetaSchema(Schema):
     count = fields.Int()
     q = fields.Str()
@@ -12,6 +21,18 @@ class MetaSchema(Schema):
     apc_list_sum_usd = fields.Int()
     apc_paid_sum_usd = fields.Int()
     cited_by_count_sum = fields.Int()
+    cache_status = fields.Str()
+    group_by_sampling = fields.Nested(GroupBySamplingSchema)
+
+    class Meta:
+        ordered = True
+
+
+class PivotGroupSchema(Schema):
+    key = fields.Str()
+    key_display_name = fields.Str()
+    count = fields.Int(attribute="doc_count")
+    metrics = fields.Dict(keys=fields.Str())
 
     class Meta:
         ordered = True
@@ -21,6 +42,10 @@ class GroupBySchema(Schema):
     key = fields.Str()
     key_display_name = fields.Str()
     count = fields.Int(attribute="doc_count")
+    # values of the metrics param computed within the group, by metric
+    metrics = fields.Dict(keys=fields.Str())
+    # the groups of the second field of a pivot group_by
+    groups = fields.Nested(PivotGroupSchema, many=True)
 
     class Meta:
         ordered = True
@@ -0,0 +1,262 @@
+import functools
+import math
+import re
+from json.encoder import encode_basestring_ascii
+
+import orjson
+from elasticsearch_dsl.utils import AttrDict, AttrList
+from flask import current_app, json, jsonify
+from marshmallow import Schema, fields, missing, utils
+
+"""
+Fast path for list responses. Each schema is compiled once per select set into plain
+functions that produce the same data as schema.dump, and the result is encoded with
+orjson into the same bytes flask.jsonify would send.
+"""
+
+# keys that marshmallow would also look up as attributes when missing from a dict or hit
+ATTRIBUTE_KEYS = set(dir(dict)) | {"meta", "to_dict"}
+
+# orjson and the json module format these floats differently
+STDLIB_FLOAT = re.compile(rb"[0-9]e|0\.0000")
+NON_ASCII = re.compile("[\x7f-\U0010ffff]+")
+
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+
+def serialize(schema_class, data, only=None):
+    """Equivalent of returning schema_class(only=only).dump(data) from a view."""
+    dump = get_dump_function(schema_class, tuple(only) if only else None)
+    return json_response(dump(data, False, False))
+
+
+@functools.lru_cache(maxsize=512)
+def get_dump_function(schema_class, only=None, context=()):
+    """context is a tuple of (key, value) pairs, so that it can be a cache key."""
+    return compile_schema(schema_class(only=only, context=dict(context)))
+
+
+def dump(schema_class, data, only=None):
+    dump_function = get_dump_function(schema_class, tuple(only) if only else None)
+    return dump_function(data, False, False)
+
+
+def compile_schema(schema):
+    """
+    Returns dump(obj, many, from_hit) for a schema instance. from_hit is True when obj
+    was taken from a raw elasticsearch document, which marshmallow would have seen
+    wrapped in AttrDict and AttrList.
+    """
+    generic_access = type(schema).get_attribute is not Schema.get_attribute
+    has_pre_dump = schema._has_processors("pre_dump")
+    has_post_dump = schema._has_processors("post_dump")
+    value_fields = []
+    object_fields = []
+    for attr_name, field in schema.dump_fields.items():
+        key = field.data_key if field.data_key is not None else attr_name
+        source_key = field.attribute or attr_name
+        convert = compile_field(field)
+        if (
+            convert is None
+            or generic_access
+            or "." in source_key
+            or source_key in ATTRIBUTE_KEYS
+        ):
+            object_fields.append((key, attr_name, field))
+        else:
+            value_fields.append((key, source_key, field.dump_default, convert))
+    # plain fields are read from the raw document unless something needs the wrapper
+    needs_wrapper = bool(object_fields) or has_pre_dump or has_post_dump
+    get_attribute = schema.get_attribute
+    dict_class = schema.dict_class
+    order = [
+        field.data_key if field.data_key is not None else attr_name
+        for attr_name, field in schema.dump_fields.items()
+    ]
+
+    def dump_one(obj, from_hit):
+        if type(obj) is dict:
+            get = obj.get
+        elif isinstance(obj, AttrDict):
+            get, from_hit = obj._d_.get, True
+        else:
+
+            def get(key, default):
+                return utils.get_value(obj, key, default)
+
+            from_hit = False
+
+        values = dict_class() if not object_fields else {}
+        for key, source_key, default, convert in value_fields:
+            value = get(source_key, missing)
+            if value is missing:
+                value = default() if callable(default) else default
+                if value is missing:
+                    continue
+            values[key] = convert(value, from_hit)
+        for key, attr_name, field in object_fields:
+            value = field.serialize(attr_name, obj, accessor=get_attribute)
+            if value is not missing:
+                values[key] = value
+        if not object_fields:
+            return values
+        return dict_class((key, values[key]) for key in order if key in values)
+
+    def dump(obj, many, from_hit):
+        if from_hit and needs_wrapper:
+            obj = wrap(obj)
+        processed = obj
+        if has_pre_dump:
+            processed = schema._invoke_dump_processors(
+                "pre_dump", obj, many=many, original_data=obj
+            )
+        if many and processed is not None:
+            result = [dump_one(item, from_hit) for item in processed]
+        else:
+            result = dump_one(processed, from_hit)
+        if has_post_dump:
+            result = schema._invoke_dump_processors(
+                "post_dump", result, many=many, original_data=obj
+            )
+        return result
+
+    return dump
+
+
+def compile_field(field):
+    """Converter for a field value, or None when the field needs marshmallow itself."""
+    field_type = type(field)
+    if field_type is fields.String:
+        return convert_string
+    if field_type is fields.Integer and not field.as_string:
+        return convert_integer
+    if field_type is fields.Float and not field.as_string:
+        return convert_float
+    if field_type is fields.Boolean:
+        return compile_boolean(field)
+    if field_type is fields.List:
+        convert_inner = compile_field(field.inner)
+        if convert_inner is None:
+            return None
+
+        def convert_list(value, from_hit):
+            if value is None:
+                return None
+            return [convert_inner(each, from_hit) for each in value]
+
+        return convert_list
+    if field_type is fields.Nested:
+        nested_dump = compile_schema(field.schema)
+        many = field.schema.many or field.many
+
+        def convert_nested(value, from_hit):
+            if value is None:
+                return None
+            return nested_dump(value, many, from_hit)
+
+        return convert_nested
+    return None
+
+
+def convert_string(value, from_hit):
+    if value is None or type(value) is str:
+        return value
+    return utils.ensure_text_type(wrap(value) if from_hit else value)
+
+
+def convert_integer(value, from_hit):
+    if value is None or type(value) is int:
+        return value
+    return int(value)
+
+
+def convert_float(value, from_hit):
+    if value is None:
+        return value
+    value = float(value)
+    # orjson writes these as null where the json module writes NaN and Infinity
+    return value if math.isfinite(value) else NonFiniteFloat(value)
+
+
+class NonFiniteFloat(float):
+    """Float subclasses are handed to the default hook, which sends them to the fallback."""
+
+
+def compile_boolean(field):
+    truthy = field.truthy
+    falsy = field.falsy
+
+    def convert_boolean(value, from_hit):
+        if value is None:
+            return None
+        try:
+            if value in truthy:
+                return True
+            if value in falsy:
+                return False
+        except TypeError:
+            pass
+        return bool(value)
+
+    return convert_boolean
+
+
+def wrap(value):
+    if type(value) is dict:
+        return AttrDict(value)
+    if type(value) is list:
+        return AttrList(value)
+    return value
+
+
+def json_response(data):
+    """The response flask.jsonify(data) would build, encoded with orjson where it can be."""
+    body = dumps(data)
+    if body is None:
+        return jsonify(data)
+    return current_app.response_class(
+        body + b"\n", mimetype=current_app.config["JSONIFY_MIMETYPE"]
+    )
+
+
+def encode(data):
+    """Compact JSON bytes for data, as jsonify would write them without the newline."""
+    body = dumps(data)
+    if body is None:
+        body = json.dumps(data, separators=(",", ":")).encode()
+    return body
+
+
+def dumps(data):
+    """
+    Compact JSON bytes matching the json module, or None when the stdlib encoder has to
+    be used: pretty printing, sorted keys, values orjson cannot encode, and floats that
+    the two encoders format differently.
+    """
+    config = current_app.config
+    if (
+        config["JSONIFY_PRETTYPRINT_REGULAR"]
+        or current_app.debug
+        or config["JSON_SORT_KEYS"]
+    ):
+        return None
+    encoder = current_app.json_encoder()
+
+    def default(value):
+        if isinstance(value, NonFiniteFloat):
+            raise TypeError("Not a finite float.")
+        return encoder.default(value)
+
+    try:
+        body = orjson.dumps(data, default=default, option=ORJSON_OPTIONS)
+    except (orjson.JSONEncodeError, TypeError):
+        return None
+    if STDLIB_FLOAT.search(body):
+        return None
+    if config["JSON_AS_ASCII"] and (not body.isascii() or b"\x7f" in body):
+        text = NON_ASCII.sub(
+            lambda match: encode_basestring_ascii(match.group())[1:-1],
+            body.decode(),
+        )
+        body = text.encode()
+    return body
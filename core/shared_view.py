@@ -1,36 +1,78 @@
+import time
 from collections import OrderedDict
 
-from elasticsearch.exceptions import RequestError
-from elasticsearch_dsl import Search
+from elasticsearch.exceptions import NotFoundError, RequestError
+from elasticsearch_dsl import Q, Search
+from flask import g
 
 import settings
-from core.cursor import get_next_cursor, handle_cursor
+from core.cursor import get_cursor_count, get_next_cursor, handle_cursor, is_pit_cursor
 from core.exceptions import APIPaginationError, APIQueryParamsError
 from core.filter import filter_records
+from core.id_list_filter import apply_id_list_filters
+from core.execution import parallel_map
+from core.group_by.custom_results import is_custom_group_by
 from core.group_by.results import get_group_by_results, calculate_group_by_count
 from core.group_by.filter import filter_group_by
-from core.group_by.utils import parse_group_by
+from core.group_by.pivot import (
+    calculate_pivot_group_count,
+    create_pivot_group_by_buckets,
+    get_pivot_group_by_results,
+)
+from core.group_by.utils import (
+    is_pivot_group_by,
+    parse_group_by,
+    record_groupby_values_age,
+)
+from core.group_by.sampling import (
+    sample_group_by_aggregations,
+    scale_sampled_aggregations,
+)
 from core.group_by.search import search_group_by_strings_with_q
 from core.group_by.buckets import add_meta_sums, create_group_by_buckets
 from core.paginate import get_pagination
 from core.params import parse_params
+from core.plan_cache import get_plan_key, plan_cache
 from core.preference import clean_preference, set_preference_for_filter_search
+from core.query_optimizer import optimize_search
 from core.search import check_is_search_query, full_search_query
 from core.sort import get_sort_fields, sort_with_cursor, sort_with_sample
-from core.utils import get_field
+from core.terms_lookup import inline_stale_lookups
+from core.utils import get_field, get_total_count
 
 
 def shared_view(request, fields_dict, index_name, default_sort):
     """Primary function used to search, filter, and aggregate across all entities."""
     params = parse_params(request)
-    s = construct_query(params, fields_dict, index_name, default_sort)
-    response = execute_search(s, params)
+    s = get_query(params, fields_dict, index_name, default_sort)
+    # id lists posted in the body are not part of the plan, which is keyed on the url
+    s = apply_id_list_filters(request, fields_dict, s)
+    # sampled after the plan, as the share sampled depends on how many records match
+    s = sample_group_by_aggregations(params, s)
+    response = execute_search(s, params, index_name)
+    response = scale_sampled_aggregations(s, response)
     result = format_response(response, params, index_name, fields_dict, s)
     if settings.DEBUG:
         print(s.to_dict())
     return result
 
 
+def get_query(params, fields_dict, index_name, default_sort):
+    """Use a cached query plan when one exists, otherwise construct the query and cache its plan."""
+    start = time.perf_counter()
+    plan_key = get_plan_key(params, index_name, default_sort)
+    s = plan_cache.get(plan_key, index_name)
+    if s is None:
+        s = construct_query(params, fields_dict, index_name, default_sort)
+        if not g.get("skip_query_plan_cache"):
+            plan_cache.set(plan_key, s)
+        g.query_plan_cache = "miss"
+    else:
+        g.query_plan_cache = "hit"
+    g.query_build_time_ms = round((time.perf_counter() - start) * 1000, 3)
+    return s
+
+
 def construct_query(params, fields_dict, index_name, default_sort):
     s = Search(index=index_name)
 
@@ -38,7 +80,7 @@ def construct_query(params, fields_dict, index_name, default_sort):
 
     s = set_size(params, s)
 
-    s = set_cursor_pagination(params, s)
+    s = set_track_total_hits(s)
 
     s = add_search_query(params, index_name, s)
 
@@ -52,6 +94,8 @@ def construct_query(params, fields_dict, index_name, default_sort):
 
     s = add_meta_sums(params, index_name, s)
 
+    s = optimize_search(s)
+
     return s
 
 
@@ -77,10 +121,9 @@ def set_size(params, s):
     return s
 
 
-def set_cursor_pagination(params, s):
-    if not params["group_by"]:
-        s = handle_cursor(params["cursor"], params["page"], s)
-    return s
+def set_track_total_hits(s):
+    # count comes from hits.total so no separate count request is needed
+    return s.extra(track_total_hits=settings.TRACK_TOTAL_HITS)
 
 
 def add_search_query(params, index_name, s):
@@ -138,7 +181,9 @@ def apply_sorting(params, fields_dict, default_sort, index_name, s):
 
 
 def apply_grouping(params, fields_dict, s):
-    if params["group_by"]:
+    if is_pivot_group_by(params["group_by"]):
+        s = create_pivot_group_by_buckets(fields_dict, params, s)
+    elif params["group_by"]:
         group_by, include_unknown = parse_group_by(params["group_by"])
         s = create_group_by_buckets(fields_dict, group_by, include_unknown, s, params)
     elif params["group_bys"]:
@@ -151,33 +196,67 @@ def apply_grouping(params, fields_dict, s):
 
 
 def filter_group_with_q(params, fields_dict, s):
+    if is_pivot_group_by(params["group_by"]):
+        return s
     if params["group_by"] and params["q"] and params["q"] != "''":
         group_by, _ = parse_group_by(params["group_by"])
         field = get_field(fields_dict, group_by)
-        s = filter_group_by(field, group_by, params["q"], s)
+        if is_custom_group_by(field):
+            # the groups are aggregated over every record, so q only narrows the count
+            q_search = filter_group_by(field, group_by, params["q"], Search())
+            if q_search.query:
+                s = s.post_filter(Q(q_search.to_dict()["query"]))
+        else:
+            s = filter_group_by(field, group_by, params["q"], s)
     return s
 
 
-def execute_search(s, params):
+def execute_search(s, params, index_name):
     paginate = get_pagination(params)
     if params["group_by"]:
+        paged = s
         response = s.execute()
     else:
+        # cursors are added after the query plan so every page of a walk shares it
+        paged = handle_cursor(params["cursor"], params["page"], s, index_name)
         try:
-            response = s[paginate.start : paginate.end].execute()
+            response = paged[paginate.start : paginate.end].execute()
+        except NotFoundError:
+            if not is_pit_cursor(params["cursor"]):
+                raise
+            # the point in time expired, continue the walk without one
+            paged = handle_cursor(
+                params["cursor"], params["page"], s, index_name, use_pit=False
+            )
+            response = paged[paginate.start : paginate.end].execute()
         except RequestError as e:
             if "search_after has" in str(e) and "sort has" in str(e):
                 raise APIPaginationError("Cursor value is invalid.")
             raise e
+    if get_hits_total(response) == 0:
+        # a terms lookup on a work that moved since its location was cached, searched
+        # again with the cursor already added, so a first page opens no second snapshot
+        relocated = inline_stale_lookups(paged)
+        if relocated is not None:
+            if params["group_by"]:
+                return relocated.execute()
+            return relocated[paginate.start : paginate.end].execute()
     return response
 
 
+def get_hits_total(response):
+    """The total in hits, or None when it was not counted."""
+    return response.to_dict()["hits"].get("total", {}).get("value")
+
+
 def format_response(response, params, index_name, fields_dict, s):
     result = OrderedDict()
 
     result["meta"] = format_meta(response, params, s)
 
-    if params["group_by"]:
+    if is_pivot_group_by(params["group_by"]):
+        result["group_by"] = get_pivot_group_by_results(params, index_name, response)
+    elif params["group_by"]:
         result["group_by"] = format_group_by(response, params, index_name, fields_dict)
     elif params["group_bys"]:
         result["group_bys"] = format_group_bys(
@@ -195,18 +274,17 @@ def format_response(response, params, index_name, fields_dict, s):
 
 
 def format_meta(response, params, s):
+    count = calculate_sample_or_default_count(params, response, s)
     meta = {
-        "count": calculate_sample_or_default_count(params, s),
+        "count": count,
         "db_response_time_ms": response.took,
         "page": params["page"] if not params["cursor"] else None,
         "per_page": params["per_page"],
-        "groups_count": calculate_group_by_count(params, response)
-        if params["group_by"]
-        else None,
+        "groups_count": calculate_groups_count(params, response),
     }
 
     if params.get("cursor"):
-        meta["next_cursor"] = get_next_cursor(params, response)
+        meta["next_cursor"] = get_next_cursor(params, response, count)
 
     if (
         hasattr(response, "aggregations")
@@ -227,31 +305,50 @@ def format_meta(response, params, s):
         and "cited_by_count_sum" in response.aggregations
     ):
         meta["cited_by_count_sum"] = response.aggregations.cited_by_count_sum.value
+
+    if "response_cache" in g:
+        meta["cache_status"] = g.response_cache
+
+    if "group_by_sampling" in g:
+        meta["group_by_sampling"] = g.group_by_sampling
     return meta
 
 
+def calculate_groups_count(params, response):
+    if is_pivot_group_by(params["group_by"]):
+        return calculate_pivot_group_count(params, response)
+    elif params["group_by"]:
+        return calculate_group_by_count(params, response)
+    return None
+
+
 def format_group_by(response, params, index_name, fields_dict):
     group_by, include_unknown = parse_group_by(params["group_by"])
     group_by_data = get_group_by_results(
         group_by, include_unknown, params, index_name, fields_dict, response
     )
+    record_groupby_values_age()
     return group_by_data
 
 
 def format_group_bys(response, params, index_name, fields_dict):
-    group_bys_data = []
-
-    for group_by_item in params["group_bys"]:
+    def format_group_by_item(group_by_item):
         group_by_item, include_unknown = parse_group_by(group_by_item)
         item_results = get_group_by_results(
             group_by_item, include_unknown, params, index_name, fields_dict, response
         )
-        group_bys_data.append({"group_by_key": group_by_item, "groups": item_results})
+        return {"group_by_key": group_by_item, "groups": item_results}
 
-    return group_bys_data
+    # each group's display name and zero value lookups are independent
+    group_bys = parallel_map(format_group_by_item, params["group_bys"])
+    record_groupby_values_age()
+    return group_bys
 
 
-def calculate_sample_or_default_count(params, s):
-    if params["sample"] and params["sample"] < s.count():
+def calculate_sample_or_default_count(params, response, s):
+    count = get_cursor_count(params["cursor"])
+    if count is None:
+        count = get_total_count(response, s)
+    if params["sample"] and params["sample"] < count:
         return params["sample"]
-    return s.count()
+    return count
@@ -0,0 +1,186 @@
+import threading
+import time
+import uuid
+
+import redis
+
+import settings
+
+"""
+Coalesces identical requests that arrive while the first of them is still running.
+Requests in one worker wait on the leader's event; across workers the leader holds a
+short redis lock and the others poll the response cache until it is filled. The lock
+expires after SINGLE_FLIGHT_LOCK_TIMEOUT, so waiters compute the result themselves if
+the leader dies or its result is not cached. Background refreshes of stale responses
+take the same lock, so only one worker recomputes each of them.
+"""
+
+LOCK_PREFIX = "lock"
+
+# deletes the lock only if this process still owns it
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    def __init__(self, lock_timeout, poll_interval, redis_client=None):
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self.redis_client = redis_client
+        self.in_flight = {}
+        self.leaders = 0
+        self.followers = 0
+        self.fallbacks = 0
+        self.refreshes = 0
+        self.lock = threading.Lock()
+
+    def run(self, key, compute, get_result):
+        """
+        Returns (result, coalesced). compute() runs for the first caller of a key, and
+        duplicates return get_result() once it has finished. get_result returns None
+        when there is nothing to share, in which case the duplicate computes its own.
+        """
+        with self.lock:
+            event = self.in_flight.get(key)
+            leader = event is None
+            if leader:
+                event = self.in_flight[key] = threading.Event()
+
+        if not leader:
+            event.wait(self.lock_timeout)
+            return self.follow(compute, get_result)
+
+        try:
+            token = self.acquire(key)
+            if token is None:
+                # another worker is computing this key
+                if self.wait_for_remote(key, get_result):
+                    return self.follow(compute, get_result)
+            with self.lock:
+                self.leaders += 1
+            try:
+                return compute(), False
+            finally:
+                self.release(key, token)
+        finally:
+            self.finish(key, event)
+
+    def run_in_background(self, key, compute):
+        """
+        Start compute() in a thread unless the key is already being computed, here or
+        in another worker. Returns whether it started. Callers that run() the key in
+        the meantime wait for it as they would for any leader.
+        """
+        with self.lock:
+            if key in self.in_flight:
+                return False
+            event = self.in_flight[key] = threading.Event()
+
+        token = self.acquire(key)
+        if token is None:
+            self.finish(key, event)
+            return False
+
+        def refresh():
+            try:
+                compute()
+            finally:
+                self.release(key, token)
+                self.finish(key, event)
+
+        with self.lock:
+            self.refreshes += 1
+        threading.Thread(target=refresh, daemon=True).start()
+        return True
+
+    def finish(self, key, event):
+        with self.lock:
+            del self.in_flight[key]
+        event.set()
+
+    def follow(self, compute, get_result):
+        result = get_result()
+        if result is not None:
+            with self.lock:
+                self.followers += 1
+            return result, True
+        with self.lock:
+            self.fallbacks += 1
+        return compute(), False
+
+    def acquire(self, key):
+        """A token for the redis lock, True without redis, or None if it is taken."""
+        if not self.redis_client:
+            return True
+        token = uuid.uuid4().hex
+        try:
+            acquired = self.redis_client.set(
+                lock_key(key), token, nx=True, px=int(self.lock_timeout * 1000)
+            )
+        except redis.RedisError:
+            # without redis, coalescing falls back to this worker only
+            return True
+        return token if acquired else None
+
+    def release(self, key, token):
+        if not self.redis_client or not isinstance(token, str):
+            return
+        try:
+            self.redis_client.eval(RELEASE_SCRIPT, 1, lock_key(key), token)
+        except redis.RedisError:
+            # the lock expires on its own
+            pass
+
+    def wait_for_remote(self, key, get_result):
+        """Poll until the remote leader has a result or gives up its lock."""
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            if get_result() is not None:
+                return True
+            try:
+                if not self.redis_client.exists(lock_key(key)):
+                    return get_result() is not None
+            except redis.RedisError:
+                return False
+            time.sleep(self.poll_interval)
+        return False
+
+    def clear(self):
+        with self.lock:
+            self.leaders = 0
+            self.followers = 0
+            self.fallbacks = 0
+            self.refreshes = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                "in_flight": len(self.in_flight),
+                "leaders": self.leaders,
+                "followers": self.followers,
+                "fallbacks": self.fallbacks,
+                "refreshes": self.refreshes,
+            }
+
+
+def lock_key(key):
+    return f"{LOCK_PREFIX}:{key}"
+
+
+def get_redis_client():
+    if not settings.CACHE_REDIS_URL:
+        return None
+    return redis.Redis.from_url(
+        settings.CACHE_REDIS_URL, socket_timeout=settings.SINGLE_FLIGHT_REDIS_TIMEOUT
+    )
+
+
+single_flight = SingleFlight(
+    settings.SINGLE_FLIGHT_LOCK_TIMEOUT,
+    settings.SINGLE_FLIGHT_POLL_INTERVAL,
+    get_redis_client(),
+)
@@ -0,0 +1,112 @@
+from elasticsearch_dsl import Q, Search
+from flask import g, has_app_context
+
+import settings
+from core.display_name_resolver import DisplayNameResolver, get_redis_client
+
+"""
+Filters like cited_by and related_to match the ids listed on another work. Rather than
+fetching those lists and sending them back in a terms query, the query names the work's
+document and elastic reads the list itself with a terms lookup. A terms lookup needs
+the concrete index and _id of the work, which are resolved once and cached, so after
+the first request these filters cost no extra round trip and no id list payload.
+
+A cached location goes stale when its work is reindexed elsewhere, and a terms lookup
+on a missing document silently matches nothing. So a search with terms lookups that
+finds nothing checks where its works are, and searches again with the ids inline
+for any work that moved.
+
+A work that is not indexed yet lists nothing, but it may be indexed any moment. So its
+absence is cached for seconds, and a query naming it is not kept as a query plan.
+"""
+
+KEY_PREFIX = "work_location"
+
+
+class WorkLocationResolver(DisplayNameResolver):
+    """The [index, _id] of works by full openalex id, cached like display names."""
+
+    key_prefix = KEY_PREFIX
+
+    @staticmethod
+    def build_search(index_name, ids):
+        s = Search(index=index_name)
+        s = s.filter("terms", id=ids)
+        s = s.source(["id"])
+        return s.extra(size=len(ids))
+
+    @staticmethod
+    def get_value(item):
+        return [item.meta.index, item.meta.id]
+
+
+work_locations = WorkLocationResolver(
+    settings.WORK_LOCATION_CACHE_SIZE,
+    settings.WORK_LOCATION_CACHE_TTL,
+    get_redis_client(),
+    settings.WORK_LOCATION_MISS_CACHE_TTL,
+)
+
+
+def resolve_work_locations(full_openalex_ids):
+    """Locations of works by full id, all missing ones fetched in one msearch."""
+    return work_locations.resolve({settings.WORKS_INDEX: full_openalex_ids})
+
+
+def terms_lookup_query(field, full_openalex_id, path):
+    """Match documents whose field is one of the ids at path on the given work."""
+    location = resolve_work_locations([full_openalex_id]).get(full_openalex_id)
+    if location is None:
+        # an unknown work lists nothing, so nothing matches until it is indexed
+        if has_app_context():
+            g.skip_query_plan_cache = True
+        return Q("terms", **{field: []})
+    index, doc_id = location
+    return Q("terms", **{field: {"index": index, "id": doc_id, "path": path}})
+
+
+def find_terms_lookups(node, found=None):
+    """(terms query, field) for every terms lookup in a search body."""
+    found = [] if found is None else found
+    if isinstance(node, dict):
+        for field, value in node.get("terms", {}).items():
+            if isinstance(value, dict) and "path" in value:
+                found.append((node["terms"], field))
+        for value in node.values():
+            find_terms_lookups(value, found)
+    elif isinstance(node, list):
+        for value in node:
+            find_terms_lookups(value, found)
+    return found
+
+
+def inline_stale_lookups(s):
+    """
+    A copy of s with the lookups of works no longer at their cached location replaced
+    by the ids they list, or None when every lookup still finds its work.
+    """
+    body = s.to_dict()
+    lookups = find_terms_lookups(body)
+    if not lookups:
+        return None
+    doc_ids = list({terms[field]["id"] for terms, field in lookups})
+    paths = list({terms[field]["path"] for terms, field in lookups})
+    works = Search(index=settings.WORKS_INDEX).filter("ids", values=doc_ids)
+    works = works.source(["id"] + paths).extra(size=len(doc_ids))
+    found = {hit.meta.id: hit for hit in works.execute()}
+
+    moved = {}
+    for terms, field in lookups:
+        lookup = terms[field]
+        work = found.get(lookup["id"])
+        if work is None or work.meta.index == lookup["index"]:
+            # where it was cached, or gone, in which case it lists nothing anyway
+            continue
+        terms[field] = list(work.to_dict().get(lookup["path"], []))
+        moved[(settings.WORKS_INDEX, work.id)] = [work.meta.index, work.meta.id]
+    if not moved:
+        return None
+    for (index_name, openalex_id), location in moved.items():
+        work_locations.set_local(index_name, openalex_id, location)
+    work_locations.set_remote(moved)
+    return s.extra().update_from_dict(body)
@@ -0,0 +1,79 @@
+from elasticsearch_dsl import Q
+
+import settings
+
+"""
+Domain, field and subfield ids are indexed in two formats while records are
+reindexed: the old bare integer, like 3, and the new url, like
+https://openalex.org/domains/3. Both map to the url as one canonical id, so filters
+compile to a single terms query and group by buckets of the same id merge in one pass.
+
+Once every record carries the url, settings.TOPIC_IDS_SINGLE_FORMAT drops the old
+format from queries.
+"""
+
+TOPIC_ENTITIES = {"domain": "domains", "field": "fields", "subfield": "subfields"}
+
+TOPIC_ID_PARAMS = {
+    f"{prefix}{level}.id": entity
+    for prefix in ["", "topics.", "primary_topic."]
+    for level, entity in TOPIC_ENTITIES.items()
+}
+
+# the works group bys still indexed in both formats
+TOPIC_GROUP_BY_PARAMS = [
+    param
+    for param in TOPIC_ID_PARAMS
+    if param.startswith("topics.") or param.startswith("primary_topic.")
+]
+
+
+def topic_entity(param):
+    """The entity of a topic hierarchy id param, like domains, or None."""
+    return TOPIC_ID_PARAMS.get(param)
+
+
+def canonical_topic_id(entity, value):
+    """The url of an id given as 3, domains/3 or https://openalex.org/domains/3."""
+    value = str(value).removeprefix("https://openalex.org/").removeprefix(f"{entity}/")
+    return f"https://openalex.org/{entity}/{value}"
+
+
+def topic_id_query(es_field, entity, value):
+    canonical_id = canonical_topic_id(entity, value)
+    if settings.TOPIC_IDS_SINGLE_FORMAT:
+        return Q("term", **{es_field: canonical_id})
+    old_format = canonical_id.rsplit("/", 1)[1]
+    return Q("terms", **{es_field: [canonical_id, old_format]})
+
+
+def merge_topic_results(group_by_results, entity):
+    """
+    Sum the results whose keys are the same id in either format, keeping each at the
+    position its id first appeared. The groups within pivot results are summed too.
+    """
+    merged = {}
+    for result in group_by_results:
+        key = canonical_topic_id(entity, result["key"])
+        if key in merged:
+            merged[key]["doc_count"] += result["doc_count"]
+            if not merged[key]["key_display_name"]:
+                merged[key]["key_display_name"] = result["key_display_name"]
+            if "groups" in result:
+                merged[key]["groups"] = sum_groups(
+                    merged[key]["groups"] + result["groups"]
+                )
+        else:
+            merged[key] = {**result, "key": key}
+    return list(merged.values())
+
+
+def sum_groups(groups):
+    """Groups summed by key, in the order each key first appears."""
+    summed = {}
+    for group in groups:
+        if group["key"] in summed:
+            summed[group["key"]]["doc_count"] += group["doc_count"]
+        else:
+            summed[group["key"]] = dict(group)
+    return list(summed.values())
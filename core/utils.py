@@ -1,13 +1,14 @@
 import re
 
-from elasticsearch_dsl import Search
 from iso3166 import countries
 
 import settings
 from core.exceptions import APIQueryParamsError
+from core.filter_parser import parse_filter
 from settings import (
     AUTHORS_INDEX,
     CONCEPTS_INDEX,
+    FUNDERS_INDEX,
     INSTITUTIONS_INDEX,
     PUBLISHERS_INDEX,
     SOURCES_INDEX,
@@ -38,15 +39,7 @@ def map_filter_params(filter_params):
     Split filter params by comma, then map to a dictionary based on key:value.
     """
     if filter_params:
-        try:
-            results = []
-            params = filter_params.split(",")
-            for param in params:
-                key, value = param.split(":", 1)
-                key = key.replace("-", "_")  # convert key to underscore
-                results.append({key: value})
-        except ValueError:
-            raise APIQueryParamsError(f"Invalid query parameter in {param}.")
+        results = [{clause.key: clause.value} for clause in parse_filter(filter_params)]
     else:
         results = None
     return results
@@ -114,6 +107,8 @@ def get_index_name_by_id(openalex_id):
         index_name = AUTHORS_INDEX
     elif clean_id.startswith("C"):
         index_name = CONCEPTS_INDEX
+    elif clean_id.startswith("F"):
+        index_name = FUNDERS_INDEX
     elif clean_id.startswith("I"):
         index_name = INSTITUTIONS_INDEX
     elif clean_id.startswith("P"):
@@ -149,19 +144,15 @@ def get_full_openalex_id(openalex_id):
     return full_openalex_id
 
 
-def is_cached(request):
-    bypass_cache = request.args.get("bypass_cache") == "true"
-    # cache urls with group-by
-    if (
-        (request.args.get("group_by") or request.args.get("group-by"))
-        and not request.args.get("format")
-        and not bypass_cache
-        and not settings.DEBUG
-    ):
-        cached = True
-    else:
-        cached = False
-    return cached
+def get_total_count(response, s):
+    """
+    Takes an executed response and returns the total hit count. Only falls back to a
+    count request when elastic reports the total as a lower bound.
+    """
+    total = response.hits.total
+    if total.relation == "eq":
+        return total.value
+    return s.count()
 
 
 def get_country_name(country_id):
@@ -210,25 +201,3 @@ def get_flattened_fields(schema):
     for field in fields.values():
         flattened_fields.extend(dump_field_names_recurse(field))
     return flattened_fields
-
-
-def get_display_name(openalex_id):
-    """Takes an openalex id and returns a single display name."""
-    if not openalex_id:
-        return None
-    elif openalex_id == "null":
-        return "unknown"
-
-    if "https://openalex.org" not in openalex_id:
-        openalex_id = f"https://openalex.org/{openalex_id}"
-
-    index_name = get_index_name_by_id(openalex_id)
-    s = Search(index=index_name)
-    s = s.filter("term", ids__openalex__lower=openalex_id)
-    response = s.execute()
-
-    if response:
-        display_name = response[0].display_name
-    else:
-        display_name = None
-    return display_name
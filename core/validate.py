@@ -13,7 +13,9 @@ def validate_params(request):
         "group-by",
         "group_bys",
         "group-bys",
+        "group_by_mode",
         "mailto",
+        "metrics",
         "page",
         "per_page",
         "per-page",
@@ -44,6 +46,20 @@ def validate_params(request):
     validate_select_param(request)
     validate_sample_param(request)
     validate_search_param(request)
+    validate_group_by_mode_param(request)
+    validate_metrics_param(request)
+
+
+def validate_export_params(request):
+    valid_params = ["filter", "mailto", "search", "select", "slices", "sort"]
+    hidden_valid_params = ["bypass_cache"]
+    for arg in request.args:
+        if arg not in valid_params and arg not in hidden_valid_params:
+            raise APIQueryParamsError(
+                f"{arg} is not a valid parameter for exports. Valid parameters are: {', '.join(valid_params)}."
+            )
+    validate_filter_param(request)
+    validate_search_param(request)
 
 
 def validate_filter_param(request):
@@ -108,6 +124,33 @@ def validate_search_param(request):
         )
 
 
+def validate_group_by_mode_param(request):
+    mode = request.args.get("group_by_mode")
+    if mode is None:
+        return
+    if mode.lower() not in ["exact", "approx"]:
+        raise APIQueryParamsError("group_by_mode must be exact or approx.")
+    if mode.lower() == "approx" and not any(
+        param in request.args
+        for param in ["group_by", "group-by", "group_bys", "group-bys"]
+    ):
+        raise APIQueryParamsError("group_by_mode=approx needs a group_by or group_bys.")
+    if mode.lower() == "approx" and "cursor" in request.args:
+        raise APIQueryParamsError(
+            "group_by_mode=approx does not work with cursor pagination."
+        )
+    if mode.lower() == "approx" and "metrics" in request.args:
+        raise APIQueryParamsError("group_by_mode=approx does not work with metrics.")
+
+
+def validate_metrics_param(request):
+    if "metrics" in request.args and not any(
+        param in request.args
+        for param in ["group_by", "group-by", "group_bys", "group-bys"]
+    ):
+        raise APIQueryParamsError("metrics need a group_by or group_bys.")
+
+
 def validate_export_format(export_format):
     valid_formats = ["csv", "json", "xlsx"]
     if export_format and export_format.lower() not in valid_formats:
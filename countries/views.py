@@ -2,18 +2,19 @@ from flask import Blueprint, jsonify, request
 
 from config.entity_config import entity_configs_dict
 from config.property_config import property_configs_dict
+from core.bulk_export import shared_export_view
 from core.export import export_group_by, is_group_by_export
 from core.filters_view import shared_filter_view
 from core.histogram import shared_histogram_view
+from core.response_cache import cached_list_view
 from core.schemas import FiltersWrapperSchema, HistogramWrapperSchema
+from core.serialization import serialize
 from core.shared_view import shared_view
 from core.utils import (
     get_flattened_fields,
     get_valid_fields,
-    is_cached,
     process_only_fields,
 )
-from extensions import cache
 from countries.fields import fields_dict
 from countries.schemas import CountriesSchema, MessageSchema
 from settings import COUNTRIES_INDEX
@@ -21,10 +22,8 @@ from settings import COUNTRIES_INDEX
 blueprint = Blueprint("countries", __name__)
 
 
-@blueprint.route("/countries")
-@cache.cached(
-    timeout=24 * 60 * 60, query_string=True, unless=lambda: not is_cached(request)
-)
+@blueprint.route("/countries", methods=["GET", "POST"])
+@cached_list_view(fields_dict)
 def countries():
     index_name = COUNTRIES_INDEX
     default_sort = ["-works_count", "id"]
@@ -33,8 +32,15 @@ def countries():
     # export option
     if is_group_by_export(request):
         return export_group_by(result, request)
-    message_schema = MessageSchema(only=only_fields)
-    return message_schema.dump(result)
+    return serialize(MessageSchema, result, only_fields)
+
+
+@blueprint.route("/countries/export.jsonl")
+def countries_export():
+    index_name = COUNTRIES_INDEX
+    return shared_export_view(
+        request, fields_dict, index_name, CountriesSchema, "countries"
+    )
 
 
 @blueprint.route("/countries/filters/<path:params>")
@@ -2,14 +2,16 @@ from flask import Blueprint, jsonify, request
 
 from config.entity_config import entity_configs_dict
 from config.property_config import property_configs_dict
+from core.bulk_export import shared_export_view
 from core.export import export_group_by, is_group_by_export
 from core.filters_view import shared_filter_view
 from core.histogram import shared_histogram_view
+from core.response_cache import cached_list_view
 from core.schemas import FiltersWrapperSchema, HistogramWrapperSchema
+from core.serialization import serialize
 from core.shared_view import shared_view
-from core.utils import (get_flattened_fields, get_valid_fields, is_cached,
+from core.utils import (get_flattened_fields, get_valid_fields,
                         process_only_fields)
-from extensions import cache
 from funders.fields import fields_dict
 from funders.schemas import FundersSchema, MessageSchema
 from settings import FUNDERS_INDEX
@@ -17,10 +19,8 @@ from settings import FUNDERS_INDEX
 blueprint = Blueprint("funders", __name__)
 
 
-@blueprint.route("/funders")
-@cache.cached(
-    timeout=24 * 60 * 60, query_string=True, unless=lambda: not is_cached(request)
-)
+@blueprint.route("/funders", methods=["GET", "POST"])
+@cached_list_view(fields_dict)
 def funders():
     index_name = FUNDERS_INDEX
     default_sort = ["-works_count", "id"]
@@ -29,8 +29,15 @@ def funders():
     # export option
     if is_group_by_export(request):
         return export_group_by(result, request)
-    message_schema = MessageSchema(only=only_fields)
-    return message_schema.dump(result)
+    return serialize(MessageSchema, result, only_fields)
+
+
+@blueprint.route("/funders/export.jsonl")
+def funders_export():
+    index_name = FUNDERS_INDEX
+    return shared_export_view(
+        request, fields_dict, index_name, FundersSchema, "funders"
+    )
 
 
 @blueprint.route("/funders/filters/<path:params>")
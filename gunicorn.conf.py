@@ -0,0 +1,15 @@
+import os
+
+# Fields and query plans are safe to share between threads, so workers can run the
+# threaded gthread worker class. Sync workers remain the default.
+worker_class = os.environ.get("WEB_WORKER_CLASS", "sync")
+workers = int(os.environ.get("WEB_WORKERS_PER_DYNO", 2))
+threads = int(os.environ.get("WEB_THREADS_PER_WORKER", 1))
+timeout = int(os.environ.get("WEB_TIMEOUT", 30))
+
+
+def post_worker_init(worker):
+    # load the group_by zero-fill values before the first group_by request needs them
+    from core.group_by.groupby_values import groupby_values
+
+    groupby_values.refresh_in_background()
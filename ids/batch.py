@@ -0,0 +1,154 @@
+from elasticsearch_dsl import MultiSearch, Search
+
+import settings
+from authors.schemas import AuthorsSchema
+from concepts.schemas import ConceptsSchema
+from core.exceptions import APIQueryParamsError
+from core.merged_id_resolver import merged_id_resolver
+from core.serialization import get_dump_function
+from core.utils import get_full_openalex_id, get_index_name_by_id
+from funders.schemas import FundersSchema
+from ids.utils import process_id_only_fields
+from institutions.schemas import InstitutionsSchema
+from publishers.schemas import PublishersSchema
+from sources.schemas import SourcesSchema
+from topics.schemas import TopicsSchema
+from works.schemas import WorksSchema
+
+"""
+Looks up many openalex ids of mixed entity types at once. Ids are grouped by index and
+fetched with terms queries of up to ENTITY_BATCH_CHUNK_SIZE ids, sent together in one
+msearch so elastic runs them in parallel. Ids missing from
+their index are resolved through the merged id cache, and the records they were merged
+into are fetched with a second msearch.
+"""
+
+# schema and dump context per index, as the single record views use them
+SCHEMAS = {
+    settings.AUTHORS_INDEX: (AuthorsSchema, {"display_relevance": False}),
+    settings.CONCEPTS_INDEX: (ConceptsSchema, {"display_relevance": False}),
+    settings.FUNDERS_INDEX: (FundersSchema, {"display_relevance": False}),
+    settings.INSTITUTIONS_INDEX: (InstitutionsSchema, {"display_relevance": False}),
+    settings.PUBLISHERS_INDEX: (PublishersSchema, {"display_relevance": False}),
+    settings.SOURCES_INDEX: (SourcesSchema, {"display_relevance": False}),
+    settings.TOPICS_INDEX: (TopicsSchema, {"display_relevance": False}),
+    settings.WORKS_INDEX: (
+        WorksSchema,
+        {"display_relevance": False, "single_record": True},
+    ),
+}
+
+MERGE_INDEXES = {
+    settings.AUTHORS_INDEX: "merge-authors-v1",
+    settings.CONCEPTS_INDEX: "merge-concepts",
+    settings.FUNDERS_INDEX: "merge-funders",
+    settings.INSTITUTIONS_INDEX: "merge-institutions",
+    settings.PUBLISHERS_INDEX: "merge-publishers",
+    settings.SOURCES_INDEX: "merge-sources",
+    settings.WORKS_INDEX: "merge-works",
+}
+
+# large fields no schema outputs. single records show the abstract and full authorships
+SOURCE_EXCLUDES = {
+    settings.WORKS_INDEX: ["embeddings", "fulltext", "vector_embedding"],
+}
+
+
+def parse_batch_ids(data):
+    """The ids from a batch request body, as sent."""
+    ids = data.get("ids") if isinstance(data, dict) else None
+    if not isinstance(ids, list) or not all(isinstance(id, str) for id in ids):
+        raise APIQueryParamsError(
+            "Send a JSON body with a list of OpenAlex IDs, "
+            'like {"ids": ["W2741809807", "A5023888391"]}.'
+        )
+    if len(ids) > settings.ENTITY_BATCH_MAX_IDS:
+        raise APIQueryParamsError(
+            f"A batch can have at most {settings.ENTITY_BATCH_MAX_IDS} IDs."
+        )
+    return ids
+
+
+def get_batch(request, ids):
+    """
+    Records keyed by the ids passed in, None for ids that were not found, and the full
+    id each merged id was merged into.
+    """
+    full_ids = {}
+    for id in ids:
+        full_id = get_full_openalex_id(id)
+        if not full_id or get_index_name_by_id(full_id) not in SCHEMAS:
+            raise APIQueryParamsError(f"'{id}' is not a valid OpenAlex ID.")
+        full_ids[id] = full_id
+    # select has to be valid for every entity type in the batch
+    only_by_index = {
+        index_name: process_id_only_fields(request, SCHEMAS[index_name][0])
+        for index_name in {get_index_name_by_id(id) for id in full_ids.values()}
+    }
+
+    records = fetch_records(set(full_ids.values()))
+    missing = [full_id for full_id in full_ids.values() if full_id not in records]
+    merged_ids = resolve_merged_ids(missing)
+    records.update(fetch_records(set(merged_ids.values()) - set(records)))
+
+    results = {}
+    for id, full_id in full_ids.items():
+        record = records.get(merged_ids.get(full_id, full_id))
+        results[id] = None if record is None else dump_record(record, only_by_index)
+    merged = {id: merged_ids[full_ids[id]] for id in ids if full_ids[id] in merged_ids}
+    return results, merged
+
+
+def fetch_records(full_ids):
+    """Hits keyed by full id, from chunked terms queries in a single msearch."""
+    ids_by_index = {}
+    for full_id in sorted(full_ids):
+        ids_by_index.setdefault(get_index_name_by_id(full_id), []).append(full_id)
+    chunk_size = settings.ENTITY_BATCH_CHUNK_SIZE
+    chunks = [
+        (index_name, index_ids[start : start + chunk_size])
+        for index_name, index_ids in ids_by_index.items()
+        for start in range(0, len(index_ids), chunk_size)
+    ]
+    if not chunks:
+        return {}
+
+    ms = MultiSearch()
+    for index_name, chunk in chunks:
+        s = Search(index=index_name)
+        s = s.filter("terms", id=chunk)
+        if index_name in SOURCE_EXCLUDES:
+            s = s.source(excludes=SOURCE_EXCLUDES[index_name])
+        ms = ms.add(s.extra(size=len(chunk)))
+
+    records = {}
+    for (index_name, _), response in zip(chunks, ms.execute()):
+        for hit in response:
+            hit.meta.index_name = index_name
+            records.setdefault(hit.id, hit)
+    return records
+
+
+def resolve_merged_ids(full_ids):
+    """The full id each missing id was merged into, leaving out unmerged ids."""
+    ids_by_merge_index = {}
+    for full_id in full_ids:
+        merge_index = MERGE_INDEXES.get(get_index_name_by_id(full_id))
+        if merge_index:
+            ids_by_merge_index.setdefault(merge_index, []).append(full_id)
+    if not ids_by_merge_index:
+        return {}
+    return {
+        full_id: get_full_openalex_id(merged_id)
+        for full_id, merged_id in merged_id_resolver.resolve(ids_by_merge_index).items()
+    }
+
+
+def dump_record(hit, only_by_index):
+    index_name = hit.meta.index_name
+    schema, context = SCHEMAS[index_name]
+    only = only_by_index[index_name]
+    dump = get_dump_function(
+        schema, tuple(only) if only else None, tuple(sorted(context.items()))
+    )
+    return dump(hit, False, False)
@@ -1,8 +1,7 @@
 import re
 
-from elasticsearch_dsl import Q, Search
-
 from core.exceptions import APIQueryParamsError
+from core.merged_id_resolver import get_merged_ids
 from core.utils import normalize_openalex_id
 
 
@@ -271,18 +270,8 @@ def normalize_scopus_id(scopus_id):
 
 
 def get_merged_id(index_name, full_openalex_id):
-    merged_id = None
-    s = Search(index=index_name)
-    if is_author_openalex_id(full_openalex_id):
-        s = s.filter(Q("term", id=full_openalex_id))
-    else:
-        s = s.filter(Q("term", id__keyword=full_openalex_id))
-    response = s.execute()
-    for item in response:
-        if "merge_into_id" in item:
-            merged_id = item.merge_into_id
-            merged_id = normalize_openalex_id(merged_id)
-    return merged_id
+    merged_id = get_merged_ids(index_name, [full_openalex_id]).get(full_openalex_id)
+    return normalize_openalex_id(merged_id) if merged_id else None
 
 
 def process_id_only_fields(request, schema):
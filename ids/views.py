@@ -8,10 +8,12 @@ import settings
 from authors.schemas import AuthorsSchema
 from concepts.schemas import ConceptsSchema
 from continents.schemas import ContinentsSchema
+from core.serialization import json_response
 from countries.schemas import CountriesSchema
 from domains.schemas import DomainsSchema
 from fields.schemas import FieldsSchema
 from funders.schemas import FundersSchema
+from ids.batch import get_batch, parse_batch_ids
 from ids.ui_format import format_as_ui, is_ui_format
 from ids.utils import (
     get_merged_id,
@@ -100,7 +102,7 @@ def works_id_get(id):
         full_openalex_id = f"https://openalex.org/W{clean_id}"
         query = Q("term", ids__openalex=full_openalex_id)
         s = s.filter(query)
-        if s.count() == 0:
+        if not s.execute():
             # check if document is merged
             merged_id = get_merged_id("merge-works", full_openalex_id)
             if merged_id:
@@ -196,7 +198,7 @@ def authors_id_get(id):
         full_author_id = f"https://openalex.org/A{author_id}"
         query = Q("term", ids__openalex=full_author_id)
         s = s.filter(query)
-        if s.count() == 0:
+        if not s.execute():
             # check if document is merged
             merged_id = get_merged_id("merge-authors-v1", full_author_id)
             if merged_id:
@@ -279,7 +281,7 @@ def institutions_id_get(id):
         full_openalex_id = f"https://openalex.org/I{clean_id}"
         query = Q("term", ids__openalex=full_openalex_id)
         s = s.filter(query)
-        if s.count() == 0:
+        if not s.execute():
             # check if document is merged
             merged_id = get_merged_id("merge-institutions", full_openalex_id)
             if merged_id:
@@ -360,7 +362,7 @@ def concepts_id_get(id):
         full_openalex_id = f"https://openalex.org/C{clean_id}"
         query = Q("term", ids__openalex=full_openalex_id)
         s = s.filter(query)
-        if s.count() == 0:
+        if not s.execute():
             # check if document is merged
             merged_id = get_merged_id("merge-concepts", full_openalex_id)
             if merged_id:
@@ -447,7 +449,7 @@ def funders_id_get(id):
         full_openalex_id = f"https://openalex.org/F{clean_id}"
         query = Q("term", ids__openalex=full_openalex_id)
         s = s.filter(query)
-        if s.count() == 0:
+        if not s.execute():
             # check if document is merged
             merged_id = get_merged_id("merge-funders", full_openalex_id)
             if merged_id:
@@ -512,7 +514,7 @@ def publishers_id_get(id):
         full_openalex_id = f"https://openalex.org/P{clean_id}"
         query = Q("term", ids__openalex=full_openalex_id)
         s = s.filter(query)
-        if s.count() == 0:
+        if not s.execute():
             # check if document is merged
             merged_id = get_merged_id("merge-publishers", full_openalex_id)
             if merged_id:
@@ -599,7 +601,7 @@ def sources_id_get(id):
         full_openalex_id = f"https://openalex.org/S{clean_id}"
         query = Q("term", ids__openalex=full_openalex_id)
         s = s.filter(query)
-        if s.count() == 0:
+        if not s.execute():
             # check if document is merged
             merged_id = get_merged_id("merge-sources", full_openalex_id)
             if merged_id:
@@ -817,6 +819,25 @@ def licenses_id_get(id):
     return get_by_openalex_external_id(settings.LICENSES_INDEX, LicensesSchema, id)
 
 
+# Batch
+
+
+@blueprint.route("/entities/batch", methods=["POST"])
+def entities_batch():
+    ids = parse_batch_ids(request.get_json(silent=True))
+    results, merged_ids = get_batch(request, ids)
+    return json_response(
+        {
+            "meta": {
+                "count": sum(record is not None for record in results.values()),
+                "requested": len(results),
+                "merged_ids": merged_ids,
+            },
+            "results": results,
+        }
+    )
+
+
 # Universal
 
 
@@ -1,17 +1,18 @@
 from flask import Blueprint, jsonify, request
 
+from core.bulk_export import shared_export_view
 from core.export import export_group_by, is_group_by_export
 from core.filters_view import shared_filter_view
 from core.histogram import shared_histogram_view
+from core.response_cache import cached_list_view
 from core.schemas import FiltersWrapperSchema, HistogramWrapperSchema
+from core.serialization import serialize
 from core.shared_view import shared_view
 from core.utils import (
     get_flattened_fields,
     get_valid_fields,
-    is_cached,
     process_only_fields,
 )
-from extensions import cache
 from institution_types.fields import fields_dict
 from institution_types.schemas import InstitutionTypesSchema, MessageSchema
 from settings import INSTITUTION_TYPES_INDEX
@@ -19,10 +20,8 @@ from settings import INSTITUTION_TYPES_INDEX
 blueprint = Blueprint("institution_types", __name__)
 
 
-@blueprint.route("/institution-types")
-@cache.cached(
-    timeout=24 * 60 * 60, query_string=True, unless=lambda: not is_cached(request)
-)
+@blueprint.route("/institution-types", methods=["GET", "POST"])
+@cached_list_view(fields_dict)
 def institution_types():
     index_name = INSTITUTION_TYPES_INDEX
     default_sort = ["-works_count", "id"]
@@ -31,8 +30,15 @@ def institution_types():
     # export option
     if is_group_by_export(request):
         return export_group_by(result, request)
-    message_schema = MessageSchema(only=only_fields)
-    return message_schema.dump(result)
+    return serialize(MessageSchema, result, only_fields)
+
+
+@blueprint.route("/institution-types/export.jsonl")
+def institution_types_export():
+    index_name = INSTITUTION_TYPES_INDEX
+    return shared_export_view(
+        request, fields_dict, index_name, InstitutionTypesSchema, "institution-types"
+    )
 
 
 @blueprint.route("/institution-types/filters/<path:params>")
@@ -2,16 +2,18 @@ from flask import Blueprint, jsonify, request
 
 from config.entity_config import entity_configs_dict
 from config.property_config import property_configs_dict
+from core.bulk_export import shared_export_view
 from core.export import export_group_by, is_group_by_export
 from core.filters_view import shared_filter_view
 from core.histogram import shared_histogram_view
+from core.response_cache import cached_list_view
 from core.schemas import (FiltersWrapperSchema, HistogramWrapperSchema,
                           StatsWrapperSchema)
+from core.serialization import serialize
 from core.shared_view import shared_view
 from core.stats_view import shared_stats_view
-from core.utils import (get_flattened_fields, get_valid_fields, is_cached,
+from core.utils import (get_flattened_fields, get_valid_fields,
                         process_only_fields)
-from extensions import cache
 from institutions.fields import fields_dict
 from institutions.schemas import InstitutionsSchema, MessageSchema
 from settings import INSTITUTIONS_INDEX
@@ -19,10 +21,8 @@ from settings import INSTITUTIONS_INDEX
 blueprint = Blueprint("institutions", __name__)
 
 
-@blueprint.route("/institutions")
-@cache.cached(
-    timeout=24 * 60 * 60, query_string=True, unless=lambda: not is_cached(request)
-)
+@blueprint.route("/institutions", methods=["GET", "POST"])
+@cached_list_view(fields_dict)
 def institutions():
     index_name = INSTITUTIONS_INDEX
     default_sort = ["-works_count", "id"]
@@ -31,8 +31,15 @@ def institutions():
     # export option
     if is_group_by_export(request):
         return export_group_by(result, request)
-    message_schema = MessageSchema(only=only_fields)
-    return message_schema.dump(result)
+    return serialize(MessageSchema, result, only_fields)
+
+
+@blueprint.route("/institutions/export.jsonl")
+def institutions_export():
+    index_name = INSTITUTIONS_INDEX
+    return shared_export_view(
+        request, fields_dict, index_name, InstitutionsSchema, "institutions"
+    )
 
 
 @blueprint.route("/institutions/filters/<path:params>")
@@ -2,18 +2,19 @@ from flask import Blueprint, jsonify, request
 
 from config.entity_config import entity_configs_dict
 from config.property_config import property_configs_dict
+from core.bulk_export import shared_export_view
 from core.export import export_group_by, is_group_by_export
 from core.filters_view import shared_filter_view
 from core.histogram import shared_histogram_view
+from core.response_cache import cached_list_view
 from core.schemas import FiltersWrapperSchema, HistogramWrapperSchema
+from core.serialization import serialize
 from core.shared_view import shared_view
 from core.utils import (
     get_flattened_fields,
     get_valid_fields,
-    is_cached,
     process_only_fields,
 )
-from extensions import cache
 from languages.fields import fields_dict
 from languages.schemas import LanguagesSchema, MessageSchema
 from settings import LANGUAGES_INDEX
@@ -21,10 +22,8 @@ from settings import LANGUAGES_INDEX
 blueprint = Blueprint("languages", __name__)
 
 
-@blueprint.route("/languages")
-@cache.cached(
-    timeout=24 * 60 * 60, query_string=True, unless=lambda: not is_cached(request)
-)
+@blueprint.route("/languages", methods=["GET", "POST"])
+@cached_list_view(fields_dict)
 def languages():
     index_name = LANGUAGES_INDEX
     default_sort = ["-works_count", "id"]
@@ -33,8 +32,15 @@ def languages():
     # export option
     if is_group_by_export(request):
         return export_group_by(result, request)
-    message_schema = MessageSchema(only=only_fields)
-    return message_schema.dump(result)
+    return serialize(MessageSchema, result, only_fields)
+
+
+@blueprint.route("/languages/export.jsonl")
+def languages_export():
+    index_name = LANGUAGES_INDEX
+    return shared_export_view(
+        request, fields_dict, index_name, LanguagesSchema, "languages"
+    )
 
 
 @blueprint.route("/languages/filters/<path:params>")
@@ -1,7 +1,8 @@
 from config.entity_config import entity_configs_dict
 from config.property_config import property_configs_dict
 from config.stats_config import stats_configs_dict
-from ids.ui_format import convert_openalex_id
+from core.display_name_resolver import get_openalex_display_names
+from ids.ui_format import convert_openalex_id, id_mapping
 
 
 class ResultTable:
@@ -24,7 +25,32 @@ class ResultTable:
         ]
 
     def body(self):
-        return [self.format_row(row) for row in self.json_data["results"]]
+        rows = [self.format_row(row) for row in self.json_data["results"]]
+        self.fill_missing_display_names(rows)
+        return rows
+
+    def fill_missing_display_names(self, rows):
+        """Resolve entities without a stored display name in one batch."""
+        missing = [
+            entity
+            for row in rows
+            for cell in row["cells"]
+            if cell["type"] == "entity"
+            for entity in (
+                cell["value"] if isinstance(cell["value"], list) else [cell["value"]]
+            )
+            if isinstance(entity, dict)
+            and isinstance(entity.get("id"), str)
+            and not entity.get("display_name")
+            and entity["id"].split("/")[0] in id_mapping.values()
+        ]
+        if not missing:
+            return
+        display_names = get_openalex_display_names(
+            [entity["id"] for entity in missing]
+        )
+        for entity in missing:
+            entity["display_name"] = display_names.get(entity["id"])
 
     def format_row(self, row):
         row_id = row.get("id")
@@ -2,14 +2,16 @@ from flask import Blueprint, jsonify, request
 
 from config.entity_config import entity_configs_dict
 from config.property_config import property_configs_dict
+from core.bulk_export import shared_export_view
 from core.export import export_group_by, is_group_by_export
 from core.filters_view import shared_filter_view
 from core.histogram import shared_histogram_view
+from core.response_cache import cached_list_view
 from core.schemas import FiltersWrapperSchema, HistogramWrapperSchema
+from core.serialization import serialize
 from core.shared_view import shared_view
-from core.utils import (get_flattened_fields, get_valid_fields, is_cached,
+from core.utils import (get_flattened_fields, get_valid_fields,
                         process_only_fields)
-from extensions import cache
 from publishers.fields import fields_dict
 from publishers.schemas import MessageSchema, PublishersSchema
 from settings import PUBLISHERS_INDEX
@@ -17,10 +19,8 @@ from settings import PUBLISHERS_INDEX
 blueprint = Blueprint("publishers", __name__)
 
 
-@blueprint.route("/publishers")
-@cache.cached(
-    timeout=24 * 60 * 60, query_string=True, unless=lambda: not is_cached(request)
-)
+@blueprint.route("/publishers", methods=["GET", "POST"])
+@cached_list_view(fields_dict)
 def publishers():
     index_name = PUBLISHERS_INDEX
     default_sort = ["-works_count", "id"]
@@ -29,8 +29,15 @@ def publishers():
     # export option
     if is_group_by_export(request):
         return export_group_by(result, request)
-    message_schema = MessageSchema(only=only_fields)
-    return message_schema.dump(result)
+    return serialize(MessageSchema, result, only_fields)
+
+
+@blueprint.route("/publishers/export.jsonl")
+def publishers_export():
+    index_name = PUBLISHERS_INDEX
+    return shared_export_view(
+        request, fields_dict, index_name, PublishersSchema, "publishers"
+    )
 
 
 @blueprint.route("/publishers/filters/<path:params>")
@@ -0,0 +1,101 @@
+"""
+Compare how long long filter strings take to parse and compile into a query, splitting
+them apart on every request as before against parsing them once into cached clauses
+and checking OR values against the precomputed field table.
+
+Needs no elasticsearch: only the query is built, nothing is sent.
+
+Run from the repo root: python -m scripts.benchmark_filter_parser --n 200
+"""
+import argparse
+import re
+import statistics
+import time
+
+from elasticsearch_dsl import Search
+
+from core.filter import filter_records
+from core.filter_parser import get_field_table, parse_clause, parse_filter
+from core.utils import map_filter_params
+from works.fields import fields_dict
+
+
+def long_filter(clauses, or_values):
+    """A filter string of ORed ids, negated ids, ranges and flags."""
+    parts = []
+    for i in range(clauses):
+        ids = "|".join(f"C{1000 + i * or_values + j}" for j in range(or_values))
+        parts += [
+            f"concepts.id:{ids}",
+            f"authorships.institutions.id:!I{2000 + i}|I{3000 + i}",
+            f"publication_year:{1990 + i % 30}-{2000 + i % 20}",
+            f"is_oa:{'true' if i % 2 else 'false'}",
+        ]
+    return ",".join(parts)
+
+
+def split_parse(filter_string):
+    """The filter param as it was parsed, with the per field OR check."""
+    filters = []
+    for param in filter_string.split(","):
+        key, value = param.split(":", 1)
+        filters.append({key.replace("-", "_"): value})
+    for filter in filters:
+        for key, value in filter.items():
+            if "|" in value:
+                for filter_field in fields_dict.keys():
+                    if filter_field in value:
+                        re.search(rf"{filter_field}:", value)
+            value.split("|")
+            value.split(" ")
+    return filters
+
+
+def table_parse(filter_string):
+    table = get_field_table(fields_dict)
+    filters = map_filter_params(filter_string)
+    for filter in filters:
+        for key, value in filter.items():
+            clause = parse_clause(key, value)
+            if clause.or_values:
+                table.cross_field_or.search(value)
+    return filters
+
+
+def cold_table_parse(filter_string):
+    parse_filter.cache_clear()
+    parse_clause.cache_clear()
+    return table_parse(filter_string)
+
+
+def compile_query(filter_string):
+    return filter_records(fields_dict, map_filter_params(filter_string), Search())
+
+
+def time_ms(function, filter_string, n):
+    times = []
+    for _ in range(n):
+        start = time.perf_counter()
+        function(filter_string)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def run(n=200):
+    for clauses, or_values in [(1, 10), (5, 20), (10, 50), (25, 100)]:
+        filter_string = long_filter(clauses, or_values)
+        print(f"{clauses * 4} filters, {len(filter_string)} characters")
+        for label, function in [
+            ("split per request", split_parse),
+            ("parser, uncached", cold_table_parse),
+            ("parser, cached", table_parse),
+            ("full query build", compile_query),
+        ]:
+            print(f"  {label}: {time_ms(function, filter_string, n):.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=200)
+    args = parser.parse_args()
+    run(args.n)
@@ -0,0 +1,106 @@
+"""
+Compare exact group bys with group_by_mode=approx on a recorded corpus of broad works
+group bys: latency, and how far the sampled counts are from the exact ones.
+
+Needs the elasticsearch cluster in ES_URL. Each request goes through the api with the
+response cache bypassed. Accuracy is the relative error of each group count in the
+exact top groups, and how many of the exact top 10 groups the sample also ranks top 10.
+
+Run from the repo root: python -m scripts.benchmark_group_by_sampling --n 3
+Pass --corpus with a file of /works urls, one per line, to replay other requests.
+"""
+import argparse
+import statistics
+import time
+
+from app import create_app
+
+# broad group bys recorded from dashboard traffic
+CORPUS = [
+    "/works?group_by=publication_year",
+    "/works?group_by=type",
+    "/works?group_by=oa_status&filter=publication_year:2010-2023",
+    "/works?group_by=authorships.countries&filter=is_oa:true",
+    "/works?group_by=primary_topic.field.id&filter=type:article",
+    "/works?group_by=language&filter=publication_year:>2000",
+    "/works?group_by=primary_location.source.id&filter=is_oa:true",
+    "/works?group_bys=type,oa_status,publication_year",
+]
+
+
+def with_mode(url, mode):
+    separator = "&" if "?" in url else "?"
+    return f"{url}{separator}group_by_mode={mode}&bypass_cache=true"
+
+
+def fetch(client, url):
+    start = time.perf_counter()
+    response = client.get(url)
+    seconds = time.perf_counter() - start
+    assert response.status_code == 200, response.get_json()
+    return seconds, response.get_json()
+
+
+def group_counts(result):
+    """Counts by group, for group_by and each of group_bys."""
+    if result.get("group_bys"):
+        return {
+            (group_by["group_by_key"], group["key"]): group["count"]
+            for group_by in result["group_bys"]
+            for group in group_by["groups"]
+        }
+    return {(None, group["key"]): group["count"] for group in result["group_by"]}
+
+
+def top_keys(counts, n=10):
+    return set(sorted(counts, key=counts.get, reverse=True)[:n])
+
+
+def compare(exact, approx):
+    exact_counts = group_counts(exact)
+    approx_counts = group_counts(approx)
+    errors = [
+        abs(approx_counts.get(key, 0) - count) / count
+        for key, count in exact_counts.items()
+        if count
+    ]
+    overlap = len(top_keys(exact_counts) & top_keys(approx_counts))
+    return statistics.mean(errors) if errors else 0, overlap
+
+
+def run(corpus, n=3):
+    client = create_app().test_client()
+    print(f"{len(corpus)} group bys, median of {n} runs each")
+    speedups = []
+    for url in corpus:
+        timings = {"exact": [], "approx": []}
+        results = {}
+        for _ in range(n):
+            for mode in timings:
+                seconds, results[mode] = fetch(client, with_mode(url, mode))
+                timings[mode].append(seconds)
+        exact_ms = statistics.median(timings["exact"]) * 1000
+        approx_ms = statistics.median(timings["approx"]) * 1000
+        error, overlap = compare(results["exact"], results["approx"])
+        sampling = results["approx"]["meta"].get("group_by_sampling")
+        probability = sampling["probability"] if sampling else 1
+        speedups.append(exact_ms / approx_ms)
+        print(f"  {url}")
+        print(
+            f"    exact {exact_ms:.0f} ms, approx {approx_ms:.0f} ms "
+            f"(probability {probability:.4f})"
+        )
+        print(f"    mean count error {error:.2%}, top 10 overlap {overlap}/10")
+    print(f"median speedup: {statistics.median(speedups):.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=3)
+    parser.add_argument("--corpus", help="a file of /works urls, one per line")
+    args = parser.parse_args()
+    corpus = CORPUS
+    if args.corpus:
+        with open(args.corpus) as f:
+            corpus = [line.strip() for line in f if line.strip()]
+    run(corpus, args.n)
@@ -0,0 +1,94 @@
+"""
+Compare query construction with and without the query plan cache.
+
+Replays a recorded mix of /works query shapes through construct_query and through
+get_query with a warm plan cache. No elasticsearch connection is needed.
+
+Run from the repo root: python -m scripts.benchmark_query_plans
+"""
+import random
+import time
+
+from flask import request
+
+from app import create_app
+from core.params import parse_params
+from core.plan_cache import plan_cache
+from core.shared_view import construct_query, get_query
+from settings import WORKS_INDEX
+from works.fields import fields_dict
+
+DEFAULT_SORT = ["-cited_by_percentile_year.max", "-cited_by_count", "id"]
+
+# (path, weight) pairs recorded from api usage logs
+QUERY_MIX = [
+    ("/works?filter=authorships.author.id:A5023888391", 20),
+    (
+        "/works?filter=authorships.institutions.id:I136199984&group_by=publication_year",
+        15,
+    ),
+    ("/works?filter=primary_location.source.id:S137773608,publication_year:2023", 12),
+    ("/works?search=climate%20change&filter=is_oa:true", 10),
+    ("/works?filter=concepts.id:C41008148|C71924100|C86803240&group_by=oa_status", 8),
+    (
+        "/works?filter=from_publication_date:2020-01-01,to_publication_date:2020-12-31,type:article",
+        8,
+    ),
+    (
+        "/works?filter=title.search:cancer,publication_year:2015-2020&sort=cited_by_count:desc",
+        6,
+    ),
+    (
+        "/works?filter=institutions.country_code:fr|de|gb,is_retracted:false&group_by=type",
+        6,
+    ),
+    ("/works?filter=topics.domain.id:1,authorships.institutions.lineage:I27837315", 5),
+    ("/works?filter=doi:10.1109/tbdata.2018.2872569|10.1371/journal.pone.0266781", 4),
+    ("/works?filter=cited_by_count:>100,has_doi:true,language:en&per-page=200", 3),
+    ("/works?group_bys=type,oa_status,publication_year", 3),
+]
+
+
+def recorded_paths(n, seed=42):
+    rng = random.Random(seed)
+    paths = [path for path, _ in QUERY_MIX]
+    weights = [weight for _, weight in QUERY_MIX]
+    return rng.choices(paths, weights=weights, k=n)
+
+
+def parse_paths(app, paths):
+    parsed = []
+    for path in paths:
+        with app.test_request_context(path):
+            parsed.append(parse_params(request))
+    return parsed
+
+
+def time_builds(app, parsed, build):
+    """Time query construction only; params are parsed up front."""
+    with app.test_request_context("/works"):
+        start = time.perf_counter()
+        for params in parsed:
+            build(params, fields_dict, WORKS_INDEX, DEFAULT_SORT)
+        return time.perf_counter() - start
+
+
+def run(n=5000):
+    app = create_app("tests.settings")
+    parsed = parse_paths(app, recorded_paths(n))
+
+    uncached = time_builds(app, parsed, construct_query)
+    plan_cache.clear()
+    cached = time_builds(app, parsed, get_query)
+    stats = plan_cache.stats()
+
+    print(f"requests:              {n}")
+    print(f"distinct query shapes: {len(QUERY_MIX)}")
+    print(f"construct_query:       {uncached / n * 1000:.3f} ms/request")
+    print(f"with plan cache:       {cached / n * 1000:.3f} ms/request")
+    print(f"speedup:               {uncached / cached:.1f}x")
+    print(f"plan cache hit rate:   {stats['hit_rate']:.2%}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,170 @@
+"""
+Compare rendering a /works page with marshmallow and jsonify against the compiled
+serializer. Uses synthetic works shaped like index documents; no elasticsearch
+connection is needed.
+
+Run from the repo root: python -m scripts.benchmark_serialization
+"""
+import json
+import time
+
+from elasticsearch_dsl import Search
+from elasticsearch_dsl.response import Response
+from flask import jsonify
+
+from app import create_app
+from core.serialization import serialize
+from works.schemas import MessageSchema
+
+SELECTS = {
+    "full records": None,
+    "select=id,display_name,cited_by_count": [
+        "meta",
+        "results.id",
+        "results.display_name",
+        "results.cited_by_count",
+        "group_by",
+    ],
+}
+
+
+def location(i):
+    return {
+        "is_oa": i % 2 == 0,
+        "landing_page_url": f"https://doi.org/10.1234/{i}",
+        "pdf_url": None,
+        "source": {
+            "id": f"https://openalex.org/S{i}",
+            "display_name": "Journal of Examples",
+            "issn_l": "1234-5678",
+            "issn": ["1234-5678", "8765-4321"],
+            "is_oa": False,
+            "is_in_doaj": False,
+            "host_organization": "https://openalex.org/P4310320990",
+            "host_organization_name": "Elsevier BV",
+            "host_organization_lineage": ["https://openalex.org/P4310320990"],
+            "type": "journal",
+        },
+        "license": "cc-by",
+        "version": "publishedVersion",
+        "is_accepted": True,
+        "is_published": True,
+    }
+
+
+def work(i):
+    return {
+        "id": f"https://openalex.org/W{i}",
+        "doi": f"https://doi.org/10.1234/{i}",
+        "title": f"A study of example number {i} in Zürich",
+        "display_name": f"A study of example number {i} in Zürich",
+        "publication_year": 2020,
+        "publication_date": "2020-05-17",
+        "ids": {"openalex": f"https://openalex.org/W{i}", "mag": str(i)},
+        "language": "en",
+        "primary_location": location(i),
+        "type": "article",
+        "open_access": {"is_oa": True, "oa_status": "gold", "oa_url": None},
+        "authorships": [
+            {
+                "author_position": "first" if a == 0 else "middle",
+                "author": {
+                    "id": f"https://openalex.org/A{i}{a}",
+                    "display_name": f"Author {a}",
+                    "orcid": None,
+                },
+                "institutions": [
+                    {
+                        "id": "https://openalex.org/I136199984",
+                        "display_name": "Harvard University",
+                        "ror": "https://ror.org/03vek6s52",
+                        "country_code": "US",
+                        "type": "education",
+                        "lineage": ["https://openalex.org/I136199984"],
+                    }
+                ],
+                "countries": ["US"],
+                "is_corresponding": a == 0,
+                "raw_author_name": f"Author {a}",
+                "raw_affiliation_strings": ["Harvard University, Cambridge, MA"],
+            }
+            for a in range(8)
+        ],
+        "authorships_truncated": False,
+        "cited_by_count": i % 500,
+        "fwci": 1.25,
+        "biblio": {"volume": "12", "issue": "3", "first_page": "1", "last_page": "9"},
+        "is_retracted": False,
+        "is_paratext": False,
+        "concepts": [
+            {
+                "id": f"https://openalex.org/C{c}",
+                "wikidata": None,
+                "display_name": "Biology",
+                "level": 0,
+                "score": 0.5,
+            }
+            for c in range(10)
+        ],
+        "locations": [location(i), location(i + 1)],
+        "referenced_works": [f"https://openalex.org/W{r}" for r in range(30)],
+        "related_works": [f"https://openalex.org/W{r}" for r in range(10)],
+        "abstract_inverted_index": json.dumps(
+            {
+                "InvertedIndex": {
+                    word: [n] for n, word in enumerate("some words".split())
+                }
+            }
+        ),
+        "counts_by_year": [
+            {"year": year, "cited_by_count": 3} for year in range(2012, 2024)
+        ],
+        "updated_date": "2024-01-01T00:00:00",
+        "created_date": "2020-06-01",
+    }
+
+
+def page(per_page):
+    hits = [
+        {"_index": "works-v24", "_id": str(i), "_score": None, "_source": work(i)}
+        for i in range(per_page)
+    ]
+    raw = {"took": 5, "hits": {"total": {"value": per_page}, "hits": hits}}
+    return {
+        "meta": {"count": per_page, "db_response_time_ms": 5, "page": 1},
+        "results": Response(Search(), raw),
+        "group_by": [],
+    }
+
+
+def marshmallow_render(result, only):
+    return jsonify(MessageSchema(only=only).dump(result)).get_data()
+
+
+def compiled_render(result, only):
+    return serialize(MessageSchema, result, only).get_data()
+
+
+def time_renders(render, result, only, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        render(result, only)
+    return (time.perf_counter() - start) / n
+
+
+def run(per_page=200, n=20):
+    app = create_app("tests.settings")
+    with app.test_request_context("/works"):
+        result = page(per_page)
+        for label, only in SELECTS.items():
+            assert marshmallow_render(result, only) == compiled_render(result, only)
+            before = time_renders(marshmallow_render, result, only, n)
+            after = time_renders(compiled_render, result, only, n)
+            print(f"{per_page} works, {label}")
+            print(f"  marshmallow + jsonify: {before * 1000:.2f} ms/page")
+            print(f"  compiled + orjson:     {after * 1000:.2f} ms/page")
+            print(f"  speedup:               {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    run()
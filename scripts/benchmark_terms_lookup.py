@@ -0,0 +1,83 @@
+"""
+Compare cited_by filters that fetch a work's referenced ids and send them back in a
+terms query against filters that use a terms lookup, on works with 1000+ references.
+
+Needs the elasticsearch cluster in ES_URL. Each work is timed end to end: the old path
+pays the reference fetch plus the search carrying the ids, the new path only the search
+naming the work's document (its location is cached after the first request).
+
+Run from the repo root: python -m scripts.benchmark_terms_lookup --works 20 --n 5
+"""
+import argparse
+import json
+import statistics
+import time
+
+from elasticsearch_dsl import Q, Search
+
+import settings
+from app import create_app
+from core.terms_lookup import resolve_work_locations, terms_lookup_query
+
+
+def works_with_many_references(count, min_references=1000):
+    s = Search(index=settings.WORKS_INDEX)
+    s = s.filter("range", referenced_works_count={"gte": min_references})
+    s = s.source(["id"]).extra(size=count)
+    return [hit.id for hit in s.execute()]
+
+
+def page_search(query):
+    s = Search(index=settings.WORKS_INDEX).filter(query)
+    return s.extra(size=25, track_total_hits=True)
+
+
+def fetched_ids_search(work_id):
+    """The old path: fetch the referenced ids, then search with them."""
+    s = Search(index=settings.WORKS_INDEX).filter("term", id=work_id)
+    response = s.source(["referenced_works"]).extra(size=1).execute()
+    ids = list(response[0].referenced_works) if response else []
+    return page_search(Q("terms", id=ids))
+
+
+def terms_lookup_search(work_id):
+    return page_search(terms_lookup_query("id", work_id, "referenced_works"))
+
+
+def time_search(build, work_id, n):
+    times = []
+    for _ in range(n):
+        start = time.perf_counter()
+        s = build(work_id)
+        s.execute()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), len(json.dumps(s.to_dict()))
+
+
+def run(works=20, n=5):
+    create_app()
+    work_ids = works_with_many_references(works)
+    # locations are cached in production, so locate them outside the timings
+    resolve_work_locations(work_ids)
+    print(f"{len(work_ids)} works with 1000+ references, median of {n} runs each")
+    totals = {"fetched ids": [], "terms lookup": []}
+    for work_id in work_ids:
+        for label, build in [
+            ("fetched ids", fetched_ids_search),
+            ("terms lookup", terms_lookup_search),
+        ]:
+            seconds, body_size = time_search(build, work_id, n)
+            totals[label].append(seconds)
+            print(
+                f"  {work_id} {label}: {seconds * 1000:.1f} ms, {body_size} byte body"
+            )
+    for label, times in totals.items():
+        print(f"{label}: median {statistics.median(times) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--works", type=int, default=20)
+    parser.add_argument("--n", type=int, default=5)
+    args = parser.parse_args()
+    run(args.works, args.n)
@@ -0,0 +1,97 @@
+"""
+Compare merging topic group by buckets that hold the same id in both formats with the
+old list scans against the single pass over canonical ids, on 500 bucket responses.
+
+Needs no elasticsearch: the buckets are made up, with a share of them repeating an id
+in the old integer format.
+
+Run from the repo root: python -m scripts.benchmark_topic_merge --n 200
+"""
+import argparse
+import copy
+import statistics
+import time
+
+from core.topic_ids import merge_topic_results
+
+
+def topic_results(buckets, duplicate_share):
+    """Results as get_result makes them, the duplicates keyed by the bare integer."""
+    duplicates = int(buckets * duplicate_share)
+    unique = buckets - duplicates
+    results = [
+        {
+            "key": f"https://openalex.org/subfields/{1000 + i}",
+            "key_display_name": f"Subfield {i}",
+            "doc_count": buckets - i,
+        }
+        for i in range(unique)
+    ]
+    results += [
+        {"key": str(1000 + i), "key_display_name": f"Subfield {i}", "doc_count": 1}
+        for i in range(duplicates)
+    ]
+    return results
+
+
+def list_scan_merge(group_by_results):
+    """The merge as it was, scanning the results for every result."""
+    entity = "subfields"
+    for group_by_result in group_by_results:
+        if "openalex.org" not in group_by_result["key"]:
+            group_by_result[
+                "key"
+            ] = f"https://openalex.org/{entity}/{group_by_result['key']}"
+    for group_by_result in group_by_results:
+        if (
+            group_by_result["key"] in [item["key"] for item in group_by_results]
+            and group_by_result["key_display_name"]
+        ):
+            group_by_result["doc_count"] = sum(
+                [
+                    item["doc_count"]
+                    for item in group_by_results
+                    if item["key"] == group_by_result["key"]
+                ]
+            )
+            group_by_results = [
+                item
+                for item in group_by_results
+                if item["key"] != group_by_result["key"]
+            ]
+            group_by_results.append(group_by_result)
+    return group_by_results
+
+
+def single_pass_merge(group_by_results):
+    return merge_topic_results(group_by_results, "subfields")
+
+
+def time_ms(function, results, n):
+    times = []
+    for _ in range(n):
+        # the old merge rewrites the results it is given
+        fresh = copy.deepcopy(results)
+        start = time.perf_counter()
+        function(fresh)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def run(n=200, buckets=500):
+    for duplicate_share in [0, 0.1, 0.5]:
+        results = topic_results(buckets, duplicate_share)
+        print(f"{buckets} buckets, {duplicate_share:.0%} in the old format")
+        for label, function in [
+            ("list scans", list_scan_merge),
+            ("single pass", single_pass_merge),
+        ]:
+            print(f"  {label}: {time_ms(function, results, n):.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=200)
+    parser.add_argument("--buckets", type=int, default=500)
+    args = parser.parse_args()
+    run(args.n, args.buckets)
@@ -0,0 +1,54 @@
+"""
+Fill the response cache with the most expensive cacheable requests from an access log,
+for example after a deploy or an index swap. The log is JSON lines with a request_path
+(or path) and, optionally, response_time_ms; paths are ranked by total logged time,
+then by request count. Requests are replayed in this process against the configured
+elasticsearch and cache, and a JSON line is printed for each warmed key.
+
+Run from the repo root: python -m scripts.warm_cache requests.jsonl --top 200
+"""
+import argparse
+import json
+import sys
+
+from app import create_app
+from core.cache_warming import read_request_log, warm_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("log", help="JSON lines request log, or - for stdin")
+    parser.add_argument("--top", type=int, default=100, help="paths to warm")
+    parser.add_argument(
+        "--concurrency", type=int, default=4, help="requests replayed at once"
+    )
+    parser.add_argument(
+        "--only-missing",
+        action="store_true",
+        help="skip paths that are already cached instead of recomputing them",
+    )
+    args = parser.parse_args()
+
+    app = create_app()
+    log = sys.stdin if args.log == "-" else open(args.log)
+    with log:
+        reports = warm_cache(
+            app,
+            list(read_request_log(log)),
+            top=args.top,
+            concurrency=args.concurrency,
+            refresh=not args.only_missing,
+        )
+
+    for report in reports:
+        print(json.dumps(report))
+    computed = [report for report in reports if report["cache_status"] != "cached"]
+    total_ms = sum(report["compute_ms"] for report in computed)
+    print(
+        f"warmed {len(computed)} of {len(reports)} keys in {total_ms} ms of compute",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
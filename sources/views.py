@@ -2,13 +2,15 @@ from flask import Blueprint, jsonify, request
 
 from config.entity_config import entity_configs_dict
 from config.property_config import property_configs_dict
+from core.bulk_export import shared_export_view
 from core.export import export_group_by, is_group_by_export
 from core.filters_view import shared_filter_view
+from core.response_cache import cached_list_view
 from core.schemas import FiltersWrapperSchema
+from core.serialization import serialize
 from core.shared_view import shared_view
-from core.utils import (get_flattened_fields, get_valid_fields, is_cached,
+from core.utils import (get_flattened_fields, get_valid_fields,
                         process_only_fields)
-from extensions import cache
 from settings import SOURCES_INDEX
 from sources.fields import fields_dict
 from sources.schemas import MessageSchema, SourcesSchema
@@ -16,11 +18,9 @@ from sources.schemas import MessageSchema, SourcesSchema
 blueprint = Blueprint("sources", __name__)
 
 
-@blueprint.route("/sources")
-@blueprint.route("/journals", endpoint="journals_view")
-@cache.cached(
-    timeout=24 * 60 * 60, query_string=True, unless=lambda: not is_cached(request)
-)
+@blueprint.route("/sources", methods=["GET", "POST"])
+@blueprint.route("/journals", endpoint="journals_view", methods=["GET", "POST"])
+@cached_list_view(fields_dict)
 def sources():
     index_name = SOURCES_INDEX
     default_sort = ["-works_count", "id"]
@@ -29,8 +29,15 @@ def sources():
     # export option
     if is_group_by_export(request):
         return export_group_by(result, request)
-    message_schema = MessageSchema(only=only_fields)
-    return message_schema.dump(result)
+    return serialize(MessageSchema, result, only_fields)
+
+
+@blueprint.route("/sources/export.jsonl")
+def sources_export():
+    index_name = SOURCES_INDEX
+    return shared_export_view(
+        request, fields_dict, index_name, SourcesSchema, "sources"
+    )
 
 
 @blueprint.route("/sources/filters/<path:params>")
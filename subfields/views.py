@@ -2,18 +2,19 @@ from flask import Blueprint, jsonify, request
 
 from config.entity_config import entity_configs_dict
 from config.property_config import property_configs_dict
+from core.bulk_export import shared_export_view
 from core.export import export_group_by, is_group_by_export
 from core.filters_view import shared_filter_view
 from core.histogram import shared_histogram_view
+from core.response_cache import cached_list_view
 from core.schemas import FiltersWrapperSchema, HistogramWrapperSchema
+from core.serialization import serialize
 from core.shared_view import shared_view
 from core.utils import (
     get_flattened_fields,
     get_valid_fields,
-    is_cached,
     process_only_fields,
 )
-from extensions import cache
 from subfields.fields import fields_dict
 from subfields.schemas import SubfieldsSchema, MessageSchema
 from settings import SUBFIELDS_INDEX
@@ -21,10 +22,8 @@ from settings import SUBFIELDS_INDEX
 blueprint = Blueprint("subfields", __name__)
 
 
-@blueprint.route("/subfields")
-@cache.cached(
-    timeout=24 * 60 * 60, query_string=True, unless=lambda: not is_cached(request)
-)
+@blueprint.route("/subfields", methods=["GET", "POST"])
+@cached_list_view(fields_dict)
 def subfields():
     index_name = SUBFIELDS_INDEX
     default_sort = ["-works_count", "id"]
@@ -33,8 +32,15 @@ def subfields():
     # export option
     if is_group_by_export(request):
         return export_group_by(result, request)
-    message_schema = MessageSchema(only=only_fields)
-    return message_schema.dump(result)
+    return serialize(MessageSchema, result, only_fields)
+
+
+@blueprint.route("/subfields/export.jsonl")
+def subfields_export():
+    index_name = SUBFIELDS_INDEX
+    return shared_export_view(
+        request, fields_dict, index_name, SubfieldsSchema, "subfields"
+    )
 
 
 @blueprint.route("/subfields/filters/<path:params>")
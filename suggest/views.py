@@ -3,7 +3,9 @@ from collections import OrderedDict
 from elasticsearch_dsl import Search
 from flask import Blueprint, request
 
+import settings
 from core.exceptions import APIQueryParamsError
+from core.utils import get_total_count
 from suggest.schemas import SuggestMessageSchema
 
 blueprint = Blueprint("suggest", __name__)
@@ -21,10 +23,10 @@ def suggest():
         s = Search(index="suggest-v3")
         s = s.query("match_phrase_prefix", phrase=q)
         s = s.sort("-count")
-        s = s.extra(size=10)
+        s = s.extra(size=10, track_total_hits=settings.TRACK_TOTAL_HITS)
         response = s.execute()
         result["meta"] = {
-            "count": s.count(),
+            "count": get_total_count(response, s),
             "db_response_time_ms": response.took,
             "page": 1,
             "per_page": 10,
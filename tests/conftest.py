@@ -1,10 +1,202 @@
+import time
+from copy import deepcopy
+
 import pytest
+from elasticsearch_dsl import connections
 
 from app import create_app
+from core.display_name_resolver import display_name_resolver
+from core.group_by.groupby_values import groupby_values
+from core.merged_id_resolver import merged_id_resolver
+from core.plan_cache import plan_cache
+from core.response_cache import response_cache_stats
+from core.terms_lookup import work_locations
+
+
+class FakeApiResponse(dict):
+    """Mimics the elasticsearch client response, which exposes the raw body."""
+
+    @property
+    def body(self):
+        return self
+
+
+def empty_aggregation(agg, filter_counts=None, terms_counts=None):
+    """
+    An aggregation with no buckets, but for keyed filters counted from filter_counts and
+    terms on a field counted from terms_counts[field].
+    """
+    filter_counts = filter_counts or {}
+    terms_counts = terms_counts or {}
+    agg_type = next(key for key in agg if key not in ("aggs", "aggregations"))
+    if agg_type in ("filter", "random_sampler"):
+        result = {"doc_count": 0}
+        if agg_type == "random_sampler":
+            result.update(agg["random_sampler"])
+        for name, sub_agg in agg.get("aggs", {}).items():
+            result[name] = empty_aggregation(sub_agg, filter_counts, terms_counts)
+        return result
+    if agg_type == "terms" and agg["terms"].get("field") in terms_counts:
+        counts = terms_counts[agg["terms"]["field"]]
+        return {
+            "doc_count_error_upper_bound": 0,
+            "sum_other_doc_count": 0,
+            "buckets": [
+                {
+                    "key": key,
+                    "doc_count": count,
+                    **{
+                        name: empty_aggregation(sub_agg, filter_counts, terms_counts)
+                        for name, sub_agg in agg.get("aggs", {}).items()
+                    },
+                }
+                for key, count in counts.items()
+            ],
+        }
+    if agg_type == "filters" and isinstance(agg["filters"]["filters"], dict):
+        return {
+            "buckets": {
+                key: {"doc_count": filter_counts.get(key, 0)}
+                for key in agg["filters"]["filters"]
+            }
+        }
+    if agg_type in ("terms", "composite", "histogram", "filters"):
+        return {"buckets": []}
+    return {"value": 0}
+
+
+class FakeElasticsearch:
+    """
+    Stands in for the elasticsearch client and records every request sent to it.
+    Every search returns the documents in hits, or in index_hits under the longest
+    prefix of its index, after an optional delay in seconds.
+    Searches in a point in time page through hits with size, search_after and slice.
+    Keyed filters aggregations count filter_counts[key] documents in each bucket, and
+    terms aggregations on a field in terms_counts count terms_counts[field][key].
+    """
+
+    def __init__(self, hits=None, delay=0):
+        self.calls = []
+        self.hits = hits or []
+        self.index_hits = {}
+        self.filter_counts = {}
+        self.terms_counts = {}
+        self.delay = delay
+
+    def searches(self):
+        """The searches sent, without the one loading the groupby_values index."""
+        return [
+            call
+            for call in self.calls
+            if call[0] in ("search", "msearch") and "groupby_values" not in str(call[1])
+        ]
+
+    def search_body(self):
+        """The body of the one search sent, without the groupby_values load."""
+        [search] = [call for call in self.searches() if call[0] == "search"]
+        return search[2]
+
+    def hits_for(self, index):
+        names = index if isinstance(index, (list, tuple)) else [index]
+        prefixes = [
+            prefix
+            for prefix in self.index_hits
+            if any(name and name.startswith(prefix) for name in names)
+        ]
+        return self.index_hits[max(prefixes, key=len)] if prefixes else self.hits
+
+    def search_response(self, body, index=None):
+        hits = [
+            {
+                "_index": "fake",
+                "_id": h.get("id"),
+                "_score": 1.0,
+                "_source": deepcopy(h),
+            }
+            for h in self.hits_for(index)
+        ]
+        total = len(hits)
+        if body and "pit" in body:
+            hits = self.pit_page(hits, body)
+        elif body and "sort" in body:
+            hits = [dict(hit, sort=[position]) for position, hit in enumerate(hits)]
+        response = {
+            "took": 1,
+            "timed_out": False,
+            "hits": {
+                "total": {"value": total, "relation": "eq"},
+                "max_score": 1.0,
+                "hits": hits,
+            },
+        }
+        if body and "pit" in body:
+            response["pit_id"] = body["pit"]["id"]
+        aggs = (body or {}).get("aggs")
+        if aggs:
+            response["aggregations"] = {
+                name: empty_aggregation(agg, self.filter_counts, self.terms_counts)
+                for name, agg in aggs.items()
+            }
+        return response
+
+    @staticmethod
+    def pit_page(hits, body):
+        slice_ = body.get("slice", {"id": 0, "max": 1})
+        after = body.get("search_after", [-1])[0]
+        page = []
+        for position, hit in enumerate(hits):
+            if position % slice_["max"] == slice_["id"] and position > after:
+                page.append(dict(hit, sort=[position]))
+        return page[: body.get("size", 10)]
+
+    def search(self, index=None, body=None, **kwargs):
+        self.calls.append(("search", index, body))
+        time.sleep(self.delay)
+        return FakeApiResponse(self.search_response(body, index))
+
+    def count(self, index=None, query=None, **kwargs):
+        self.calls.append(("count", index, query))
+        return FakeApiResponse({"count": len(self.hits_for(index))})
+
+    def open_point_in_time(self, index=None, keep_alive=None, **kwargs):
+        self.calls.append(("open_point_in_time", index, keep_alive))
+        return FakeApiResponse({"id": "fake-pit"})
+
+    def close_point_in_time(self, id=None, **kwargs):
+        self.calls.append(("close_point_in_time", None, id))
+        return FakeApiResponse({"succeeded": True})
+
+    def msearch(self, index=None, body=None, **kwargs):
+        self.calls.append(("msearch", index, body))
+        responses = [
+            self.search_response(b, header.get("index"))
+            for header, b in zip(body[0::2], body[1::2])
+        ]
+        return FakeApiResponse({"responses": responses})
 
 
 @pytest.fixture
 def client():
     app = create_app("tests.settings")
-
+    # plans and cache counters are kept per process, so reset them between tests
+    plan_cache.clear()
+    response_cache_stats.clear()
     yield app.test_client()
+    plan_cache.clear()
+    response_cache_stats.clear()
+
+
+@pytest.fixture
+def fake_es(client):
+    es = FakeElasticsearch()
+    connections.add_connection("default", es)
+    display_name_resolver.clear()
+    merged_id_resolver.clear()
+    work_locations.clear()
+    groupby_values.clear()
+    yield es
+    connections.remove_connection("default")
+    display_name_resolver.clear()
+    merged_id_resolver.clear()
+    work_locations.clear()
+    groupby_values.clear()
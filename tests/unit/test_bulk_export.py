@@ -0,0 +1,89 @@
+"""Streaming exports page through a point in time and match the list API's queries."""
+import json
+
+import pytest
+
+import settings
+
+
+def works(count):
+    return [
+        {
+            "id": f"https://openalex.org/W{i}",
+            "display_name": f"Wörk {i}",
+            "cited_by_count": i,
+        }
+        for i in range(count)
+    ]
+
+
+def read_lines(res):
+    return [json.loads(line) for line in res.get_data().splitlines()]
+
+
+def searches(fake_es):
+    return [call for call in fake_es.calls if call[0] == "search"]
+
+
+@pytest.fixture
+def small_pages(monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_PAGE_SIZE", 3)
+
+
+def test_export_streams_every_record_through_a_pit(client, fake_es, small_pages):
+    fake_es.hits = works(8)
+    res = client.get("/works/export.jsonl?select=id,display_name")
+    assert res.status_code == 200
+    assert res.mimetype == "application/x-ndjson"
+    assert "openalex-works-" in res.headers["Content-Disposition"]
+    assert read_lines(res) == [
+        {"id": f"https://openalex.org/W{i}", "display_name": f"Wörk {i}"}
+        for i in range(8)
+    ]
+    assert fake_es.calls[0] == ("open_point_in_time", settings.WORKS_INDEX, "2m")
+    assert fake_es.calls[-1] == ("close_point_in_time", None, "fake-pit")
+    bodies = [body for _, index, body in searches(fake_es)]
+    assert len(bodies) == 3
+    assert all(body["pit"]["id"] == "fake-pit" and body["size"] == 3 for body in bodies)
+    assert [body.get("search_after") for body in bodies] == [None, [2], [5]]
+    assert all(index is None for _, index, _ in searches(fake_es))
+
+
+def test_export_stops_on_an_exactly_full_last_page(client, fake_es, small_pages):
+    fake_es.hits = works(6)
+    res = client.get("/authors/export.jsonl?select=id")
+    assert len(read_lines(res)) == 6
+    assert len(searches(fake_es)) == 3
+
+
+def test_export_uses_the_list_api_filters_and_search(client, fake_es):
+    args = "filter=publication_year:2020,is_oa:true&search=malaria&sort=cited_by_count:desc"
+    client.get(f"/works?{args}")
+    list_body = fake_es.calls[0][2]
+    fake_es.calls.clear()
+
+    client.get(f"/works/export.jsonl?{args}").get_data()
+    export_body = searches(fake_es)[0][2]
+    assert export_body["query"] == list_body["query"]
+    assert export_body["sort"] == [{"cited_by_count": {"order": "desc"}}, "_shard_doc"]
+    assert export_body["_source"] == list_body["_source"]
+
+
+def test_export_slices_are_read_in_parallel(client, fake_es, small_pages):
+    fake_es.hits = works(20)
+    res = client.get("/works/export.jsonl?select=id&slices=3")
+    ids = [line["id"] for line in read_lines(res)]
+    assert sorted(ids) == sorted(work["id"] for work in works(20))
+    slices = {body["slice"]["id"] for _, _, body in searches(fake_es)}
+    assert slices == {0, 1, 2}
+    assert fake_es.calls[-1][0] == "close_point_in_time"
+
+
+@pytest.mark.parametrize(
+    "args",
+    ["page=2", "group_by=type", "slices=0", "slices=100", "select=not_a_field"],
+)
+def test_export_rejects_invalid_params(client, fake_es, args):
+    res = client.get(f"/works/export.jsonl?{args}")
+    assert res.status_code == 403
+    assert fake_es.calls == []
@@ -0,0 +1,100 @@
+"""The cache warmer replays the costliest logged requests in process."""
+import json
+
+import pytest
+
+from core.cache_warming import rank_paths, read_request_log, warm_cache
+from core.response_cache import response_cache_stats
+from extensions import cache
+
+
+@pytest.fixture
+def cached_client(client):
+    app = client.application
+    app.config["CACHE_TYPE"] = "SimpleCache"
+    cache.init_app(app)
+    response_cache_stats.clear()
+    yield client
+    response_cache_stats.clear()
+
+
+def log_lines(*records):
+    return [json.dumps(record) for record in records]
+
+
+def test_reads_paths_and_costs():
+    lines = log_lines(
+        {"request_path": "/works?group_by=type", "response_time_ms": 1200},
+        {"path": "https://api.openalex.org/authors?filter=x:1"},
+        {"status": 200},
+    ) + ["", "not json"]
+    assert list(read_request_log(lines)) == [
+        ("/works?group_by=type", 1200),
+        ("/authors?filter=x:1", None),
+    ]
+
+
+def test_ranks_by_cost_then_count_and_merges_equivalent_paths(client):
+    requests = [
+        ("/works?group_by=type", 3000),
+        ("/works?group-by=type&mailto=me@example.com", 2000),
+        ("/authors?filter=has_orcid:true", 100),
+        ("/authors?filter=has_orcid:true", 100),
+        ("/works?filter=is_oa:true", None),
+        ("/works?filter=is_oa:true", None),
+        ("/works?filter=is_oa:true", None),
+        ("/sources?filter=is_oa:true", None),
+        # never cached
+        ("/works?cursor=*", 5000),
+        ("/works/W1", 5000),
+        ("/nowhere", 5000),
+    ]
+    ranked = rank_paths(client.application, requests)
+    assert [(hot.path, hot.requests, hot.cost_ms) for hot in ranked] == [
+        ("/works?group_by=type", 2, 5000),
+        ("/authors?filter=has_orcid:true", 2, 200),
+        ("/works?filter=is_oa:true", 3, 0),
+        ("/sources?filter=is_oa:true", 1, 0),
+    ]
+
+
+def test_warms_the_top_paths_into_the_cache(cached_client, fake_es):
+    app = cached_client.application
+    requests = [("/works?filter=is_oa:true", 900), ("/authors?filter=x:1", 10)]
+    reports = warm_cache(app, requests, top=1)
+    (report,) = reports
+    assert report["path"] == "/works?filter=is_oa:true"
+    assert report["cache_status"] == "miss"
+    assert report["status_code"] == 200
+    assert report["compute_ms"] >= 0
+    assert len(fake_es.calls) == 1
+
+    res = cached_client.get("/works?filter=is_oa:true")
+    assert res.headers["X-Response-Cache"] == "hit"
+
+    # warming again recomputes, unless only missing keys are wanted
+    warm_cache(app, requests, top=1)
+    assert len(fake_es.calls) == 2
+    (report,) = warm_cache(app, requests, top=1, refresh=False)
+    assert report["cache_status"] == "cached"
+    assert len(fake_es.calls) == 2
+
+
+def test_warming_overwrites_the_entry_readers_are_served(cached_client, fake_es):
+    app = cached_client.application
+    requests = [("/works?filter=is_oa:true", 900)]
+    warm_cache(app, requests, top=1)
+    (hot_path,) = rank_paths(app, requests)
+    search = fake_es.search
+    entries_during_recompute = []
+
+    def search_while_cached(*args, **kwargs):
+        entries_during_recompute.append(cache.get(hot_path.cache_key))
+        return search(*args, **kwargs)
+
+    fake_es.search = search_while_cached
+    (report,) = warm_cache(app, requests, top=1)
+    assert report["cache_status"] == "miss"
+    assert entries_during_recompute and entries_during_recompute[0] is not None
+    res = cached_client.get("/works?filter=is_oa:true")
+    assert res.headers["X-Response-Cache"] == "hit"
@@ -0,0 +1,118 @@
+"""Cursor pagination reads every page of a walk from one point in time."""
+from elasticsearch import NotFoundError
+
+from core.cursor import decode_pit_cursor, encode_cursor, encode_pit_cursor
+
+
+def works(count):
+    return [{"id": f"https://openalex.org/W{i}"} for i in range(count)]
+
+
+def searches(fake_es):
+    return [call for call in fake_es.calls if call[0] == "search"]
+
+
+def test_pit_cursor_round_trip():
+    search_after = [12.5, "https://openalex.org/W1", 7]
+    cursor = encode_pit_cursor("a+b/c==", search_after, 99)
+    assert cursor.startswith("pit.")
+    assert "+" not in cursor and "/" not in cursor and "=" not in cursor
+    assert decode_pit_cursor(cursor) == ("a+b/c==", search_after, 99)
+
+
+def test_cursor_walk_is_stable_across_many_pages(client, fake_es):
+    fake_es.hits = works(250)
+    seen = []
+    cursor = "*"
+    pages = 0
+    while cursor:
+        res = client.get(f"/works?select=id&per-page=2&cursor={cursor}")
+        assert res.status_code == 200
+        meta = res.get_json()["meta"]
+        assert meta["count"] == 250
+        seen.extend(work["id"] for work in res.get_json()["results"])
+        cursor = meta["next_cursor"]
+        pages += 1
+
+    assert pages == 126
+    assert seen == [work["id"] for work in works(250)]
+    opened = [call for call in fake_es.calls if call[0] == "open_point_in_time"]
+    assert len(opened) == 1
+    assert fake_es.calls[-1] == ("close_point_in_time", None, "fake-pit")
+
+    bodies = [body for _, index, body in searches(fake_es)]
+    assert all(index is None for _, index, _ in searches(fake_es))
+    assert all(body["pit"]["id"] == "fake-pit" for body in bodies)
+    assert all(body["sort"][-1] == "_shard_doc" for body in bodies)
+    # only the first page counts the total
+    assert bodies[0]["track_total_hits"] is True
+    assert all(body["track_total_hits"] is False for body in bodies[1:])
+
+
+def test_first_page_keeps_its_point_in_time_briefly(client, fake_es):
+    fake_es.hits = works(10)
+    res = client.get("/works?per-page=2&cursor=*")
+    cursor = res.get_json()["meta"]["next_cursor"]
+    client.get(f"/works?per-page=2&cursor={cursor}")
+    assert fake_es.calls[0] == (
+        "open_point_in_time",
+        "works-v24-*,-*invalid-data",
+        "1m",
+    )
+    first, second = [body["pit"]["keep_alive"] for _, _, body in searches(fake_es)]
+    assert (first, second) == ("1m", "5m")
+
+
+def test_page_that_is_not_full_closes_the_point_in_time(client, fake_es):
+    fake_es.hits = works(3)
+    res = client.get("/works?per-page=5&cursor=*")
+    assert len(res.get_json()["results"]) == 3
+    assert res.get_json()["meta"]["next_cursor"] is None
+    assert fake_es.calls[-1] == ("close_point_in_time", None, "fake-pit")
+
+
+def test_cursor_pages_share_a_query_plan(client, fake_es):
+    fake_es.hits = works(10)
+    res = client.get("/works?filter=is_oa:true&per-page=2&cursor=*")
+    cursor = res.get_json()["meta"]["next_cursor"]
+    res = client.get(f"/works?filter=is_oa:true&per-page=2&cursor={cursor}")
+    assert res.headers["X-Query-Plan-Cache"] == "hit"
+    assert searches(fake_es)[1][2]["search_after"] == [1]
+
+
+def test_old_cursors_page_without_a_point_in_time(client, fake_es):
+    fake_es.hits = works(3)
+    cursor = encode_cursor([100, "https://openalex.org/W5"])
+    res = client.get(f"/works?per-page=2&cursor={cursor}")
+    assert res.status_code == 200
+    ((_, index, body),) = searches(fake_es)
+    assert index is not None
+    assert "pit" not in body
+    assert body["search_after"] == [100, "https://openalex.org/W5"]
+    assert not res.get_json()["meta"]["next_cursor"].startswith("pit.")
+
+
+def test_expired_point_in_time_falls_back_to_search_after(client, fake_es):
+    fake_es.hits = works(3)
+    search = fake_es.search
+
+    def expire_pit(index=None, body=None, **kwargs):
+        if "pit" in body:
+            fake_es.calls.append(("search", index, body))
+            raise NotFoundError("search_context_missing_exception", None, {})
+        return search(index=index, body=body, **kwargs)
+
+    fake_es.search = expire_pit
+    cursor = encode_pit_cursor("expired", [100, "https://openalex.org/W5", 42], 3)
+    res = client.get(f"/works?per-page=2&cursor={cursor}")
+    assert res.status_code == 200
+    retry_index, retry_body = searches(fake_es)[1][1:]
+    assert retry_index is not None
+    assert "pit" not in retry_body
+    assert retry_body["search_after"] == [100, "https://openalex.org/W5"]
+    assert not res.get_json()["meta"]["next_cursor"].startswith("pit.")
+
+
+def test_invalid_pit_cursor(client, fake_es):
+    res = client.get("/works?cursor=pit.notbase64json")
+    assert res.status_code == 403
@@ -0,0 +1,100 @@
+"""Continent and version group bys come from one filters aggregation on the search."""
+import pytest
+
+
+def test_continents_in_one_search(client, fake_es):
+    fake_es.filter_counts = {"Europe": 30, "Asia": 50, "Africa": 5, "unknown": 7}
+    res = client.get("/works?group_by=institutions.continent&filter=is_oa:true")
+    assert res.status_code == 200
+    [search] = fake_es.searches()
+    assert search[0] == "search"
+    filters = search[2]["aggs"]["groupby_institutions_continent"]["filters"]["filters"]
+    assert list(filters) == [
+        "Africa",
+        "Antarctica",
+        "Asia",
+        "Europe",
+        "North America",
+        "Oceania",
+        "South America",
+        "unknown",
+    ]
+    groups = res.get_json()["group_by"]
+    assert [(g["key"], g["key_display_name"], g["count"]) for g in groups] == [
+        ("Q48", "Asia", 50),
+        ("Q46", "Europe", 30),
+        ("unknown", "unknown", 7),
+        ("Q15", "Africa", 5),
+        ("Q51", "Antarctica", 0),
+        ("Q49", "North America", 0),
+        ("Q55643", "Oceania", 0),
+        ("Q18", "South America", 0),
+    ]
+    assert res.get_json()["meta"]["groups_count"] == 3
+
+
+def test_continent_q_narrows_groups(client, fake_es):
+    fake_es.filter_counts = {"North America": 12, "South America": 4, "unknown": 3}
+    res = client.get("/works?group_by=institutions.continent&q=america")
+    groups = res.get_json()["group_by"]
+    assert [(g["key_display_name"], g["count"]) for g in groups] == [
+        ("North America", 12),
+        ("South America", 4),
+    ]
+
+
+def test_version_q_narrows_count_not_buckets(client, fake_es):
+    fake_es.filter_counts = {"publishedVersion": 8, "acceptedVersion": 1}
+    res = client.get("/works?group_by=version&q=pub")
+    assert [g["key"] for g in res.get_json()["group_by"]] == ["publishedVersion"]
+    [search] = fake_es.searches()
+    assert search[2]["post_filter"] == {"prefix": {"locations.version": "pub"}}
+    assert "query" not in search[2]
+
+
+@pytest.mark.parametrize(
+    "group_by, expected",
+    [
+        (
+            "version",
+            [("publishedVersion", 8), ("submittedVersion", 3), ("acceptedVersion", 1)],
+        ),
+        (
+            "version:include_unknown",
+            [
+                ("unknown", 20),
+                ("publishedVersion", 8),
+                ("submittedVersion", 3),
+                ("acceptedVersion", 1),
+            ],
+        ),
+    ],
+)
+def test_versions_in_one_search(client, fake_es, group_by, expected):
+    fake_es.filter_counts = {
+        "null": 20,
+        "publishedVersion": 8,
+        "acceptedVersion": 1,
+        "submittedVersion": 3,
+    }
+    res = client.get(f"/works?group_by={group_by}")
+    assert len(fake_es.searches()) == 1
+    groups = res.get_json()["group_by"]
+    assert [(g["key"], g["count"]) for g in groups] == expected
+    assert all(g["key"] == g["key_display_name"] for g in groups)
+
+
+def test_best_open_versions_in_one_search(client, fake_es):
+    fake_es.filter_counts = {"any": 9, "acceptedOrPublished": 6, "published": 4}
+    res = client.get("/works?group_by=best_open_version")
+    [search] = fake_es.searches()
+    filters = search[2]["aggs"]["groupby_best_open_version"]["filters"]["filters"]
+    assert filters["acceptedOrPublished"] == {
+        "terms": {"best_oa_location.version": ["acceptedVersion", "publishedVersion"]}
+    }
+    groups = res.get_json()["group_by"]
+    assert [(g["key"], g["count"]) for g in groups] == [
+        ("any", 9),
+        ("acceptedOrPublished", 6),
+        ("published", 4),
+    ]
@@ -0,0 +1,150 @@
+import redis
+
+from core.display_name_resolver import DisplayNameResolver
+from core.group_by.display_names import get_display_name_mapping
+
+AUTHOR_ID = "https://openalex.org/A5023888391"
+MISSING_AUTHOR_ID = "https://openalex.org/A5000000001"
+INSTITUTION_ID = "https://openalex.org/I136199984"
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.mget_calls = 0
+
+    def mget(self, keys):
+        self.mget_calls += 1
+        return [self.values.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+        self.commands = []
+
+    def setex(self, key, ttl, value):
+        self.commands.append((key, value))
+
+    def execute(self):
+        self.redis_client.values.update(self.commands)
+
+
+class BrokenRedis:
+    def mget(self, keys):
+        raise redis.ConnectionError("redis is down")
+
+    def pipeline(self, transaction=True):
+        raise redis.ConnectionError("redis is down")
+
+
+def test_resolver_caches_names_in_process(fake_es):
+    fake_es.hits = [{"id": AUTHOR_ID, "display_name": "Ada Lovelace"}]
+    resolver = DisplayNameResolver(100, 60)
+
+    ids = {"authors-v13": [AUTHOR_ID, MISSING_AUTHOR_ID]}
+    assert resolver.resolve(ids) == {AUTHOR_ID: "Ada Lovelace"}
+    assert resolver.resolve(ids) == {AUTHOR_ID: "Ada Lovelace"}
+
+    # unknown ids are cached too, so the second call does not reach elastic
+    assert len(fake_es.calls) == 1
+    assert resolver.stats()["hits"] == 2
+
+
+def test_resolver_fetches_all_indexes_in_one_msearch(fake_es):
+    resolver = DisplayNameResolver(100, 60)
+    resolver.resolve({"authors-v13": [AUTHOR_ID], "institutions-v8": [INSTITUTION_ID]})
+    assert len(fake_es.calls) == 1
+    method, _, body = fake_es.calls[0]
+    assert method == "msearch"
+    searches = {
+        header["index"][0]: search for header, search in zip(body[0::2], body[1::2])
+    }
+    assert sorted(searches) == ["authors-v13", "institutions-v8"]
+    assert searches["authors-v13"]["query"]["bool"]["filter"] == [
+        {"terms": {"id": [AUTHOR_ID]}}
+    ]
+
+
+def test_resolver_shares_names_through_redis(fake_es):
+    fake_es.hits = [{"id": AUTHOR_ID, "display_name": "Ada Lovelace"}]
+    redis_client = FakeRedis()
+    DisplayNameResolver(100, 60, redis_client).resolve({"authors-v13": [AUTHOR_ID]})
+
+    # another worker finds the name in redis
+    other_worker = DisplayNameResolver(100, 60, redis_client)
+    assert other_worker.resolve({"authors-v13": [AUTHOR_ID]}) == {
+        AUTHOR_ID: "Ada Lovelace"
+    }
+    assert len(fake_es.calls) == 1
+    assert other_worker.stats()["redis_hits"] == 1
+
+
+def test_new_index_version_is_not_served_old_names(fake_es):
+    fake_es.hits = [{"id": AUTHOR_ID, "display_name": "Ada Lovelace"}]
+    redis_client = FakeRedis()
+    resolver = DisplayNameResolver(100, 60, redis_client)
+    resolver.resolve({"authors-v13": [AUTHOR_ID]})
+
+    fake_es.hits = [{"id": AUTHOR_ID, "display_name": "Augusta Ada King"}]
+    assert resolver.resolve({"authors-v14": [AUTHOR_ID]}) == {
+        AUTHOR_ID: "Augusta Ada King"
+    }
+    assert len(fake_es.calls) == 2
+
+
+def test_expired_names_are_fetched_again(fake_es):
+    fake_es.hits = [{"id": AUTHOR_ID, "display_name": "Ada Lovelace"}]
+    resolver = DisplayNameResolver(100, 0)
+    resolver.resolve({"authors-v13": [AUTHOR_ID]})
+    resolver.resolve({"authors-v13": [AUTHOR_ID]})
+    assert len(fake_es.calls) == 2
+
+
+def test_resolver_falls_back_to_elastic_when_redis_is_down(fake_es):
+    fake_es.hits = [{"id": AUTHOR_ID, "display_name": "Ada Lovelace"}]
+    resolver = DisplayNameResolver(100, 60, BrokenRedis())
+    assert resolver.resolve({"authors-v13": [AUTHOR_ID]}) == {AUTHOR_ID: "Ada Lovelace"}
+
+
+def test_filters_view_resolves_display_names_in_one_lookup(client, fake_es):
+    fake_es.hits = [
+        {"id": AUTHOR_ID, "display_name": "Ada Lovelace"},
+        {"id": INSTITUTION_ID, "display_name": "University of Oxford"},
+    ]
+    res = client.get(
+        "/works/filters/authorships.author.id:A5023888391|A5000000001,"
+        "authorships.institutions.id:I136199984"
+    )
+    assert res.status_code == 200
+    display_names = {
+        value["value"]: value["display_name"]
+        for meta in res.get_json()["filters"]
+        for value in meta["values"]
+    }
+    assert display_names == {
+        "A5023888391": "Ada Lovelace",
+        "A5000000001": None,
+        "I136199984": "University of Oxford",
+    }
+    # one msearch for the counts, one for the display names
+    assert len(fake_es.calls) == 2
+
+
+def test_group_by_display_names_are_cached(client, fake_es):
+    fake_es.hits = [
+        {"id": INSTITUTION_ID, "display_name": "University of Oxford"},
+        {"id": "https://openalex.org/P4310320990", "display_name": "Elsevier"},
+    ]
+    keys = [INSTITUTION_ID, "https://openalex.org/P4310320990"]
+    expected = {
+        INSTITUTION_ID: "University of Oxford",
+        "https://openalex.org/P4310320990": "Elsevier",
+    }
+    group_by = "primary_location.source.host_organization"
+    assert get_display_name_mapping(keys, group_by) == expected
+    assert get_display_name_mapping(keys, group_by) == expected
+    assert len(fake_es.calls) == 1
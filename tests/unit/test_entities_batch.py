@@ -0,0 +1,139 @@
+"""POST /entities/batch looks up mixed ids with one msearch."""
+import pytest
+
+from core.merged_id_resolver import merged_id_resolver
+
+
+def record(full_id, **fields):
+    return dict({"id": full_id, "display_name": f"name of {full_id}"}, **fields)
+
+
+def terms_ids(search):
+    return search["query"]["bool"]["filter"][0]["terms"]["id"]
+
+
+def msearch_calls(fake_es):
+    return [call for call in fake_es.calls if call[0] == "msearch"]
+
+
+def test_mixed_ids_take_one_msearch(client, fake_es):
+    fake_es.index_hits = {
+        "works": [
+            record("https://openalex.org/W11"),
+            record("https://openalex.org/W22"),
+        ],
+        "authors": [record("https://openalex.org/A11")],
+    }
+    ids = ["W11", "https://openalex.org/W22", "a11"]
+    res = client.post("/entities/batch?select=id,display_name", json={"ids": ids})
+    assert res.status_code == 200
+    body = res.get_json()
+    assert body["meta"] == {"count": 3, "requested": 3, "merged_ids": {}}
+    assert body["results"] == {
+        "W11": record("https://openalex.org/W11"),
+        "https://openalex.org/W22": record("https://openalex.org/W22"),
+        "a11": record("https://openalex.org/A11"),
+    }
+    assert [call[0] for call in fake_es.calls] == ["msearch"]
+    searches = fake_es.calls[0][2][1::2]
+    assert [terms_ids(search) for search in searches] == [
+        ["https://openalex.org/A11"],
+        ["https://openalex.org/W11", "https://openalex.org/W22"],
+    ]
+
+
+def test_matches_the_single_record_view(client, fake_es):
+    work = record(
+        "https://openalex.org/W11",
+        ids={"openalex": "https://openalex.org/W11"},
+        authorships=[],
+        authorships_truncated=False,
+        authorships_full=[{"author_position": "first", "author": {"id": "A11"}}],
+        cited_by_count=3,
+    )
+    fake_es.hits = [work]
+    single = client.get("/works/W11").get_json()
+    res = client.post("/entities/batch", json={"ids": ["W11"]})
+    assert res.get_json()["results"]["W11"] == single
+
+
+def test_works_are_fetched_without_fields_no_schema_outputs(client, fake_es):
+    client.post("/entities/batch", json={"ids": ["W11", "A11"]})
+    authors, works = fake_es.calls[0][2][1::2]
+    assert "_source" not in authors
+    assert works["_source"] == {
+        "excludes": ["embeddings", "fulltext", "vector_embedding"]
+    }
+
+
+def test_missing_and_merged_ids(client, fake_es):
+    msearch = fake_es.msearch
+
+    def merged_record_after_lookup(*args, **kwargs):
+        response = msearch(*args, **kwargs)
+        # the fake ignores the query, so only the merged record's fetch returns it
+        fake_es.index_hits["works"] = [record("https://openalex.org/W22")]
+        return response
+
+    fake_es.msearch = merged_record_after_lookup
+    fake_es.index_hits = {
+        "works": [],
+        "merge-works": [
+            {
+                "id": "https://openalex.org/W11",
+                "merge_into_id": "https://openalex.org/W22",
+            }
+        ],
+        "merge-authors": [],
+    }
+    ids = ["W11", "A11"]
+    res = client.post("/entities/batch?select=id", json={"ids": ids})
+    body = res.get_json()
+    assert body["results"] == {
+        "W11": {"id": "https://openalex.org/W22"},
+        "A11": None,
+    }
+    assert body["meta"]["merged_ids"] == {"W11": "https://openalex.org/W22"}
+    assert body["meta"]["count"] == 1
+    # lookups, then the merge indexes, then the records merged into
+    assert [call[0] for call in fake_es.calls] == ["msearch"] * 3
+
+    fake_es.index_hits["works"] = []
+    client.post("/entities/batch?select=id", json={"ids": ids})
+    assert len(msearch_calls(fake_es)) == 5
+    assert merged_id_resolver.stats()["hits"] == 2
+
+
+def test_large_batches_are_chunked(client, fake_es):
+    ids = [f"W{i}" for i in range(100, 1300)]
+    res = client.post("/entities/batch?select=id", json={"ids": ids})
+    assert res.status_code == 200
+    (lookups, _) = msearch_calls(fake_es)
+    assert [len(terms_ids(search)) for search in lookups[2][1::2]] == [500, 500, 200]
+
+
+@pytest.mark.parametrize(
+    "body",
+    [None, {"ids": "W11"}, {"ids": [1]}, {"ids": ["W11", "V123"]}, {"ids": ["nope"]}],
+)
+def test_invalid_batches(client, fake_es, body):
+    res = client.post("/entities/batch", json=body)
+    assert res.status_code == 403
+    assert fake_es.calls == []
+
+
+def test_select_must_suit_every_entity_type(client, fake_es):
+    res = client.post(
+        "/entities/batch?select=id,publication_year", json={"ids": ["W11", "A11"]}
+    )
+    assert res.status_code == 403
+    res = client.post(
+        "/entities/batch?select=id,publication_year", json={"ids": ["W11"]}
+    )
+    assert res.status_code == 200
+
+
+def test_batch_size_is_limited(client, fake_es, monkeypatch):
+    monkeypatch.setattr("settings.ENTITY_BATCH_MAX_IDS", 2)
+    res = client.post("/entities/batch", json={"ids": ["W11", "W22", "W3"]})
+    assert res.status_code == 403
@@ -0,0 +1,66 @@
+"""Each endpoint should reach elasticsearch the expected number of times."""
+
+
+def test_works_list_single_search(client, fake_es):
+    res = client.get("/works?filter=publication_year:2020")
+    assert res.status_code == 200
+    assert res.get_json()["meta"]["count"] == 0
+    assert len(fake_es.calls) == 1
+    assert fake_es.calls[0][2]["track_total_hits"] is True
+
+
+def test_works_sample_single_search(client, fake_es):
+    fake_es.hits = [{"id": "https://openalex.org/W1"}]
+    res = client.get("/works?sample=5&select=id")
+    assert res.status_code == 200
+    assert res.get_json()["meta"]["count"] == 1
+    assert len(fake_es.calls) == 1
+
+
+def test_count_falls_back_when_total_is_lower_bound(client, fake_es):
+    search_response = fake_es.search_response
+
+    def lower_bound_response(body, index=None):
+        response = search_response(body, index)
+        response["hits"]["total"]["relation"] = "gte"
+        return response
+
+    fake_es.search_response = lower_bound_response
+    res = client.get("/authors")
+    assert res.status_code == 200
+    assert [call[0] for call in fake_es.calls] == ["search", "count"]
+
+
+def test_autocomplete_single_search(client, fake_es):
+    res = client.get("/autocomplete?q=university")
+    assert res.status_code == 200
+    assert len(fake_es.calls) == 1
+
+
+def test_entity_autocomplete_single_search(client, fake_es):
+    res = client.get("/autocomplete/institutions?q=university")
+    assert res.status_code == 200
+    assert len(fake_es.calls) == 1
+
+
+def test_suggest_single_search(client, fake_es):
+    res = client.get("/suggest?q=training")
+    assert res.status_code == 200
+    assert len(fake_es.calls) == 1
+
+
+def test_id_get_hit_single_search(client, fake_es):
+    fake_es.hits = [{"id": "https://openalex.org/I136199984"}]
+    res = client.get("/institutions/I136199984?select=id")
+    assert res.status_code == 200
+    assert res.get_json()["id"] == "https://openalex.org/I136199984"
+    assert len(fake_es.calls) == 1
+
+
+def test_id_get_miss_checks_merged_once(client, fake_es):
+    res = client.get("/institutions/I136199984")
+    assert res.status_code == 404
+    (_, index, _), (call_type, _, body) = fake_es.calls
+    assert index == ["institutions-v8"]
+    assert call_type == "msearch"
+    assert body[0]["index"] == ["merge-institutions"]
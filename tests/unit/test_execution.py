@@ -0,0 +1,40 @@
+import time
+
+import pytest
+
+from core.exceptions import APITimeoutError
+from core.execution import parallel_map
+
+
+def slow_double(x):
+    time.sleep(0.2)
+    return x * 2
+
+
+def test_parallel_map_keeps_order_and_runs_concurrently():
+    start = time.perf_counter()
+    assert parallel_map(slow_double, [1, 2, 3, 4]) == [2, 4, 6, 8]
+    assert time.perf_counter() - start < 0.6
+
+
+def test_parallel_map_timeout():
+    with pytest.raises(APITimeoutError):
+        parallel_map(slow_double, [1, 2], timeout=0.05)
+
+
+def test_parallel_map_nested_calls_run_inline():
+    assert parallel_map(lambda x: parallel_map(slow_double, [x, x]), [1, 2]) == [
+        [2, 2],
+        [4, 4],
+    ]
+
+
+def test_group_bys_format_in_parallel(client, fake_es):
+    fake_es.delay = 0.3
+    start = time.perf_counter()
+    res = client.get("/works?group_bys=type,oa_status,language")
+    elapsed = time.perf_counter() - start
+    assert res.status_code == 200
+    # the main search and the one-time groupby_values load
+    assert len(fake_es.calls) == 2
+    assert elapsed < 0.9
@@ -0,0 +1,106 @@
+"""The filter param is parsed once per string into clauses, with the old errors."""
+import pytest
+from elasticsearch_dsl import Search
+
+from core.exceptions import APIQueryParamsError
+from core.filter import filter_records
+from core.filter_parser import FilterClause, parse_clause, parse_filter
+from core.utils import map_filter_params
+from works.fields import fields_dict
+
+
+def split_filter_params(filter_params):
+    """map_filter_params as it was, splitting on commas and colons."""
+    results = []
+    for param in filter_params.split(","):
+        key, value = param.split(":", 1)
+        results.append({key.replace("-", "_"): value})
+    return results
+
+
+@pytest.mark.parametrize(
+    "filter_string",
+    [
+        "publication_year:2020",
+        "publication-year:2020,is_oa:true",
+        "doi:https://doi.org/10.1234/a:b,type:article",
+        "concepts.id:!C11|C12,authorships.institutions.id:I11 I12",
+        "title.search:malaria vaccine,display_name.search:a|b",
+        ":empty-key,empty-value:",
+    ],
+)
+def test_same_clauses_as_splitting(filter_string):
+    assert map_filter_params(filter_string) == split_filter_params(filter_string)
+
+
+@pytest.mark.parametrize(
+    "filter_string, bad_param",
+    [("publication_year", "publication_year"), ("is_oa:true,", ""), ("a:b,c,d:e", "c")],
+)
+def test_invalid_params_keep_their_error(filter_string, bad_param):
+    with pytest.raises(APIQueryParamsError) as error:
+        map_filter_params(filter_string)
+    assert str(error.value) == f"Invalid query parameter in {bad_param}."
+
+
+def test_clauses_hold_their_parts():
+    [negated_or, and_values, plain] = parse_filter(
+        "concepts.id:!C11|C12,institutions.id:I11 I12,is_oa:true"
+    )
+    assert negated_or == FilterClause(
+        "concepts.id", "!C11|C12", ("!C11", "C12"), None, True
+    )
+    assert and_values.and_values == ("I11", "I12") and and_values.or_values is None
+    assert plain == FilterClause("is_oa", "true", None, None, False)
+
+
+def test_parses_are_cached():
+    filter_string = "publication_year:2021,type:book|article"
+    first = parse_filter(filter_string)
+    hits = parse_filter.cache_info().hits
+    assert parse_filter(filter_string) is first
+    assert parse_filter.cache_info().hits == hits + 1
+    assert parse_clause("type", "book|article") is first[1]
+
+
+def test_results_are_fresh_lists():
+    # views append to the filters they are given
+    filters = map_filter_params("is_oa:true")
+    filters.append({"search": "x"})
+    assert map_filter_params("is_oa:true") == [{"is_oa": "true"}]
+
+
+@pytest.mark.parametrize(
+    "filter_string, message",
+    [
+        (
+            "institutions.country_code:gb|type:article",
+            "It looks like you're trying to do an OR query between filters",
+        ),
+        (
+            "concepts.id:C11|!C12",
+            "The ! operator can only be used at the beginning of an OR query",
+        ),
+        (
+            "concepts.id:" + "|".join(f"C{i}" for i in range(10, 111)),
+            "Maximum number of values exceeded for concepts.id.",
+        ),
+        ("not_a_field:1", "not_a_field is not a valid field."),
+    ],
+)
+def test_filter_errors_are_unchanged(filter_string, message):
+    with pytest.raises(APIQueryParamsError) as error:
+        filter_records(fields_dict, map_filter_params(filter_string), Search())
+    assert str(error.value).startswith(message)
+
+
+def test_spaces_only_split_fields_that_take_lists():
+    s = filter_records(
+        fields_dict,
+        map_filter_params("title.search:malaria vaccine,concepts.id:C11 C12"),
+        Search(),
+    )
+    body = s.to_dict()["query"]["bool"]
+    assert len(body["must"]) == 1
+    [and_query] = body["filter"]
+    assert len(and_query["bool"]["must"]) == 2
@@ -0,0 +1,117 @@
+"""metrics=sum(cited_by_count),... are computed within each group of a group by."""
+import pytest
+
+from core.exceptions import APIQueryParamsError
+from core.group_by.metrics import Metric, parse_metrics
+from works.fields import fields_dict
+
+METRICS = "sum(cited_by_count),avg(fwci),cardinality(authorships.author.id)"
+
+
+def test_parse_metrics():
+    assert parse_metrics(METRICS, fields_dict) == [
+        Metric("sum(cited_by_count)", "sum", "cited_by_count"),
+        Metric("avg(fwci)", "avg", "fwci"),
+        Metric(
+            "cardinality(authorships.author.id)",
+            "cardinality",
+            "authorships.author.id",
+        ),
+    ]
+
+
+@pytest.mark.parametrize(
+    "metrics, message",
+    [
+        ("sum(cited_by_count", "Invalid metric"),
+        ("sum(cited_by_count)avg(fwci)", "Separate metrics with a comma"),
+        ("median(fwci)", "median is not a valid metric"),
+        ("sum(type)", "sum needs a number field"),
+        ("cardinality(not_a_field)", "not_a_field is not a valid field"),
+        (",".join(["sum(fwci)"] * 6), "at most 5 metrics"),
+    ],
+)
+def test_invalid_metrics(metrics, message):
+    with pytest.raises(APIQueryParamsError) as error:
+        parse_metrics(metrics, fields_dict)
+    assert message in str(error.value)
+
+
+def test_metrics_on_each_terms_bucket(client, fake_es):
+    fake_es.terms_counts = {"type": {"article": 6, "book": 2}}
+    res = client.get(f"/works?group_by=type&metrics={METRICS}")
+    assert res.status_code == 200
+    aggs = fake_es.search_body()["aggs"]["groupby_type"]["aggs"]
+    assert aggs == {
+        "sum(cited_by_count)": {"sum": {"field": "cited_by_count"}},
+        "avg(fwci)": {"avg": {"field": "fwci"}},
+        "cardinality(authorships.author.id)": {
+            "cardinality": {"field": "authorships.author.id"}
+        },
+    }
+    article = res.get_json()["group_by"][0]
+    assert article["count"] == 6
+    assert article["metrics"] == {
+        "sum(cited_by_count)": 0,
+        "avg(fwci)": 0,
+        "cardinality(authorships.author.id)": 0,
+    }
+
+
+def test_metrics_on_composite_buckets(client, fake_es):
+    client.get("/works?group_by=type&cursor=*&metrics=sum(cited_by_count)")
+    agg = fake_es.search_body()["aggs"]["groupby_type"]
+    assert "composite" in agg
+    assert agg["aggs"] == {"sum(cited_by_count)": {"sum": {"field": "cited_by_count"}}}
+
+
+def test_metrics_in_pivot_groups(client, fake_es):
+    fake_es.terms_counts = {"type": {"article": 6}, "publication_year": {2021: 5}}
+    res = client.get("/works?group_by=type,publication_year&metrics=avg(fwci)")
+    [article] = res.get_json()["group_by"]
+    assert article["metrics"] == {"avg(fwci)": 0}
+    assert article["groups"][0]["metrics"] == {"avg(fwci)": 0}
+
+
+def test_no_metrics_without_the_param(client, fake_es):
+    fake_es.terms_counts = {"type": {"article": 6}}
+    res = client.get("/works?group_by=type")
+    assert "aggs" not in fake_es.search_body()["aggs"]["groupby_type"]
+    assert "metrics" not in res.get_json()["group_by"][0]
+
+
+@pytest.mark.parametrize(
+    "url, message",
+    [
+        ("/works?metrics=sum(cited_by_count)", "need a group_by"),
+        ("/works?group_by=has_doi&metrics=sum(cited_by_count)", "do not work"),
+        ("/works?group_by=version&metrics=sum(cited_by_count)", "do not work"),
+        (
+            "/works?group_by=type&group_by_mode=approx&metrics=sum(cited_by_count)",
+            "does not work with metrics",
+        ),
+    ],
+)
+def test_unsupported_metrics(client, fake_es, url, message):
+    res = client.get(url)
+    assert res.status_code == 403
+    assert message in res.get_json()["message"]
+
+
+@pytest.mark.parametrize(
+    "group_by",
+    ["primary_topic.field.id", "topics.domain.id", "type,primary_topic.subfield.id"],
+)
+def test_no_metrics_on_topic_ids_in_two_formats(client, fake_es, group_by):
+    # the sums of both formats could be added, but not averages or cardinalities
+    res = client.get(f"/works?group_by={group_by}&metrics=avg(fwci)")
+    assert res.status_code == 403
+    assert "indexed in two formats" in res.get_json()["message"]
+
+
+def test_metrics_on_topic_ids_in_one_format(client, fake_es, monkeypatch):
+    monkeypatch.setattr("settings.TOPIC_IDS_SINGLE_FORMAT", True)
+    fake_es.terms_counts = {"primary_topic.field.id": {"17": 6}}
+    res = client.get("/works?group_by=primary_topic.field.id&metrics=avg(fwci)")
+    assert res.status_code == 200
+    assert res.get_json()["group_by"][0]["metrics"] == {"avg(fwci)": 0}
@@ -0,0 +1,56 @@
+"""Group by q is matched in elasticsearch where the display names are known up front."""
+import pytest
+
+from core.group_by.filter import contains_regex, matching_codes
+
+
+def group_by_agg(client, fake_es, url, group_by):
+    assert client.get(url).status_code == 200
+    name = f"groupby_{group_by.replace('.', '_')}"
+    return fake_es.search_body()["aggs"][name]["terms"]
+
+
+def test_keys_that_are_display_names_use_a_regex(client, fake_es):
+    agg = group_by_agg(client, fake_es, "/works?group_by=type&q=Art", "type")
+    assert agg["include"] == ".*[aA][rR][tT].*"
+    assert agg["size"] == 200
+    assert agg["shard_size"] == 3000
+
+
+def test_sorted_group_bys_take_the_include(client, fake_es):
+    agg = group_by_agg(
+        client, fake_es, "/works?group_by=type&q=book&sort=key:asc", "type"
+    )
+    assert agg["include"] == ".*[bB][oO][oO][kK].*"
+    assert agg["order"] == {"_key": "asc"}
+
+
+def test_countries_include_matching_codes(client, fake_es):
+    agg = group_by_agg(
+        client,
+        fake_es,
+        "/works?group_by=authorships.countries&q=united k",
+        "authorships.countries",
+    )
+    assert agg["include"] == ["GB", "gb"]
+
+
+def test_entity_ids_are_matched_after_display_names(client, fake_es):
+    agg = group_by_agg(
+        client,
+        fake_es,
+        "/works?group_by=authorships.author.id&q=smith",
+        "authorships.author.id",
+    )
+    assert "include" not in agg
+    assert agg["size"] == 500
+    assert agg["shard_size"] == 5000
+
+
+def test_regex_escapes_reserved_characters():
+    assert contains_regex('a.b (c) "d"') == '.*[aA]\\.[bB] \\([cC]\\) \\"[dD]\\".*'
+
+
+def test_codes_match_display_names():
+    assert matching_codes("languages", "chinese") == ["ZH", "zh", "ZH-CN", "zh-cn"]
+    assert matching_codes("currencies", "pound sterling") == ["GBP", "gbp"]
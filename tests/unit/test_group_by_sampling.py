@@ -0,0 +1,62 @@
+"""group_by_mode=approx counts groups on a random sample of the matching records."""
+import pytest
+
+
+@pytest.fixture
+def four_works(fake_es, monkeypatch):
+    # a sample of one record in four
+    monkeypatch.setattr("settings.GROUP_BY_SAMPLE_SIZE", 1)
+    fake_es.index_hits = {
+        "works": [{"id": f"https://openalex.org/W{i}"} for i in range(10, 14)]
+    }
+    fake_es.terms_counts = {"type": {"article": 100, "book": 10}}
+    return fake_es
+
+
+def test_counts_are_scaled_from_the_sample(client, four_works):
+    res = client.get(
+        "/works?group_by=type&group_by_mode=approx&cited_by_count_sum=true"
+    )
+    assert res.status_code == 200
+    aggs = four_works.search_body()["aggs"]
+    sampler = aggs["group_by_sampler"]
+    assert sampler["random_sampler"] == {"probability": 0.25, "seed": 42}
+    assert list(sampler["aggs"]) == ["groupby_type"]
+    # meta sums are not sampled
+    assert "cited_by_count_sum" in aggs
+    json = res.get_json()
+    counts = {group["key_display_name"]: group["count"] for group in json["group_by"]}
+    assert counts["article"] == 400 and counts["book"] == 40
+    assert json["meta"]["group_by_sampling"] == {
+        "probability": 0.25,
+        "sampled_count": 0,
+        "error_margin_95": 68,
+    }
+
+
+def test_small_result_sets_are_counted_exactly(client, four_works, monkeypatch):
+    monkeypatch.setattr("settings.GROUP_BY_SAMPLE_SIZE", 3)
+    res = client.get("/works?group_by=type&group_by_mode=approx")
+    assert "group_by_sampler" not in four_works.search_body()["aggs"]
+    assert "group_by_sampling" not in res.get_json()["meta"]
+
+
+def test_exact_by_default(client, four_works):
+    res = client.get("/works?group_by=type")
+    assert "group_by_sampler" not in four_works.search_body()["aggs"]
+    assert not [call for call in four_works.calls if call[0] == "count"]
+    assert res.get_json()["group_by"][0]["count"] == 100
+
+
+@pytest.mark.parametrize(
+    "url, message",
+    [
+        ("/works?group_by=type&group_by_mode=fast", "must be exact or approx"),
+        ("/works?group_by_mode=approx", "needs a group_by"),
+        ("/works?group_by=type&group_by_mode=approx&cursor=*", "cursor pagination"),
+    ],
+)
+def test_invalid_modes(client, url, message):
+    res = client.get(url)
+    assert res.status_code == 403
+    assert message in res.get_json()["message"]
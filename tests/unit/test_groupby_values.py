@@ -0,0 +1,124 @@
+import threading
+import time
+
+from elasticsearch import ConnectionError
+
+import settings
+from core.group_by.groupby_values import GroupByValuesCache
+
+ARTICLE = {"key": "https://openalex.org/types/article", "key_display_name": "article"}
+GROUPBY_VALUES_DOC = {"entity": "works", "group_by": "type", "buckets": [ARTICLE]}
+
+
+def test_group_by_values_are_loaded_once_per_worker(client, fake_es):
+    res = client.get("/works?group_by=type")
+    assert res.status_code == 200
+    assert [call[1] for call in fake_es.calls] == [
+        ["works-v24-*,-*invalid-data"],
+        ["groupby_values"],
+    ]
+
+    res = client.get("/works?group_by=oa_status")
+    assert res.status_code == 200
+    assert len(fake_es.calls) == 3
+    assert res.headers["X-Groupby-Values-Age"] != "None"
+
+
+def test_group_by_zero_fills_from_memory(client, fake_es):
+    fake_es.hits = [GROUPBY_VALUES_DOC]
+    res = client.get("/works?group_by=type")
+    assert res.get_json()["group_by"] == [
+        {
+            "key": "https://openalex.org/types/article",
+            "key_display_name": "article",
+            "count": 0,
+        }
+    ]
+
+
+def test_stale_values_refresh_in_background(fake_es):
+    fake_es.hits = [GROUPBY_VALUES_DOC]
+    cache = GroupByValuesCache("groupby_values", refresh_seconds=0)
+    assert cache.get("works", "type") == [ARTICLE]
+
+    fake_es.hits = []
+    # the stale values are served while the refresh runs
+    assert cache.get("works", "type") == [ARTICLE]
+    for _ in range(50):
+        if cache.stats()["loads"] == 2:
+            break
+        time.sleep(0.01)
+    assert cache.get("works", "type") == []
+
+
+def test_failed_refresh_keeps_loaded_values(fake_es):
+    fake_es.hits = [GROUPBY_VALUES_DOC]
+    cache = GroupByValuesCache("groupby_values", refresh_seconds=60)
+    cache.get("works", "type")
+
+    def unavailable(*args, **kwargs):
+        raise ConnectionError("elastic is down")
+
+    fake_es.search = unavailable
+    cache.refresh()
+    assert cache.get("works", "type") == [ARTICLE]
+    assert cache.stats()["failures"] == 1
+
+
+def test_failed_first_load_zero_fills_nothing_until_retried(fake_es, monkeypatch):
+    cache = GroupByValuesCache("groupby_values", refresh_seconds=60)
+    search = fake_es.search
+
+    def unavailable(*args, **kwargs):
+        raise ConnectionError("elastic is down")
+
+    fake_es.search = unavailable
+    assert cache.get("works", "type") == []
+    # not tried again before the back-off
+    fake_es.search = search
+    fake_es.hits = [GROUPBY_VALUES_DOC]
+    assert cache.get("works", "type") == []
+    assert cache.stats()["failures"] == 1
+
+    later = time.monotonic() + settings.GROUPBY_VALUES_RETRY_SECONDS + 1
+    monkeypatch.setattr("time.monotonic", lambda: later)
+    assert cache.get("works", "type") == [ARTICLE]
+    assert cache.stats()["loads"] == 1
+
+
+def test_documents_past_the_limit_are_logged(fake_es, monkeypatch, caplog):
+    monkeypatch.setattr("settings.GROUPBY_VALUES_MAX_DOCS", 1)
+    fake_es.hits = [GROUPBY_VALUES_DOC, dict(GROUPBY_VALUES_DOC, group_by="oa_status")]
+    cache = GroupByValuesCache("groupby_values", refresh_seconds=60)
+    cache.get("works", "type")
+    assert "groupby_values has 2 documents" in caplog.text
+
+
+def test_readers_do_not_wait_for_a_refresh(fake_es):
+    fake_es.hits = [GROUPBY_VALUES_DOC]
+    cache = GroupByValuesCache("groupby_values", refresh_seconds=0)
+    cache.get("works", "type")
+
+    reloading = threading.Event()
+    release = threading.Event()
+    search = fake_es.search
+
+    def slow_search(*args, **kwargs):
+        reloading.set()
+        release.wait(5)
+        return search(*args, **kwargs)
+
+    fake_es.search = slow_search
+    cache.refresh_in_background()
+    assert reloading.wait(5)
+    # the reload is still running, and readers get the loaded table without waiting
+    started = time.monotonic()
+    assert cache.get("works", "type") == [ARTICLE]
+    assert time.monotonic() - started < 1
+    release.set()
+
+
+def test_group_bys_formatted_in_parallel_send_the_age(client, fake_es):
+    res = client.get("/works?group_bys=type,oa_status")
+    assert res.status_code == 200
+    assert res.headers["X-Groupby-Values-Age"] != "None"
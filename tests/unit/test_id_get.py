@@ -0,0 +1,87 @@
+"""Entity GETs take one search, and look up merged ids only for missing records."""
+import time
+
+import pytest
+
+import settings
+
+MERGED_ENTITIES = [
+    ("works", "W"),
+    ("authors", "A"),
+    ("institutions", "I"),
+    ("concepts", "C"),
+    ("funders", "F"),
+    ("publishers", "P"),
+    ("sources", "S"),
+]
+
+
+def call_types(fake_es):
+    return [call[0] for call in fake_es.calls]
+
+
+@pytest.mark.parametrize("entity, prefix", MERGED_ENTITIES + [("topics", "T")])
+def test_hit_is_one_search(client, fake_es, entity, prefix):
+    full_id = f"https://openalex.org/{prefix}123"
+    fake_es.hits = [{"id": full_id, "ids": {"openalex": full_id}}]
+    res = client.get(f"/{entity}/{prefix}123?select=id")
+    assert res.status_code == 200
+    assert res.get_json()["id"] == full_id
+    assert call_types(fake_es) == ["search"]
+
+
+@pytest.mark.parametrize("entity, prefix", MERGED_ENTITIES)
+def test_miss_checks_the_merge_index_once(client, fake_es, entity, prefix):
+    res = client.get(f"/{entity}/{prefix}123")
+    assert res.status_code == 404
+    assert call_types(fake_es) == ["search", "msearch"]
+    assert fake_es.calls[1][2][0]["index"][0].startswith(f"merge-{entity}")
+
+    # whether the id was merged is cached
+    res = client.get(f"/{entity}/{prefix}123")
+    assert res.status_code == 404
+    assert call_types(fake_es) == ["search", "msearch", "search"]
+
+
+@pytest.mark.parametrize("entity, prefix", MERGED_ENTITIES)
+def test_merged_ids_redirect(client, fake_es, entity, prefix):
+    fake_es.index_hits = {
+        "merge-": [
+            {
+                "id": f"https://openalex.org/{prefix}123",
+                "merge_into_id": f"https://openalex.org/{prefix}456",
+            }
+        ]
+    }
+    for _ in range(2):
+        res = client.get(f"/{entity}/{prefix}123?select=id")
+        assert res.status_code == 301
+        assert res.location.endswith(f"/{prefix}456?select=id")
+    assert call_types(fake_es) == ["search", "msearch", "search"]
+
+
+def test_ids_merged_after_a_miss_redirect_once_the_miss_expires(
+    client, fake_es, monkeypatch
+):
+    assert client.get("/works/W123").status_code == 404
+    fake_es.index_hits = {
+        "merge-": [
+            {
+                "id": "https://openalex.org/W123",
+                "merge_into_id": "https://openalex.org/W456",
+            }
+        ]
+    }
+    later = time.monotonic() + settings.MERGED_ID_MISS_CACHE_TTL + 1
+    monkeypatch.setattr("time.monotonic", lambda: later)
+    for _ in range(2):
+        res = client.get("/works/W123?select=id")
+        assert res.status_code == 301
+    # the merge is cached for the full ttl
+    assert call_types(fake_es) == ["search", "msearch", "search", "msearch", "search"]
+
+
+def test_topic_miss_is_one_search(client, fake_es):
+    res = client.get("/topics/T123")
+    assert res.status_code == 404
+    assert call_types(fake_es) == ["search"]
@@ -0,0 +1,115 @@
+"""List views take long id lists in a POST body and send them as chunked terms."""
+import pytest
+
+import settings
+from extensions import cache
+
+
+def works_searches(fake_es):
+    return [
+        call
+        for call in fake_es.calls
+        if call[0] == "search" and call[1][0].startswith("works")
+    ]
+
+
+def terms_queries(body):
+    """Every terms query in a search body, as (field, values)."""
+    found = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            for field, values in node.get("terms", {}).items():
+                found.append((field, values))
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(body)
+    return found
+
+
+def test_long_doi_list_is_chunked_into_one_search(client, fake_es):
+    dois = [f"10.1234/{i}" for i in range(50000)]
+    res = client.post("/works?filter=is_oa:true", json={"filter": {"doi": dois}})
+    assert res.status_code == 200
+    assert len(works_searches(fake_es)) == 1
+    terms = terms_queries(works_searches(fake_es)[0][2])
+    chunk_size = settings.TERMS_QUERY_CHUNK_SIZE
+    assert [len(values) for _, values in terms] == [chunk_size] * (50000 // chunk_size)
+    assert {field for field, _ in terms} == {"ids.doi.lower"}
+    assert terms[0][1][0] == "https://doi.org/10.1234/0"
+
+
+def test_group_by_with_an_id_list(client, fake_es):
+    authors = [f"A{i}" for i in range(10, 2010)]
+    res = client.post(
+        "/works?group_by=type",
+        json={"filter": {"authorships.author.id": authors}},
+    )
+    assert res.status_code == 200
+    assert "group_by" in res.get_json()
+    [search] = works_searches(fake_es)
+    assert "aggs" in search[2]
+    [(field, values)] = terms_queries(search[2]["query"])
+    assert field == "authorships.author.id.lower"
+    assert values[0] == "https://openalex.org/A10"
+
+
+@pytest.mark.parametrize(
+    "key, value, expected",
+    [
+        ("openalex_id", "W2741809807", "https://openalex.org/W2741809807"),
+        (
+            "authorships.author.orcid",
+            "0000-0001-6187-6610",
+            "https://orcid.org/0000-0001-6187-6610",
+        ),
+        ("doi", "https://doi.org/10.1234/A", "https://doi.org/10.1234/A"),
+    ],
+)
+def test_ids_are_normalized(client, fake_es, key, value, expected):
+    res = client.post("/works", json={"filter": {key: [value, value]}})
+    assert res.status_code == 200
+    [(_, values)] = terms_queries(works_searches(fake_es)[0][2])
+    assert values == [expected]
+
+
+def test_lists_combine_with_and(client, fake_es):
+    res = client.post(
+        "/works",
+        json={"filter": {"doi": ["10.1234/a"], "openalex_id": ["W2741809807"]}},
+    )
+    assert res.status_code == 200
+    filters = works_searches(fake_es)[0][2]["query"]["bool"]["filter"]
+    assert len(filters) == 2
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        None,
+        {"filter": []},
+        {"filter": {"doi": "10.1234/a"}},
+        {"filter": {"is_oa": ["true"]}},
+        {"filter": {"doi": []}},
+        {"filter": {"openalex_id": ["not an id"]}},
+        {"filter": {"doi": ["10.1234/a"] * (settings.MAX_IDS_IN_POST_FILTER + 1)}},
+    ],
+)
+def test_invalid_bodies(client, fake_es, body):
+    res = client.post("/works", json=body)
+    assert res.status_code == 403
+    assert works_searches(fake_es) == []
+
+
+def test_posts_are_not_cached(client, fake_es):
+    app = client.application
+    app.config["CACHE_TYPE"] = "SimpleCache"
+    cache.init_app(app)
+    for _ in range(2):
+        res = client.post("/works", json={"filter": {"doi": ["10.1234/a"]}})
+        assert res.headers["X-Response-Cache"] == "bypass"
+    assert len(works_searches(fake_es)) == 2
@@ -0,0 +1,124 @@
+"""group_by=a,b counts the groups of b within each group of a in one aggregation."""
+import csv
+import io
+
+import pytest
+
+from core.group_by.pivot import merge_groups
+
+
+@pytest.fixture
+def type_by_year(fake_es):
+    fake_es.terms_counts = {
+        "type": {"article": 6, "book": 2},
+        "publication_year": {2021: 5, 2020: 3},
+    }
+    return fake_es
+
+
+def test_one_nested_aggregation(client, type_by_year):
+    res = client.get("/works?group_by=type,publication_year:include_unknown")
+    assert res.status_code == 200
+    [search] = type_by_year.searches()
+    outer = search[2]["aggs"]["groupby_type"]
+    assert outer["terms"]["field"] == "type"
+    assert outer["terms"]["size"] == 200
+    inner = outer["aggs"]["groupby_publication_year"]["terms"]
+    assert inner == {
+        "field": "publication_year",
+        "size": 100,
+        "missing": -111,
+    }
+
+
+def test_nested_groups(client, type_by_year):
+    json = client.get("/works?group_by=type,publication_year").get_json()
+    assert json["meta"]["groups_count"] == 2
+    assert [group["key_display_name"] for group in json["group_by"]] == [
+        "article",
+        "book",
+    ]
+    article = json["group_by"][0]
+    assert article["key"] == "https://openalex.org/types/article"
+    assert article["count"] == 6
+    assert article["groups"] == [
+        {"key": "2021", "key_display_name": "2021", "count": 5},
+        {"key": "2020", "key_display_name": "2020", "count": 3},
+    ]
+
+
+def test_plain_group_bys_have_no_groups(client, type_by_year):
+    json = client.get("/works?group_by=type").get_json()
+    assert all("groups" not in group for group in json["group_by"])
+
+
+def test_sort_orders_both_fields(client, type_by_year):
+    client.get("/works?group_by=type,publication_year&sort=key:asc")
+    [search] = type_by_year.searches()
+    outer = search[2]["aggs"]["groupby_type"]
+    assert outer["terms"]["order"] == {"_key": "asc"}
+    assert outer["aggs"]["groupby_publication_year"]["terms"]["order"] == {
+        "_key": "asc"
+    }
+
+
+def test_csv_export_has_a_row_per_pair(client, type_by_year):
+    res = client.get("/works?group_by=type,publication_year&format=csv")
+    assert res.headers["Content-type"] == "text/csv"
+    rows = list(csv.reader(io.StringIO(res.get_data(as_text=True))))
+    assert rows == [
+        ["Type", "Publication Year", "count"],
+        ["article", "2021", "5"],
+        ["article", "2020", "3"],
+        ["book", "2021", "5"],
+        ["book", "2020", "3"],
+    ]
+
+
+def test_xlsx_export(client, type_by_year):
+    res = client.get("/works?group_by=type,publication_year&format=xlsx")
+    assert res.status_code == 200
+    assert res.headers["Content-type"].endswith("spreadsheetml.sheet")
+
+
+@pytest.mark.parametrize(
+    "url, message",
+    [
+        ("/works?group_by=type,publication_year,language", "takes two fields"),
+        ("/works?group_by=type,has_doi", "cannot be used in a pivot"),
+        ("/works?group_by=type,version", "cannot be used in a pivot"),
+        ("/works?group_by=type,publication_year&q=art", "q does not work"),
+        ("/works?group_by=type,publication_year&cursor=*", "cursor pagination"),
+    ],
+)
+def test_unsupported_pivots(client, fake_es, url, message):
+    res = client.get(url)
+    assert res.status_code == 403
+    assert message in res.get_json()["message"]
+
+
+def test_topic_ids_in_both_formats_merge_with_their_groups():
+    url = "https://openalex.org/fields/17"
+    results = [
+        {
+            "key": url,
+            "key_display_name": "Computer Science",
+            "doc_count": 9,
+            "groups": [{"key": "2021", "key_display_name": "2021", "doc_count": 9}],
+        },
+        {
+            "key": "17",
+            "key_display_name": "Computer Science",
+            "doc_count": 3,
+            "groups": [
+                {"key": "2020", "key_display_name": "2020", "doc_count": 2},
+                {"key": "2021", "key_display_name": "2021", "doc_count": 1},
+            ],
+        },
+    ]
+    [merged] = merge_groups("primary_topic.field.id", results)
+    assert merged["key"] == url and merged["doc_count"] == 12
+    assert [(group["key"], group["doc_count"]) for group in merged["groups"]] == [
+        ("2021", 10),
+        ("2020", 2),
+    ]
@@ -0,0 +1,82 @@
+import time
+
+from elasticsearch_dsl import Search
+
+import settings
+from core.plan_cache import QueryPlanCache, get_plan_key, normalize_filters
+from core.utils import map_filter_params
+
+
+def test_filter_order_shares_key():
+    a = normalize_filters(map_filter_params("publication_year:2020,is_oa:true"))
+    b = normalize_filters(map_filter_params("is_oa:true,publication_year:2020"))
+    assert a == b
+
+
+def test_or_value_order_shares_key():
+    a = normalize_filters(map_filter_params("concepts.id:C2|C1"))
+    b = normalize_filters(map_filter_params("concepts.id:C1|C2"))
+    assert a == b
+    negated = normalize_filters(map_filter_params("concepts.id:!C2|C1"))
+    assert negated == (("concepts.id", "!C1|C2"),)
+
+
+def test_misplaced_negation_not_normalized():
+    filters = normalize_filters(map_filter_params("concepts.id:C2|!C1"))
+    assert filters == (("concepts.id", "C2|!C1"),)
+
+
+def test_key_includes_index_and_default_sort():
+    params = {"filters": None, "sort": {"cited_by_count": "desc"}, "group_bys": None}
+    assert get_plan_key(params, "works", ["id"]) != get_plan_key(
+        params, "authors", ["id"]
+    )
+    assert get_plan_key(params, "works", ["id"]) != get_plan_key(
+        params, "works", ["-works_count", "id"]
+    )
+
+
+def test_plan_round_trip():
+    cache = QueryPlanCache(10, 60)
+    s = Search(index="works").filter("term", type="article").extra(size=25)
+    s.aggs.bucket("groupby_type", "terms", field="type")
+    s = s.params(preference="type")
+    cache.set("key", s)
+    cached = cache.get("key", "works")
+    assert cached.to_dict() == s.to_dict()
+    assert cached._params == {"preference": "type"}
+    assert cache.stats()["hits"] == 1
+
+
+def test_lru_eviction():
+    cache = QueryPlanCache(2, 60)
+    for key in ["a", "b"]:
+        cache.set(key, Search().filter("term", type=key))
+    cache.get("a", "works")
+    cache.set("c", Search().filter("term", type="c"))
+    assert cache.get("b", "works") is None
+    assert cache.get("a", "works") is not None
+    assert cache.stats()["size"] == 2
+
+
+def test_plans_expire_after_ttl(monkeypatch):
+    cache = QueryPlanCache(10, 60)
+    cache.set("key", Search().filter("term", type="article"))
+    now = time.monotonic()
+    monkeypatch.setattr("core.plan_cache.time.monotonic", lambda: now + 59)
+    assert cache.get("key", "works") is not None
+    monkeypatch.setattr("core.plan_cache.time.monotonic", lambda: now + 61)
+    assert cache.get("key", "works") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_plans_expire_with_lookups():
+    assert settings.QUERY_PLAN_TTL <= settings.WORK_LOCATION_CACHE_TTL
+    assert settings.QUERY_PLAN_TTL <= settings.MERGED_ID_CACHE_TTL
+
+
+def test_plan_cache_headers(client, fake_es):
+    client.get("/works?filter=publication_year:2021,is_oa:true")
+    res = client.get("/works?filter=is_oa:true,publication_year:2021")
+    assert res.headers["X-Query-Plan-Cache"] == "hit"
+    assert float(res.headers["X-Query-Build-Time-Ms"]) >= 0
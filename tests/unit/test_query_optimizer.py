@@ -0,0 +1,270 @@
+"""Optimized queries match the same documents, with the same scores when scored."""
+import json
+
+import hypothesis
+from elasticsearch_dsl import Search
+from hypothesis import given
+from hypothesis import strategies as st
+
+from core.filter import filter_records
+from core.query_optimizer import optimize_query, optimize_search
+from core.utils import map_filter_params
+from works.fields import fields_dict
+
+
+def normalize(value):
+    if isinstance(value, bool):
+        return str(value).lower()
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def compare(value, op, bound):
+    value, bound = normalize(value), normalize(bound)
+    if type(value) is not type(bound):
+        return False
+    return {
+        "gt": value > bound,
+        "gte": value >= bound,
+        "lt": value < bound,
+        "lte": value <= bound,
+    }[op]
+
+
+def evaluate(query, doc):
+    """(matches, score) of a query for a document of field: [values], like elastic."""
+    [(name, body)] = query.items()
+    if name == "match_all":
+        return True, 1
+    if name == "bool":
+        return evaluate_bool(body, doc)
+    if name in ["function_score", "constant_score"]:
+        matched, _ = evaluate(body.get("query") or body["filter"], doc)
+        return matched, 3 if matched else 0
+    [(field, value)] = body.items()
+    if name == "term" and isinstance(value, dict):
+        value = value["value"]
+    values = [normalize(v) for v in doc.get(field, [])]
+    if name == "term":
+        matched = normalize(value) in values
+    elif name == "terms":
+        matched = any(normalize(v) in values for v in value)
+    elif name == "range":
+        matched = any(
+            all(compare(v, op, bound) for op, bound in value.items()) for v in values
+        )
+    elif name == "exists":
+        matched = bool(doc.get(value))
+    else:
+        raise ValueError(name)
+    # a score that depends on the clause, so moved or merged clauses show up
+    return matched, (len(json.dumps(query, sort_keys=True)) % 7 + 1) if matched else 0
+
+
+def evaluate_bool(body, doc):
+    def clauses(key):
+        found = body.get(key, [])
+        return found if isinstance(found, list) else [found]
+
+    must = [evaluate(q, doc) for q in clauses("must")]
+    filter = [evaluate(q, doc)[0] for q in clauses("filter")]
+    should = [evaluate(q, doc) for q in clauses("should")]
+    must_not = [evaluate(q, doc)[0] for q in clauses("must_not")]
+    if "minimum_should_match" in body:
+        minimum_should_match = int(body["minimum_should_match"])
+    else:
+        minimum_should_match = 1 if should and not must and not filter else 0
+    matched = (
+        all(m for m, _ in must)
+        and all(filter)
+        and not any(must_not)
+        and sum(m for m, _ in should) >= minimum_should_match
+    )
+    if not matched:
+        return False, 0
+    score = sum(s for _, s in must) + sum(s for _, s in should)
+    return True, score * body.get("boost", 1)
+
+
+KEYWORDS = ["a", "b", "c", "d"]
+NUMBERS = [1, 2, 3, 4, 5]
+
+leaves = st.one_of(
+    st.builds(lambda v: {"term": {"k": v}}, st.sampled_from(KEYWORDS)),
+    st.builds(lambda v: {"term": {"k": {"value": v}}}, st.sampled_from(KEYWORDS)),
+    st.builds(lambda v: {"term": {"n": v}}, st.sampled_from(NUMBERS)),
+    st.builds(
+        lambda vs: {"terms": {"k": vs}}, st.lists(st.sampled_from(KEYWORDS), max_size=3)
+    ),
+    st.builds(
+        lambda field, bounds: {"range": {field: bounds}},
+        st.sampled_from(["n", "publication_year"]),
+        st.dictionaries(
+            st.sampled_from(["gt", "gte", "lt", "lte"]),
+            st.sampled_from(NUMBERS),
+            min_size=1,
+            max_size=2,
+        ),
+    ),
+    st.builds(lambda f: {"exists": {"field": f}}, st.sampled_from(["k", "n"])),
+)
+
+
+def bools(children):
+    clause_lists = st.lists(children, max_size=3)
+
+    def build(must, filter, should, must_not, minimum_should_match, boost):
+        body = {}
+        for key, clauses in [
+            ("must", must),
+            ("filter", filter),
+            ("should", should),
+            ("must_not", must_not),
+        ]:
+            if clauses:
+                body[key] = clauses
+        if minimum_should_match is not None:
+            body["minimum_should_match"] = minimum_should_match
+        if boost is not None:
+            body["boost"] = boost
+        return {"bool": body}
+
+    return st.builds(
+        build,
+        clause_lists,
+        clause_lists,
+        clause_lists,
+        clause_lists,
+        st.sampled_from([None, 0, 1, 2, "1"]),
+        st.sampled_from([None, 2]),
+    ) | st.builds(lambda q: {"constant_score": {"filter": q}}, children)
+
+
+queries = st.recursive(leaves, bools, max_leaves=12)
+docs = st.lists(
+    st.fixed_dictionaries(
+        {
+            "k": st.lists(st.sampled_from(KEYWORDS), max_size=2),
+            "n": st.lists(st.sampled_from(NUMBERS), max_size=2),
+            "publication_year": st.lists(st.sampled_from(NUMBERS), max_size=1),
+        }
+    ),
+    min_size=1,
+    max_size=8,
+)
+
+
+@hypothesis.settings(max_examples=300, deadline=None)
+@given(queries, docs)
+def test_scored_queries_keep_matches_and_scores(query, docs):
+    optimized = optimize_query(query, scoring=True)
+    for doc in docs:
+        assert evaluate(optimized, doc) == evaluate(query, doc)
+
+
+@hypothesis.settings(max_examples=300, deadline=None)
+@given(queries, docs)
+def test_unscored_queries_keep_matches(query, docs):
+    optimized = optimize_query(query, scoring=False)
+    for doc in docs:
+        assert evaluate(optimized, doc)[0] == evaluate(query, doc)[0]
+
+
+FILTERS = [
+    st.builds("publication_year:{}".format, st.integers(2018, 2022)),
+    st.builds("publication_year:!{}".format, st.integers(2018, 2022)),
+    st.builds(
+        "publication_year:{}-{}".format,
+        st.integers(2018, 2020),
+        st.integers(2020, 2022),
+    ),
+    st.builds("cited_by_count:>{}".format, st.integers(0, 3)),
+    st.builds("from_publication_date:2020-0{}-01".format, st.integers(1, 9)),
+    st.builds("to_publication_date:2020-0{}-01".format, st.integers(1, 9)),
+    st.builds(
+        lambda negated, ids: f"concepts.id:{'!' if negated else ''}{'|'.join(ids)}",
+        st.booleans(),
+        st.lists(st.sampled_from(["C11", "C12", "C13"]), min_size=2, max_size=3),
+    ),
+    st.builds(
+        lambda types: f"type:{'|'.join(types)}",
+        st.lists(st.sampled_from(["article", "book"]), min_size=1, max_size=2),
+    ),
+    st.builds("type:!{}".format, st.sampled_from(["article", "book"])),
+    st.builds("authorships.institutions.id:I11+{}".format, st.sampled_from(["I12"])),
+    st.builds("has_doi:{}".format, st.sampled_from(["true", "false"])),
+    st.builds("is_oa:{}".format, st.sampled_from(["true", "false"])),
+]
+
+works = st.lists(
+    st.fixed_dictionaries(
+        {
+            "publication_year": st.lists(st.integers(2018, 2022), max_size=1),
+            "publication_date": st.lists(
+                st.builds("2020-0{}-15".format, st.integers(1, 9)), max_size=1
+            ),
+            "cited_by_count": st.lists(st.integers(0, 4), max_size=1),
+            "concepts.id.lower": st.lists(
+                st.sampled_from([f"https://openalex.org/C1{i}" for i in [1, 2, 3]]),
+                max_size=2,
+            ),
+            "type.lower": st.lists(st.sampled_from(["article", "book"]), max_size=1),
+            "authorships.institutions.id.lower": st.lists(
+                st.sampled_from([f"https://openalex.org/I1{i}" for i in [1, 2]]),
+                max_size=2,
+            ),
+            "ids.doi": st.lists(st.just("https://doi.org/10.1/x"), max_size=1),
+            "open_access.is_oa": st.lists(
+                st.sampled_from(["true", "false"]), max_size=1
+            ),
+        }
+    ),
+    min_size=1,
+    max_size=8,
+)
+
+
+@hypothesis.settings(max_examples=300, deadline=None)
+@given(st.lists(st.one_of(FILTERS), min_size=1, max_size=6), works)
+def test_generated_filters_match_the_same_works(filters, works):
+    s = filter_records(fields_dict, map_filter_params(",".join(filters)), Search())
+    query = s.to_dict()["query"]
+    optimized = optimize_search(s.sort("id")).to_dict()["query"]
+    for work in works:
+        assert evaluate(optimized, work)[0] == evaluate(query, work)[0]
+
+
+def test_or_values_become_one_terms_query():
+    s = filter_records(
+        fields_dict, map_filter_params("concepts.id:C11|C12|C13"), Search()
+    )
+    query = optimize_search(s.sort("id")).to_dict()["query"]
+    ids = [f"https://openalex.org/C1{i}" for i in [1, 2, 3]]
+    assert query == {"bool": {"filter": [{"terms": {"concepts.id.lower": ids}}]}}
+
+
+def test_negated_values_become_one_must_not():
+    s = filter_records(
+        fields_dict, map_filter_params("type:!article|book,type:!dataset"), Search()
+    )
+    query = optimize_search(s.sort("id")).to_dict()["query"]
+    types = ["article", "book", "dataset"]
+    assert query == {"bool": {"must_not": [{"terms": {"type.lower": types}}]}}
+
+
+def test_date_window_becomes_one_range():
+    filters = "from_publication_date:2020-01-01,to_publication_date:2020-12-31"
+    s = filter_records(fields_dict, map_filter_params(filters), Search())
+    query = optimize_search(s.sort("id")).to_dict()["query"]
+    dates = {"gte": "2020-01-01", "lte": "2020-12-31"}
+    assert query == {"bool": {"filter": [{"range": {"publication_date": dates}}]}}
+
+
+def test_search_filters_move_to_filter_context_unless_sorted_by_score(client, fake_es):
+    client.get("/works?filter=title.search:malaria&sort=cited_by_count:desc")
+    client.get("/works?filter=title.search:malaria")
+    by_count, by_score = [call[2]["query"] for call in fake_es.calls]
+    assert list(by_count["bool"]) == ["filter"]
+    assert "function_score" in by_score
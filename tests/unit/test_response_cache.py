@@ -0,0 +1,204 @@
+"""List responses are cached under canonical keys."""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from flask import request
+
+import settings
+from core.response_cache import get_cache_key, get_cache_timeouts
+from core.single_flight import single_flight
+from extensions import cache
+
+
+@pytest.fixture
+def cached_client(client):
+    app = client.application
+    app.config["CACHE_TYPE"] = "SimpleCache"
+    cache.init_app(app)
+    single_flight.clear()
+    yield client
+    single_flight.clear()
+
+
+def response_stats(client):
+    return client.get("/caches").get_json()["responses"]
+
+
+def works_searches(fake_es):
+    return [
+        call
+        for call in fake_es.calls
+        if call[0] == "search" and call[1][0].startswith("works")
+    ]
+
+
+def wait_for_refreshes():
+    deadline = time.monotonic() + 5
+    while single_flight.stats()["in_flight"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def cache_key(app, url):
+    with app.test_request_context(url):
+        view = app.view_functions[request.endpoint]
+        return get_cache_key(request, view.fields_dict)
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        (
+            "/works?filter=publication_year:2020,is_oa:true",
+            "/works?filter=is_oa:true,publication_year:2020",
+        ),
+        ("/works?filter=type:article|book", "/works?filter=type:book|article"),
+        (
+            "/works?filter=author.id:https://openalex.org/A5023888391",
+            "/works?filter=author.id:a5023888391",
+        ),
+        (
+            "/works?filter=cites:!W1234",
+            "/works?filter=cites:!https://openalex.org/w1234",
+        ),
+        ("/works?per-page=50&group-by=type", "/works?group_by=type&per_page=50"),
+        ("/works?search=malaria&mailto=me@example.com", "/works?search=malaria"),
+        ("/works?sort=cited_by_count", "/works?sort=cited-by-count:asc"),
+        ("/works?select=id,%20doi", "/works?select=id,doi"),
+        ("/authors?filter=x:1", "/people?filter=x:1"),
+    ],
+)
+def test_equivalent_requests_share_a_key(client, first, second):
+    app = client.application
+    assert cache_key(app, first) == cache_key(app, second)
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ("/works?filter=publication_year:2020", "/works?filter=publication_year:2021"),
+        ("/works?filter=cites:W1234", "/works?filter=cites:!W1234"),
+        ("/works?select=id,doi", "/works?select=doi,id"),
+        ("/works?sort=cited_by_count,id", "/works?sort=id,cited_by_count"),
+        ("/works?search=malaria", "/authors?search=malaria"),
+        ("/works?page=2", "/works?page=3"),
+        # only openalex ids are case insensitive
+        ("/works?filter=grants.award_id:t32", "/works?filter=grants.award_id:T32"),
+        ("/works?filter=keywords.id:w12", "/works?filter=keywords.id:W12"),
+    ],
+)
+def test_different_requests_have_different_keys(client, first, second):
+    app = client.application
+    assert cache_key(app, first) != cache_key(app, second)
+
+
+def test_repeated_or_malformed_params_are_not_keyed(client):
+    app = client.application
+    assert cache_key(app, "/works?filter=a:1&filter=b:2") is None
+    assert cache_key(app, "/works?filter=nocolon") is None
+
+
+def test_list_requests_are_served_from_the_cache(cached_client, fake_es):
+    fake_es.hits = [{"id": "https://openalex.org/W1"}]
+    res = cached_client.get("/works?filter=publication_year:2020,is_oa:true&select=id")
+    assert res.headers["X-Response-Cache"] == "miss"
+    assert len(fake_es.calls) == 1
+
+    res = cached_client.get(
+        "/works?select=id&filter=is_oa:true,publication_year:2020&mailto=me@example.com"
+    )
+    assert res.status_code == 200
+    assert res.headers["X-Response-Cache"] == "hit"
+    assert res.get_json()["results"] == [{"id": "https://openalex.org/W1"}]
+    assert len(fake_es.calls) == 1
+
+    stats = cached_client.get("/caches").get_json()["responses"]
+    assert stats == {
+        "/works": {
+            "hits": 1,
+            "stale": 0,
+            "misses": 1,
+            "coalesced": 0,
+            "hit_rate": 0.5,
+        }
+    }
+
+
+@pytest.mark.parametrize(
+    "args",
+    ["cursor=*", "bypass_cache=true", "sample=5", "group_by=type&format=csv"],
+)
+def test_uncacheable_requests_skip_the_cache(cached_client, fake_es, args):
+    for _ in range(2):
+        res = cached_client.get(f"/works?{args}")
+        assert res.headers.get("X-Response-Cache", "bypass") == "bypass"
+    assert response_stats(cached_client) == {}
+
+
+def test_timeouts_by_kind_and_endpoint(client):
+    app = client.application
+    list_timeout = settings.LIST_CACHE_TIMEOUT
+    continents_timeout = settings.LIST_CACHE_TIMEOUTS["continents"]
+    cases = [
+        ("/works?group_by=type", settings.GROUP_BY_CACHE_TIMEOUTS["works"]),
+        (
+            "/authors?group_by=type",
+            (settings.GROUP_BY_CACHE_SOFT_TIMEOUT, settings.GROUP_BY_CACHE_TIMEOUT),
+        ),
+        ("/works?filter=is_oa:true", (list_timeout, list_timeout)),
+        ("/continents", (continents_timeout, continents_timeout)),
+    ]
+    for url, timeouts in cases:
+        with app.test_request_context(url):
+            assert get_cache_timeouts(request) == timeouts
+
+
+def test_stale_group_bys_are_served_while_one_worker_refreshes(
+    cached_client, fake_es, monkeypatch
+):
+    # entries go stale as soon as they are stored
+    monkeypatch.setitem(settings.GROUP_BY_CACHE_TIMEOUTS, "works", (0, 60))
+    url = "/works?group_by=type"
+    res = cached_client.get(url)
+    assert res.get_json()["meta"]["cache_status"] == "miss"
+
+    fake_es.delay = 1
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        responses = list(executor.map(cached_client.get, [url] * 5))
+    assert time.monotonic() - start < 1
+    for res in responses:
+        assert res.status_code == 200
+        assert res.headers["X-Response-Cache"] == "stale"
+        assert res.get_json()["meta"]["cache_status"] == "stale"
+
+    wait_for_refreshes()
+    assert len(works_searches(fake_es)) == 2
+    assert single_flight.stats()["refreshes"] == 1
+    assert response_stats(cached_client)["/works"]["stale"] == 5
+
+
+def test_fresh_entries_are_hits(cached_client, fake_es):
+    url = "/works?group_by=type"
+    cached_client.get(url)
+    res = cached_client.get(url)
+    assert res.get_json()["meta"]["cache_status"] == "hit"
+    assert len(works_searches(fake_es)) == 1
+    assert single_flight.stats()["refreshes"] == 0
+
+
+def test_pretty_printed_hits_report_their_status(cached_client, fake_es):
+    cached_client.application.config["JSONIFY_PRETTYPRINT_REGULAR"] = True
+    url = "/works?group_by=type"
+    cached_client.get(url)
+    res = cached_client.get(url)
+    assert res.get_json()["meta"]["cache_status"] == "hit"
+
+
+def test_bodies_that_do_not_start_with_the_meta_fail_loudly(cached_client, fake_es):
+    # sorted keys put group_by before meta
+    cached_client.application.config["JSON_SORT_KEYS"] = True
+    url = "/works?group_by=type"
+    cached_client.get(url)
+    with pytest.raises(ValueError):
+        cached_client.get(url)
@@ -0,0 +1,261 @@
+"""The compiled serializer must send the same bytes as marshmallow and jsonify."""
+import importlib
+import inspect
+import json
+import random
+
+import marshmallow
+import pytest
+from elasticsearch_dsl import Search
+from elasticsearch_dsl.response import Response
+from flask import jsonify
+from marshmallow import Schema, fields, post_dump, pre_dump, utils
+
+from core.serialization import dump, dumps, serialize
+
+ENTITIES = [
+    "authors",
+    "concepts",
+    "continents",
+    "countries",
+    "domains",
+    "fields",
+    "funders",
+    "institution_types",
+    "institutions",
+    "keywords",
+    "languages",
+    "licenses",
+    "publishers",
+    "sdgs",
+    "source_types",
+    "sources",
+    "subfields",
+    "topics",
+    "work_types",
+    "works",
+]
+
+STRINGS = [
+    "https://openalex.org/W2741809807",
+    "Université de Montréal",
+    "北京大学",
+    'quotes " and \\ backslashes',
+    "line\nbreak\ttab\x7fdel\x01",
+    "emoji \U0001F600 and  ",
+    "",
+]
+FLOATS = [0.5, 12.25, 99.99999, 0.00012, 123456789.5, 0.0, 7]
+VALUES = STRINGS + FLOATS + [None, True, False, 0, 42, "17", "true", "false"]
+
+
+def random_value(field, rng, depth):
+    if isinstance(field, (fields.Method, fields.Function)):
+        return {
+            "display_name": {"fr": "Économie", "en": "Economics"},
+            "description": None,
+        }
+    if isinstance(field, fields.Nested):
+        if field.many:
+            return [
+                random_doc(field.schema, rng, depth + 1)
+                for _ in range(rng.randint(0, 3))
+            ]
+        return random_doc(field.schema, rng, depth + 1)
+    if isinstance(field, fields.List):
+        return [random_value(field.inner, rng, depth) for _ in range(rng.randint(0, 3))]
+    if isinstance(field, fields.Integer):
+        return rng.choice([1, 2019, 1234567, "42", None, 3.0])
+    if isinstance(field, fields.Float):
+        return rng.choice(FLOATS + [None, "0.25", 3])
+    if isinstance(field, fields.Boolean):
+        return rng.choice([True, False, None, "true", "false", 1, 0])
+    if isinstance(field, fields.Dict):
+        return {"a": 1, "b": rng.choice(STRINGS)}
+    if isinstance(field, fields.String):
+        return rng.choice(STRINGS + [None, 5])
+    return rng.choice(VALUES)
+
+
+def random_doc(schema, rng, depth=0):
+    doc = {}
+    for name, field in schema.fields.items():
+        key = field.attribute or name
+        if "." in key or rng.random() < 0.15:
+            continue
+        if depth > 3 and isinstance(field, (fields.Nested, fields.List)):
+            continue
+        doc[key] = random_value(field, rng, depth)
+    doc["id"] = f"https://openalex.org/W{rng.randint(1000, 9999)}"
+    if "abstract_inverted_index" in doc:
+        doc["abstract_inverted_index"] = json.dumps(
+            {"IndexLength": 2, "InvertedIndex": {"Héllo": [0], "world": [1]}}
+        )
+    if "authorships" in doc:
+        doc["authorships_truncated"] = rng.choice([True, False])
+    return doc
+
+
+def fake_response(schema, rng, count):
+    hits = [
+        {
+            "_index": "fake",
+            "_id": str(i),
+            "_score": rng.choice([None, 0.0, 12.5, 0.3333333333333333]),
+            "_source": random_doc(schema, rng),
+        }
+        for i in range(count)
+    ]
+    raw = {
+        "took": 3,
+        "hits": {"total": {"value": count, "relation": "eq"}, "hits": hits},
+    }
+    return Response(Search(), raw)
+
+
+def marshmallow_bytes(message_schema_class, result, only):
+    return jsonify(message_schema_class(only=only).dump(result)).get_data()
+
+
+def compiled_bytes(message_schema_class, result, only):
+    return serialize(message_schema_class, result, only).get_data()
+
+
+def select_sets(entity_schema, rng):
+    names = list(entity_schema._declared_fields)
+    yield None
+    for name in names:
+        yield ["meta", f"results.{name}", "group_by"]
+    shuffled = rng.sample(names, min(5, len(names)))
+    yield ["meta"] + [f"results.{name}" for name in shuffled] + ["group_by"]
+
+
+@pytest.mark.parametrize("entity", ENTITIES)
+def test_compiled_output_matches_marshmallow(client, entity):
+    schemas = importlib.import_module(f"{entity}.schemas")
+    message_schema_class = schemas.MessageSchema
+    entity_schema = message_schema_class().fields["results"].schema
+    rng = random.Random(entity)
+    with client.application.test_request_context("/"):
+        for only in select_sets(entity_schema, rng):
+            result = {
+                "meta": {
+                    "count": 3,
+                    "db_response_time_ms": 5,
+                    "page": 1,
+                    "per_page": 25,
+                },
+                "results": fake_response(entity_schema, rng, 3),
+                "group_by": [],
+            }
+            expected = marshmallow_bytes(message_schema_class, result, only)
+            result["results"] = Response(Search(), result["results"].to_dict())
+            assert compiled_bytes(message_schema_class, result, only) == expected, only
+            # and the bytes came from orjson rather than the fallback
+            assert dumps(dump(message_schema_class, result, only)) is not None
+
+
+@pytest.mark.parametrize(
+    "meta, fwci",
+    [
+        ({}, 1e-05),
+        ({}, 3.5e16),
+        ({}, float("nan")),
+        ({}, "-inf"),
+        ({"count": 2**70}, 1.0),
+    ],
+)
+def test_values_orjson_formats_differently_fall_back(client, meta, fwci):
+    from works.schemas import MessageSchema
+
+    hit = {"_index": "fake", "_score": 1.0, "_source": {"id": "W1", "fwci": fwci}}
+    results = Response(Search(), {"hits": {"hits": [hit]}})
+    result = {"meta": meta, "results": results, "group_by": []}
+    with client.application.test_request_context("/"):
+        assert dumps(dump(MessageSchema, result)) is None
+        assert compiled_bytes(MessageSchema, result, None) == marshmallow_bytes(
+            MessageSchema, result, None
+        )
+
+
+def test_group_by_output_matches_marshmallow(client):
+    from works.schemas import MessageSchema
+
+    result = {
+        "meta": {"count": 2, "groups_count": 2, "q": "Zürich"},
+        "results": [],
+        "group_by": [
+            {
+                "key": "https://openalex.org/I1",
+                "key_display_name": "ETH Zürich",
+                "doc_count": 5,
+            },
+            {"key": "unknown", "key_display_name": None, "doc_count": "3"},
+        ],
+        "group_bys": [{"group_by_key": "type", "groups": []}],
+    }
+    with client.application.test_request_context("/"):
+        for only in [None, ["meta", "results.id", "group_by"]]:
+            assert compiled_bytes(MessageSchema, result, only) == marshmallow_bytes(
+                MessageSchema, result, only
+            )
+
+
+def test_list_endpoint_sends_compiled_output(client, fake_es):
+    fake_es.hits = [
+        {
+            "id": "https://openalex.org/W1",
+            "display_name": "Ünïcode",
+            "cited_by_count": 3,
+        }
+    ]
+    res = client.get("/works?select=id,display_name,cited_by_count")
+    assert res.status_code == 200
+    assert res.mimetype == "application/json"
+    assert res.get_data() == (
+        b'{"meta":{"count":1,"db_response_time_ms":1,"page":1,"per_page":25,'
+        b'"groups_count":null,"cache_status":"miss"},"results":[{"id":"https://openalex.org/W1",'
+        b'"display_name":"\\u00dcn\\u00efcode","cited_by_count":3}],"group_by":[]}\n'
+    )
+
+
+def test_marshmallow_internals_the_compiler_uses():
+    # compile_schema calls these, so check them again before upgrading marshmallow
+    assert marshmallow.__version__ == "3.18.0"
+    assert list(inspect.signature(Schema._has_processors).parameters) == ["self", "tag"]
+    assert list(inspect.signature(Schema._invoke_dump_processors).parameters) == [
+        "self",
+        "tag",
+        "data",
+        "many",
+        "original_data",
+    ]
+    assert callable(utils.get_value) and callable(utils.ensure_text_type)
+    assert isinstance(Schema().dump_fields, dict)
+
+
+def test_compiled_processors_match_marshmallow(client):
+    class HookedSchema(Schema):
+        id = fields.Str()
+        count = fields.Int()
+
+        @pre_dump(pass_many=True)
+        def add_count(self, data, many, **kwargs):
+            items = data if many else [data]
+            return (
+                [dict(item, count=len(items)) for item in items] if many else items[0]
+            )
+
+        @post_dump
+        def upper_id(self, data, **kwargs):
+            data["id"] = data["id"].upper()
+            return data
+
+    class HookedMessageSchema(Schema):
+        results = fields.Nested(HookedSchema, many=True)
+
+    result = {"results": [{"id": "w1"}, {"id": "w2", "count": 7}]}
+    with client.application.test_request_context("/"):
+        assert compiled_bytes(HookedMessageSchema, result, None) == marshmallow_bytes(
+            HookedMessageSchema, result, None
+        )
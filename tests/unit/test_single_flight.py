@@ -0,0 +1,151 @@
+"""Identical requests in flight at the same time reach elasticsearch once."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import redis
+
+from core.response_cache import response_cache_stats
+from core.single_flight import SingleFlight, lock_key, single_flight
+from extensions import cache
+
+
+class FakeRedis:
+    """Just enough of redis for locks, with expiry."""
+
+    def __init__(self):
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def get_live(self, key):
+        value, expires_at = self.values.get(key, (None, None))
+        if expires_at is not None and expires_at < time.monotonic():
+            del self.values[key]
+            return None
+        return value
+
+    def set(self, key, value, nx=False, px=None):
+        with self.lock:
+            if nx and self.get_live(key) is not None:
+                return None
+            self.values[key] = (value, time.monotonic() + px / 1000 if px else None)
+            return True
+
+    def exists(self, key):
+        with self.lock:
+            return int(self.get_live(key) is not None)
+
+    def eval(self, script, numkeys, key, token):
+        with self.lock:
+            if self.get_live(key) == token:
+                del self.values[key]
+                return 1
+            return 0
+
+
+class BrokenRedis:
+    def set(self, *args, **kwargs):
+        raise redis.ConnectionError("redis is down")
+
+
+@pytest.fixture
+def cached_client(client):
+    app = client.application
+    app.config["CACHE_TYPE"] = "SimpleCache"
+    cache.init_app(app)
+    response_cache_stats.clear()
+    single_flight.clear()
+    yield client
+    response_cache_stats.clear()
+    single_flight.clear()
+
+
+def test_parallel_duplicates_run_one_search(cached_client, fake_es):
+    fake_es.hits = [{"id": "https://openalex.org/W1"}]
+    fake_es.delay = 0.3
+    urls = [
+        "/works?per_page=50&filter=is_oa:true,publication_year:2020",
+        "/works?per-page=50&filter=publication_year:2020,is_oa:true",
+    ] * 5
+    with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+        responses = list(executor.map(cached_client.get, urls))
+
+    assert all(res.status_code == 200 for res in responses)
+    assert len({str(res.get_json()["results"]) for res in responses}) == 1
+    assert len([call for call in fake_es.calls if call[0] == "search"]) == 1
+    statuses = [res.headers["X-Response-Cache"] for res in responses]
+    assert statuses == [res.get_json()["meta"]["cache_status"] for res in responses]
+    assert statuses.count("miss") == 1
+    # duplicates that arrive after the leader finished are plain cache hits
+    assert set(statuses) - {"miss"} <= {"coalesced", "hit"}
+    assert single_flight.stats()["fallbacks"] == 0
+
+
+def test_waits_for_a_leader_in_another_worker():
+    fake_redis = FakeRedis()
+    results = {}
+    fake_redis.set(lock_key("key"), "other-worker", nx=True, px=2000)
+
+    def finish_elsewhere():
+        time.sleep(0.1)
+        results["key"] = "from the other worker"
+        fake_redis.eval(None, 1, lock_key("key"), "other-worker")
+
+    threading.Thread(target=finish_elsewhere).start()
+    flight = SingleFlight(2, 0.01, fake_redis)
+    computed = []
+    result = flight.run("key", lambda: computed.append(1), lambda: results.get("key"))
+    assert result == ("from the other worker", True)
+    assert computed == []
+
+
+def test_computes_when_the_leader_dies():
+    fake_redis = FakeRedis()
+    # a leader that never finishes, so its lock expires
+    fake_redis.set(lock_key("key"), "dead-worker", nx=True, px=100)
+    flight = SingleFlight(2, 0.01, fake_redis)
+    start = time.monotonic()
+    assert flight.run("key", lambda: "computed", lambda: None) == ("computed", False)
+    assert time.monotonic() - start < 1
+    assert flight.stats()["leaders"] == 1
+
+
+def test_lock_timeout_bounds_the_wait():
+    fake_redis = FakeRedis()
+    fake_redis.set(lock_key("key"), "slow-worker", nx=True, px=10000)
+    flight = SingleFlight(0.2, 0.01, fake_redis)
+    start = time.monotonic()
+    assert flight.run("key", lambda: "computed", lambda: None) == ("computed", False)
+    assert time.monotonic() - start < 1
+
+
+def test_releases_its_lock_when_done():
+    fake_redis = FakeRedis()
+    flight = SingleFlight(2, 0.01, fake_redis)
+    assert flight.run("key", lambda: "computed", lambda: None) == ("computed", False)
+    assert not fake_redis.exists(lock_key("key"))
+
+
+def test_redis_errors_fall_back_to_local_coalescing():
+    flight = SingleFlight(2, 0.01, BrokenRedis())
+    assert flight.run("key", lambda: "computed", lambda: None) == ("computed", False)
+
+
+def test_one_background_refresh_per_key():
+    fake_redis = FakeRedis()
+    flight = SingleFlight(2, 0.01, fake_redis)
+    release = threading.Event()
+    assert flight.run_in_background("key", release.wait)
+    assert not flight.run_in_background("key", release.wait)
+    release.set()
+
+
+def test_no_background_refresh_while_another_worker_computes():
+    fake_redis = FakeRedis()
+    fake_redis.set(lock_key("key"), "other-worker", nx=True, px=2000)
+    flight = SingleFlight(2, 0.01, fake_redis)
+    computed = []
+    assert not flight.run_in_background("key", lambda: computed.append(1))
+    assert computed == []
+    assert flight.stats()["in_flight"] == 0
@@ -0,0 +1,153 @@
+"""cited_by and related_to filters read id lists with terms lookups."""
+import json
+import time
+
+import pytest
+
+import settings
+from core.plan_cache import plan_cache
+from core.terms_lookup import work_locations
+from tests.conftest import FakeApiResponse
+
+CITING = "https://openalex.org/W2741809807"
+
+
+def lookups(body):
+    """Every terms lookup in a search body."""
+    found = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            terms = node.get("terms", {}).get("id")
+            if isinstance(terms, dict) or terms == []:
+                found.append(terms)
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(body)
+    return found
+
+
+@pytest.mark.parametrize(
+    "param, path", [("cited_by", "referenced_works"), ("related_to", "related_works")]
+)
+def test_filter_uses_a_terms_lookup(client, fake_es, param, path):
+    references = [f"https://openalex.org/W{i}" for i in range(10, 1500)]
+    fake_es.hits = [{"id": CITING, path: references}]
+    res = client.get(f"/works?filter={param}:W2741809807")
+    assert res.status_code == 200
+    assert [call[0] for call in fake_es.calls] == ["msearch", "search"]
+    body = fake_es.search_body()
+    assert lookups(body) == [{"index": "fake", "id": CITING, "path": path}]
+    # the referenced ids never travel in the query
+    assert len(json.dumps(body)) < 1000
+
+
+def test_work_locations_are_cached(client, fake_es):
+    fake_es.hits = [{"id": CITING}]
+    client.get("/works?filter=cited_by:W2741809807,publication_year:2020")
+    res = client.get("/works?filter=cited_by:W2741809807,is_oa:true")
+    assert res.status_code == 200
+    assert [call[0] for call in fake_es.calls] == ["msearch", "search", "search"]
+    assert work_locations.stats()["hits"] >= 1
+
+
+def test_or_values_are_located_together(client, fake_es):
+    fake_es.hits = [
+        {"id": f"https://openalex.org/W{i}"} for i in (2741809807, 2741809808)
+    ]
+    res = client.get("/works?filter=cited_by:W2741809807|W2741809808|W2741809809")
+    assert res.status_code == 200
+    (msearch,) = [call for call in fake_es.calls if call[0] == "msearch"]
+    assert len(msearch[2]) == 2
+    body = fake_es.search_body()
+    located = [
+        {"index": "fake", "id": work["id"], "path": "referenced_works"}
+        for work in fake_es.hits
+    ]
+    # the last is not a work we know, so it matches nothing
+    assert lookups(body) == located + [[]]
+
+
+def test_invalid_id(client, fake_es):
+    res = client.get("/works?filter=cited_by:nope")
+    assert res.status_code == 403
+
+
+def lookups_find_nothing(fake_es):
+    """Searches with a terms lookup find nothing, as if its work were not there."""
+    search = fake_es.search
+
+    def search_without_lookups(index=None, body=None, **kwargs):
+        if any(isinstance(lookup, dict) for lookup in lookups(body)):
+            fake_es.calls.append(("search", index, body))
+            response = fake_es.search_response(body, index)
+            response["hits"] = {"total": {"value": 0, "relation": "eq"}, "hits": []}
+            return FakeApiResponse(response)
+        return search(index=index, body=body, **kwargs)
+
+    fake_es.search = search_without_lookups
+
+
+def test_work_that_moved_is_searched_with_its_ids(client, fake_es):
+    references = ["https://openalex.org/W10", "https://openalex.org/W11"]
+    fake_es.hits = [{"id": CITING, "referenced_works": references}]
+    # cached before the work was reindexed into the index the fake serves it from
+    work_locations.set_local(settings.WORKS_INDEX, CITING, ["works-old", CITING])
+    lookups_find_nothing(fake_es)
+    res = client.get("/works?filter=cited_by:W2741809807")
+    assert res.status_code == 200
+    assert res.get_json()["meta"]["count"] == 1
+    stale, located, inline = [call[2] for call in fake_es.calls]
+    assert lookups(stale) == [
+        {"index": "works-old", "id": CITING, "path": "referenced_works"}
+    ]
+    assert located["query"]["bool"]["filter"] == [{"ids": {"values": [CITING]}}]
+    assert lookups(inline) == []
+    assert "https://openalex.org/W11" in json.dumps(inline)
+    assert work_locations.resolve({settings.WORKS_INDEX: [CITING]}) == {
+        CITING: ["fake", CITING]
+    }
+
+
+def test_works_still_where_they_were_cached_are_not_searched_again(client, fake_es):
+    fake_es.hits = [{"id": CITING}]
+    work_locations.set_local(settings.WORKS_INDEX, CITING, ["fake", CITING])
+    lookups_find_nothing(fake_es)
+    res = client.get("/works?filter=cited_by:W2741809807")
+    assert res.get_json()["meta"]["count"] == 0
+    assert [call[0] for call in fake_es.calls] == ["search", "search"]
+
+
+def test_work_not_indexed_yet_is_looked_up_again(client, fake_es, monkeypatch):
+    res = client.get("/works?filter=cited_by:W2741809807")
+    assert res.get_json()["meta"]["count"] == 0
+    assert lookups(fake_es.search_body()) == [[]]
+    # the plan naming no work is not kept, so it does not outlive the work's indexing
+    assert plan_cache.stats()["size"] == 0
+
+    fake_es.hits = [{"id": CITING}]
+    fake_es.calls.clear()
+    later = time.monotonic() + settings.WORK_LOCATION_MISS_CACHE_TTL + 1
+    monkeypatch.setattr("time.monotonic", lambda: later)
+    res = client.get("/works?filter=cited_by:W2741809807")
+    assert res.get_json()["meta"]["count"] == 1
+    assert [call[0] for call in fake_es.calls] == ["msearch", "search"]
+    assert lookups(fake_es.search_body()) == [
+        {"index": "fake", "id": CITING, "path": "referenced_works"}
+    ]
+
+
+def test_first_cursor_page_is_searched_again_in_its_point_in_time(client, fake_es):
+    fake_es.hits = [{"id": CITING, "referenced_works": ["https://openalex.org/W10"]}]
+    work_locations.set_local(settings.WORKS_INDEX, CITING, ["works-old", CITING])
+    lookups_find_nothing(fake_es)
+    res = client.get("/works?filter=cited_by:W2741809807&cursor=*")
+    assert res.status_code == 200
+    assert [call[0] for call in fake_es.calls].count("open_point_in_time") == 1
+    in_pit = [call for call in fake_es.calls if call[0] == "search" and not call[1]]
+    stale, inline = [call[2] for call in in_pit]
+    assert stale["pit"] == inline["pit"]
@@ -0,0 +1,79 @@
+"""Fields are shared by every request, so concurrent queries must not leak values."""
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from elasticsearch_dsl import Search
+
+from core.filter import filter_records
+from core.utils import map_filter_params
+from works.fields import fields_dict
+
+FILTER_TEMPLATES = [
+    "publication_year:{n}",
+    "cited_by_count:{n}-{m}",
+    "authorships.institutions.id:I{n}|I{m}",
+    "concepts.id:!C{n}|C{m}",
+    "has_doi:{flag},from_publication_date:{year}-01-01",
+    "institutions.country_code:{country}",
+    "topics.field.id:{n}",
+]
+
+
+def filter_strings(count):
+    countries = ["fr", "de", "gb", "us", "jp"]
+    for i in range(count):
+        template = FILTER_TEMPLATES[i % len(FILTER_TEMPLATES)]
+        yield template.format(
+            n=1000 + i,
+            m=2000 + i,
+            flag="true" if i % 2 else "false",
+            year=1950 + i % 70,
+            country=countries[i % len(countries)],
+        )
+
+
+@pytest.fixture
+def frequent_thread_switches():
+    # switch threads far more often than the default so races surface quickly
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def build(filter_string):
+    s = filter_records(fields_dict, map_filter_params(filter_string), Search())
+    return s.to_dict()
+
+
+def test_concurrent_queries_do_not_leak(frequent_thread_switches):
+    filters = list(filter_strings(700))
+    expected = [build(f) for f in filters]
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        for _ in range(5):
+            assert list(executor.map(build, filters)) == expected
+
+
+def test_fields_are_immutable():
+    field = fields_dict["publication_year"]
+    with pytest.raises(AttributeError):
+        field.value = "2020"
+    with pytest.raises(AttributeError):
+        field.param = "cited_by_count"
+
+
+def test_concurrent_requests_send_their_own_filters(client, fake_es):
+    years = list(range(1900, 2020))
+
+    def get(year):
+        return client.get(f"/works?filter=publication_year:{year}").status_code
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        assert set(executor.map(get, years)) == {200}
+
+    sent_years = sorted(
+        int(call[2]["query"]["bool"]["filter"][0]["term"]["publication_year"])
+        for call in fake_es.calls
+    )
+    assert sent_years == years
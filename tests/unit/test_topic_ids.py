@@ -0,0 +1,83 @@
+"""Domain, field and subfield ids map to one url whichever format they are given in."""
+import pytest
+
+from core.topic_ids import canonical_topic_id, merge_topic_results
+
+
+@pytest.mark.parametrize(
+    "value", ["3", "domains/3", "https://openalex.org/domains/3", 3]
+)
+def test_canonical_id(value):
+    assert canonical_topic_id("domains", value) == "https://openalex.org/domains/3"
+
+
+def works_query(client, fake_es, filter):
+    client.get(f"/works?filter={filter}")
+    return fake_es.search_body()["query"]
+
+
+@pytest.mark.parametrize(
+    "filter, field, url",
+    [
+        ("topics.domain.id:3", "topics.domain.id", "https://openalex.org/domains/3"),
+        (
+            "primary_topic.field.id:fields/17",
+            "primary_topic.field.id",
+            "https://openalex.org/fields/17",
+        ),
+        (
+            "topics.subfield.id:https://openalex.org/subfields/1702",
+            "topics.subfield.id",
+            "https://openalex.org/subfields/1702",
+        ),
+    ],
+)
+def test_filter_is_one_terms_query(client, fake_es, filter, field, url):
+    query = works_query(client, fake_es, filter)
+    assert query == {
+        "bool": {"filter": [{"terms": {field: [url, url.rsplit("/", 1)[1]]}}]}
+    }
+
+
+def test_negated_filter(client, fake_es):
+    query = works_query(client, fake_es, "topics.domain.id:!3")
+    assert query == {
+        "bool": {
+            "must_not": [
+                {"terms": {"topics.domain.id": ["https://openalex.org/domains/3", "3"]}}
+            ]
+        }
+    }
+
+
+def test_single_format_once_migrated(client, fake_es, monkeypatch):
+    monkeypatch.setattr("settings.TOPIC_IDS_SINGLE_FORMAT", True)
+    query = works_query(client, fake_es, "topics.domain.id:3|4")
+    assert query == {
+        "bool": {
+            "filter": [
+                {
+                    "terms": {
+                        "topics.domain.id": [
+                            "https://openalex.org/domains/3",
+                            "https://openalex.org/domains/4",
+                        ]
+                    }
+                }
+            ]
+        }
+    }
+
+
+def test_merge_sums_both_formats_in_first_position():
+    url = "https://openalex.org/fields/"
+    results = [
+        {"key": f"{url}17", "key_display_name": "A", "doc_count": 9},
+        {"key": "22", "key_display_name": "B", "doc_count": 5},
+        {"key": "17", "key_display_name": None, "doc_count": 4},
+        {"key": f"{url}22", "key_display_name": "B", "doc_count": 2},
+    ]
+    assert merge_topic_results(results, "fields") == [
+        {"key": f"{url}17", "key_display_name": "A", "doc_count": 13},
+        {"key": f"{url}22", "key_display_name": "B", "doc_count": 7},
+    ]
@@ -2,18 +2,19 @@ from flask import Blueprint, jsonify, request
 
 from config.entity_config import entity_configs_dict
 from config.property_config import property_configs_dict
+from core.bulk_export import shared_export_view
 from core.export import export_group_by, is_group_by_export
 from core.filters_view import shared_filter_view
 from core.histogram import shared_histogram_view
+from core.response_cache import cached_list_view
 from core.schemas import FiltersWrapperSchema, HistogramWrapperSchema
+from core.serialization import serialize
 from core.shared_view import shared_view
 from core.utils import (
     get_flattened_fields,
     get_valid_fields,
-    is_cached,
     process_only_fields,
 )
-from extensions import cache
 from work_types.fields import fields_dict
 from work_types.schemas import TypesSchema, MessageSchema
 from settings import WORK_TYPES_INDEX
@@ -21,11 +22,9 @@ from settings import WORK_TYPES_INDEX
 blueprint = Blueprint("types", __name__)
 
 
-@blueprint.route("/types")
-@blueprint.route("/work-types")
-@cache.cached(
-    timeout=24 * 60 * 60, query_string=True, unless=lambda: not is_cached(request)
-)
+@blueprint.route("/types", methods=["GET", "POST"])
+@blueprint.route("/work-types", methods=["GET", "POST"])
+@cached_list_view(fields_dict)
 def types():
     index_name = WORK_TYPES_INDEX
     default_sort = ["-works_count", "id"]
@@ -34,8 +33,16 @@ def types():
     # export option
     if is_group_by_export(request):
         return export_group_by(result, request)
-    message_schema = MessageSchema(only=only_fields)
-    return message_schema.dump(result)
+    return serialize(MessageSchema, result, only_fields)
+
+
+@blueprint.route("/types/export.jsonl")
+@blueprint.route("/work-types/export.jsonl")
+def work_types_export():
+    index_name = WORK_TYPES_INDEX
+    return shared_export_view(
+        request, fields_dict, index_name, TypesSchema, "work-types"
+    )
 
 
 @blueprint.route("/types/filters/<path:params>")
@@ -2,15 +2,16 @@ from flask import Blueprint, jsonify, request
 
 from config.entity_config import entity_configs_dict
 from config.property_config import property_configs_dict
+from core.bulk_export import shared_export_view
 from core.export import export_group_by, is_group_by_export
 from core.filters_view import shared_filter_view
+from core.response_cache import cached_list_view
 from core.semantic import semantic_search
 from core.schemas import FiltersWrapperSchema, StatsWrapperSchema
+from core.serialization import serialize
 from core.shared_view import shared_view
 from core.stats_view import shared_stats_view
-from core.utils import (get_flattened_fields, get_valid_fields, is_cached,
-                        process_only_fields)
-from extensions import cache
+from core.utils import get_flattened_fields, get_valid_fields, process_only_fields
 from settings import WORKS_INDEX
 from works.fields import fields_dict
 from works.schemas import MessageSchema, WorksSchema
@@ -29,10 +30,8 @@ def index():
     )
 
 
-@blueprint.route("/works")
-@cache.cached(
-    timeout=24 * 60 * 60, query_string=True, unless=lambda: not is_cached(request)
-)
+@blueprint.route("/works", methods=["GET", "POST"])
+@cached_list_view(fields_dict)
 def works():
     index_name = WORKS_INDEX
     default_sort = ["-cited_by_percentile_year.max", "-cited_by_count", "id"]
@@ -41,8 +40,13 @@ def works():
     # export option
     if is_group_by_export(request):
         return export_group_by(result, request)
-    message_schema = MessageSchema(only=only_fields)
-    return message_schema.dump(result)
+    return serialize(MessageSchema, result, only_fields)
+
+
+@blueprint.route("/works/export.jsonl")
+def works_export():
+    index_name = WORKS_INDEX
+    return shared_export_view(request, fields_dict, index_name, WorksSchema, "works")
 
 
 @blueprint.route("/works/filters/<path:params>")